@@ -0,0 +1,96 @@
+import gzip
+from typing import Any, Awaitable, Callable
+
+try:
+    import brotli
+except ImportError:  # optional; without it only gzip is offered
+    brotli = None
+
+Message = dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    offered = ["br", "gzip"] if brotli is not None else ["gzip"]
+    candidates = [(weights.get(coding, weights.get("*", 0.0)), coding) for coding in offered]
+    # Ties keep server preference order (brotli first), since it compresses JSON better at similar cost.
+    weight, coding = max(candidates, key=lambda candidate: (candidate[0], -offered.index(candidate[1])))
+    return coding if weight > 0 else None
+
+
+def _with_vary(headers: list[tuple[bytes, bytes]], drop: set[bytes]) -> list[tuple[bytes, bytes]]:
+    kept = [(name, value) for name, value in headers if name.lower() not in drop | {b"vary"}]
+    vary = [value for name, value in headers if name.lower() == b"vary"]
+    return [*kept, (b"vary", b", ".join([*vary, b"Accept-Encoding"]))]
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class JSONCompressionMiddleware:
+    def __init__(self, app: Callable[..., Awaitable[None]], min_bytes: int = 1024) -> None:
+        self.app = app
+        self.min_bytes = min_bytes
+
+    async def __call__(self, scope: dict[str, Any], receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate_encoding(dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1"))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+
+        async def compressing_send(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                content_type = headers.get(b"content-type", b"")
+                if content_type.startswith(b"application/json") and b"content-encoding" not in headers:
+                    # Held back until the body shows whether it is a single, large enough JSON document.
+                    start = message
+                    return
+                await send(message)
+                return
+
+            if start is None:
+                await send(message)
+                return
+            held, start = start, None
+            body = message.get("body", b"")
+            if message.get("more_body") or len(body) < self.min_bytes:
+                # Streamed or small bodies pass through untouched; only the Vary header is added.
+                await send({**held, "headers": _with_vary(held["headers"], set())})
+                await send(message)
+                return
+
+            compressed = compress(body, coding)
+            headers = _with_vary(held["headers"], {b"content-length"}) + [
+                (b"content-encoding", coding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+            ]
+            await send({**held, "headers": headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, compressing_send)
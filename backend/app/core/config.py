@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -5,6 +6,30 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 BACKEND_DIR = BASE_DIR.parent
 load_dotenv(BACKEND_DIR / ".env")
 
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)).strip())
+    except ValueError:
+        return default
+
+
+def _env_sizes(name: str, default: str) -> list[tuple[int, int]]:
+    sizes: list[tuple[int, int]] = []
+    for item in os.getenv(name, default).split(","):
+        width, _, height = item.strip().lower().partition("x")
+        if width.isdigit() and height.isdigit():
+            sizes.append((int(width), int(height)))
+    return sizes
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)).strip())
+    except ValueError:
+        return default
+
+
 STATIC_DIR = BASE_DIR / "static"
 RESULT_DIR = STATIC_DIR / "results"
 TEST_IMAGE_DIR = STATIC_DIR / "test_images"
@@ -18,5 +43,112 @@ MODELS: dict[str, dict[str, str]] = {
         "hf_id": "facebook/mask2former-swin-large-ade-semantic",
         "note": "Official Mask2Former checkpoint on ADE20K semantic segmentation.",
         "label_space": "ADE20K-150",
+        # fp32 | int8_dynamic | bf16 | channels_last, combinable with "+" (e.g. "int8_dynamic+channels_last").
+        "execution_mode": os.getenv("ADE20K_EXECUTION_MODE", "fp32").strip() or "fp32",
+        # torch (eager PyTorch) | onnxruntime (exported ONNX graph, CPU).
+        "backend": os.getenv("ADE20K_BACKEND", "torch").strip().lower() or "torch",
     }
 }
+
+INFERENCE_MAX_BATCH_SIZE = max(1, _env_int("INFERENCE_MAX_BATCH_SIZE", 4))
+INFERENCE_MAX_BATCH_WAIT_MS = max(0.0, _env_float("INFERENCE_MAX_BATCH_WAIT_MS", 15.0))
+INFERENCE_WORKERS = max(1, _env_int("INFERENCE_WORKERS", 4))
+INFERENCE_QUEUE_SIZE = max(0, _env_int("INFERENCE_QUEUE_SIZE", 8))
+
+# "label_map": one palette PNG per prediction, per-class masks served on demand.
+# "files": legacy mode writing one PNG per detected class.
+MASK_ARTIFACT_MODE = os.getenv("MASK_ARTIFACT_MODE", "label_map").strip().lower()
+
+PREDICTION_CACHE_DIR = RESULT_DIR / "cache"
+PREDICTION_CACHE_MEMORY_ENTRIES = max(0, _env_int("PREDICTION_CACHE_MEMORY_ENTRIES", 128))
+PREDICTION_CACHE_DISK_ENTRIES = max(0, _env_int("PREDICTION_CACHE_DISK_ENTRIES", 1024))
+
+# Retention for static/results; 0 disables the corresponding limit.
+RESULT_TTL_SEC = max(0.0, _env_float("RESULT_TTL_SEC", 24 * 60 * 60))
+RESULT_MAX_BYTES = max(0, _env_int("RESULT_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+RESULT_MAX_FILES = max(0, _env_int("RESULT_MAX_FILES", 20000))
+RESULT_SWEEP_INTERVAL_SEC = max(1.0, _env_float("RESULT_SWEEP_INTERVAL_SEC", 300.0))
+
+# Comma-separated model keys to load at startup; "all" preloads every entry in MODELS, "" disables.
+_preload_raw = os.getenv("PRELOAD_MODELS", "all").strip()
+PRELOAD_MODELS = list(MODELS) if _preload_raw == "all" else [k.strip() for k in _preload_raw.split(",") if k.strip()]
+WARMUP_RUNS = max(0, _env_int("WARMUP_RUNS", 1))
+WARMUP_SIZES = _env_sizes("WARMUP_SIZES", "512x512,1024x768")
+
+# Estimated parameter memory allowed for resident models before LRU eviction; 0 means unlimited.
+MODEL_MEMORY_BUDGET_MB = max(0, _env_int("MODEL_MEMORY_BUDGET_MB", 4096))
+
+# Exported ONNX graphs are cached here and reused across restarts; 0 threads lets ONNX Runtime decide.
+ONNX_EXPORT_DIR = Path(os.getenv("ONNX_EXPORT_DIR", str(BACKEND_DIR / "exports")))
+# The exported graph has one fixed WIDTHxHEIGHT input; smaller inputs are padded to it, larger ones downscaled.
+ONNX_INPUT_SIZE = (_env_sizes("ONNX_INPUT_SIZE", "1024x1024") or [(1024, 1024)])[0]
+ORT_INTRA_OP_THREADS = max(0, _env_int("ORT_INTRA_OP_THREADS", 0))
+ORT_INTER_OP_THREADS = max(0, _env_int("ORT_INTER_OP_THREADS", 0))
+
+# "resize": aspect-preserving downscale so the longest side is at most INFERENCE_MAX_SIDE.
+# "tiled": overlapping INFERENCE_TILE_SIZE windows over an image capped at INFERENCE_TILED_MAX_SIDE.
+# Both can be overridden per request (resolution_mode / max_side).
+INFERENCE_RESOLUTION_MODE = os.getenv("INFERENCE_RESOLUTION_MODE", "resize").strip().lower() or "resize"
+INFERENCE_MAX_SIDE = max(64, _env_int("INFERENCE_MAX_SIDE", 1024))
+INFERENCE_TILED_MAX_SIDE = max(64, _env_int("INFERENCE_TILED_MAX_SIDE", 2048))
+INFERENCE_TILE_SIZE = max(64, _env_int("INFERENCE_TILE_SIZE", 640))
+INFERENCE_TILE_OVERLAP = min(max(0, _env_int("INFERENCE_TILE_OVERLAP", 128)), INFERENCE_TILE_SIZE // 2)
+
+# Upload ingestion: byte cap enforced while streaming the request body, pixel cap checked from the image
+# header before decoding, and JPEG draft decoding down to the inference resolution.
+INGEST_MAX_UPLOAD_BYTES = max(0, _env_int("INGEST_MAX_UPLOAD_BYTES", 25 * 1024 * 1024))
+INGEST_MAX_PIXELS = max(0, _env_int("INGEST_MAX_PIXELS", 64_000_000))
+INGEST_JPEG_DRAFT = os.getenv("INGEST_JPEG_DRAFT", "true").strip().lower() not in {"0", "false", "no", "off"}
+
+# Overlay / original / mask PNGs are encoded by a background writer pool; URLs are returned before the files
+# exist and GET /static/results/{name} waits up to ARTIFACT_WAIT_TIMEOUT_SEC (or answers 202 with ?wait=false).
+ARTIFACT_WRITER_WORKERS = max(0, _env_int("ARTIFACT_WRITER_WORKERS", 2))
+ARTIFACT_IMAGE_FORMAT = os.getenv("ARTIFACT_IMAGE_FORMAT", "png").strip().lower() or "png"
+ARTIFACT_PNG_COMPRESS_LEVEL = min(9, max(0, _env_int("ARTIFACT_PNG_COMPRESS_LEVEL", 3)))
+ARTIFACT_LOSSY_QUALITY = min(100, max(1, _env_int("ARTIFACT_LOSSY_QUALITY", 90)))
+ARTIFACT_WAIT_TIMEOUT_SEC = max(0.0, _env_float("ARTIFACT_WAIT_TIMEOUT_SEC", 10.0))
+
+# /predict-batch: item count and total request body limits; items run with at most INFERENCE_WORKERS in flight.
+PREDICT_BATCH_MAX_ITEMS = max(1, _env_int("PREDICT_BATCH_MAX_ITEMS", 32))
+PREDICT_BATCH_MAX_BYTES = max(0, _env_int("PREDICT_BATCH_MAX_BYTES", 100 * 1024 * 1024))
+
+# Asynchronous jobs (POST /jobs): in-process priority queue drained by JOB_WORKERS threads; finished jobs
+# (and their results) are kept for JOB_RESULT_TTL_SEC, at most JOB_MAX_RETAINED of them.
+JOB_WORKERS = max(1, _env_int("JOB_WORKERS", 2))
+JOB_MAX_QUEUED = max(0, _env_int("JOB_MAX_QUEUED", 100))
+JOB_RESULT_TTL_SEC = max(0.0, _env_float("JOB_RESULT_TTL_SEC", 3600.0))
+JOB_MAX_RETAINED = max(1, _env_int("JOB_MAX_RETAINED", 1000))
+
+# /describe: pooled keep-alive client with at most GEMINI_MAX_CONCURRENCY upstream calls, jittered retries on
+# 429/5xx/network errors, and a TTL + LRU cache keyed by the canonical hash of top_classes / area_stats.
+GEMINI_MAX_CONCURRENCY = max(1, _env_int("GEMINI_MAX_CONCURRENCY", 4))
+GEMINI_MAX_RETRIES = max(0, _env_int("GEMINI_MAX_RETRIES", 2))
+GEMINI_RETRY_BACKOFF_SEC = max(0.0, _env_float("GEMINI_RETRY_BACKOFF_SEC", 0.5))
+DESCRIPTION_CACHE_TTL_SEC = max(0.0, _env_float("DESCRIPTION_CACHE_TTL_SEC", 3600.0))
+DESCRIPTION_CACHE_MAX_ENTRIES = max(0, _env_int("DESCRIPTION_CACHE_MAX_ENTRIES", 512))
+
+# Test image catalog index (SQLite): a background thread checks the directory every CATALOG_REFRESH_INTERVAL_SEC,
+# re-indexes it when its mtime changes and fully re-stats it every CATALOG_FULL_SCAN_INTERVAL_SEC; requests only
+# read the index. /test-images pages are capped at CATALOG_PAGE_MAX_LIMIT entries.
+CATALOG_INDEX_PATH = Path(os.getenv("CATALOG_INDEX_PATH", str(BACKEND_DIR / "catalog_index.sqlite3")))
+CATALOG_FULL_SCAN_INTERVAL_SEC = max(0.0, _env_float("CATALOG_FULL_SCAN_INTERVAL_SEC", 300.0))
+CATALOG_REFRESH_INTERVAL_SEC = max(0.1, _env_float("CATALOG_REFRESH_INTERVAL_SEC", 2.0))
+CATALOG_PAGE_MAX_LIMIT = max(1, _env_int("CATALOG_PAGE_MAX_LIMIT", 500))
+
+# Gallery thumbnails: rendered lazily (or via scripts/generate_thumbnails.py) into THUMBNAIL_DIR, keyed by the
+# source image's SHA-256, and served with a THUMBNAIL_MAX_AGE_SEC immutable Cache-Control header.
+THUMBNAIL_DIR = Path(os.getenv("THUMBNAIL_DIR", str(BACKEND_DIR / "thumbnails")))
+THUMBNAIL_SIZES = tuple(
+    int(size) for size in os.getenv("THUMBNAIL_SIZES", "160,320,640").split(",") if size.strip().isdigit()
+) or (320,)
+THUMBNAIL_DEFAULT_SIZE = _env_int("THUMBNAIL_DEFAULT_SIZE", 320)
+THUMBNAIL_FORMAT = os.getenv("THUMBNAIL_FORMAT", "webp").strip().lower()
+if THUMBNAIL_FORMAT not in {"webp", "jpeg"}:
+    THUMBNAIL_FORMAT = "webp"
+THUMBNAIL_QUALITY = min(100, max(1, _env_int("THUMBNAIL_QUALITY", 80)))
+THUMBNAIL_MAX_AGE_SEC = max(0, _env_int("THUMBNAIL_MAX_AGE_SEC", 31536000))
+
+# HTTP caching: result artifacts are named by content and served with a strong ETag and an immutable
+# Cache-Control of ARTIFACT_MAX_AGE_SEC; JSON responses of at least COMPRESSION_MIN_BYTES are gzip/brotli encoded.
+ARTIFACT_MAX_AGE_SEC = max(0, _env_int("ARTIFACT_MAX_AGE_SEC", 31536000))
+COMPRESSION_MIN_BYTES = max(0, _env_int("COMPRESSION_MIN_BYTES", 1024))
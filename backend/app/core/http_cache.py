@@ -0,0 +1,55 @@
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def immutable_cache_control(max_age_sec: int) -> str:
+    return f"public, max-age={max_age_sec}, immutable"
+
+
+@lru_cache(maxsize=4096)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def file_etag(path: Path) -> str:
+    # Keyed by mtime and size, so each file is hashed once until it is rewritten.
+    stat = path.stat()
+    return f'"{_file_digest(str(path), stat.st_mtime_ns, stat.st_size)}"'
+
+
+def content_etag(content: bytes) -> str:
+    return f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so a W/ prefix on the client's tag still matches.
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def not_modified(request: Request, etag: str, headers: dict[str, str]) -> Response | None:
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={**headers, "ETag": etag})
+    return None
+
+
+def cached_file_response(
+    request: Request, path: Path, max_age_sec: int, media_type: str | None = None
+) -> Response:
+    etag = file_etag(path)
+    headers = {"Cache-Control": immutable_cache_control(max_age_sec)}
+    return not_modified(request, etag, headers) or FileResponse(
+        path, media_type=media_type, headers={**headers, "ETag": etag}
+    )
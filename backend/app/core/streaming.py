@@ -0,0 +1,47 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from fastapi import HTTPException
+
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def stream_format(requested: str | None, accept: str | None) -> str:
+    if requested:
+        if requested not in STREAM_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unknown stream format: {requested} (ndjson or sse)")
+        return requested
+    return "sse" if accept and "text/event-stream" in accept else "ndjson"
+
+
+def encode_event(fmt: str, event: str, payload: dict[str, Any]) -> bytes:
+    data = json.dumps(payload, ensure_ascii=False)
+    if fmt == "sse":
+        return f"event: {event}\ndata: {data}\n\n".encode()
+    return f"{data}\n".encode()
+
+
+async def as_completed_limited(
+    jobs: list[Callable[[], Awaitable[Any]]], concurrency: int
+) -> AsyncIterator[tuple[int, Any, HTTPException | None]]:
+    # Yields (index, result, error) in completion order with at most `concurrency` jobs running;
+    # remaining jobs are cancelled if the consumer stops early (e.g. the client disconnects).
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(index: int, job: Callable[[], Awaitable[Any]]) -> tuple[int, Any, HTTPException | None]:
+        async with semaphore:
+            try:
+                return index, await job(), None
+            except HTTPException as exc:
+                return index, None, exc
+            except Exception as exc:
+                return index, None, HTTPException(status_code=500, detail=str(exc) or type(exc).__name__)
+
+    tasks = [asyncio.create_task(run(index, job)) for index, job in enumerate(jobs)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,56 @@
+import json
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException
+
+Message = dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+# Room for multipart boundaries and the non-file form fields around the upload itself.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+BODY_TOO_LARGE_DETAIL = "Request body too large"
+
+
+class UploadSizeLimitMiddleware:
+    def __init__(self, app: Callable[..., Awaitable[None]], max_body_bytes: int, paths: set[str]) -> None:
+        self.app = app
+        self.max_body_bytes = max_body_bytes + MULTIPART_OVERHEAD_BYTES if max_body_bytes else 0
+        self.paths = paths
+
+    async def __call__(self, scope: dict[str, Any], receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in self.paths
+            or not self.max_body_bytes
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_body_bytes:
+            body = json.dumps({"detail": BODY_TOO_LARGE_DETAIL}).encode()
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 413,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    # Raised mid-parse; FastAPI re-raises HTTPException from body parsing as-is.
+                    raise HTTPException(status_code=413, detail=BODY_TOO_LARGE_DETAIL)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,78 +1,708 @@
-import io
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import FastAPI, File, Form, HTTPException, Query, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from PIL import Image
+from starlette.concurrency import run_in_threadpool
 
-from app.core.config import ADE20K_MODEL_KEY, RESULT_DIR, STATIC_DIR, TEST_IMAGE_DIR
+from app.core.config import (
+    ADE20K_MODEL_KEY,
+    ARTIFACT_IMAGE_FORMAT,
+    ARTIFACT_LOSSY_QUALITY,
+    ARTIFACT_MAX_AGE_SEC,
+    ARTIFACT_PNG_COMPRESS_LEVEL,
+    ARTIFACT_WAIT_TIMEOUT_SEC,
+    ARTIFACT_WRITER_WORKERS,
+    CATALOG_FULL_SCAN_INTERVAL_SEC,
+    CATALOG_INDEX_PATH,
+    CATALOG_PAGE_MAX_LIMIT,
+    CATALOG_REFRESH_INTERVAL_SEC,
+    COMPRESSION_MIN_BYTES,
+    DESCRIPTION_CACHE_MAX_ENTRIES,
+    DESCRIPTION_CACHE_TTL_SEC,
+    GEMINI_MAX_CONCURRENCY,
+    GEMINI_MAX_RETRIES,
+    GEMINI_RETRY_BACKOFF_SEC,
+    INFERENCE_MAX_BATCH_SIZE,
+    INFERENCE_MAX_BATCH_WAIT_MS,
+    INFERENCE_MAX_SIDE,
+    INFERENCE_QUEUE_SIZE,
+    INFERENCE_RESOLUTION_MODE,
+    INFERENCE_TILE_OVERLAP,
+    INFERENCE_TILE_SIZE,
+    INFERENCE_TILED_MAX_SIDE,
+    INFERENCE_WORKERS,
+    INGEST_JPEG_DRAFT,
+    INGEST_MAX_PIXELS,
+    INGEST_MAX_UPLOAD_BYTES,
+    JOB_MAX_QUEUED,
+    JOB_MAX_RETAINED,
+    JOB_RESULT_TTL_SEC,
+    JOB_WORKERS,
+    MASK_ARTIFACT_MODE,
+    MODEL_MEMORY_BUDGET_MB,
+    ONNX_EXPORT_DIR,
+    ONNX_INPUT_SIZE,
+    ORT_INTER_OP_THREADS,
+    ORT_INTRA_OP_THREADS,
+    PREDICTION_CACHE_DIR,
+    PREDICTION_CACHE_DISK_ENTRIES,
+    PREDICTION_CACHE_MEMORY_ENTRIES,
+    PREDICT_BATCH_MAX_BYTES,
+    PREDICT_BATCH_MAX_ITEMS,
+    PRELOAD_MODELS,
+    RESULT_DIR,
+    RESULT_MAX_BYTES,
+    RESULT_MAX_FILES,
+    RESULT_SWEEP_INTERVAL_SEC,
+    RESULT_TTL_SEC,
+    STATIC_DIR,
+    TEST_IMAGE_DIR,
+    THUMBNAIL_DEFAULT_SIZE,
+    THUMBNAIL_DIR,
+    THUMBNAIL_FORMAT,
+    THUMBNAIL_MAX_AGE_SEC,
+    THUMBNAIL_QUALITY,
+    THUMBNAIL_SIZES,
+    WARMUP_RUNS,
+    WARMUP_SIZES,
+)
+from app.core.compression import JSONCompressionMiddleware
+from app.core.http_cache import cached_file_response, content_etag, immutable_cache_control, not_modified
+from app.core.streaming import STREAM_FORMATS, as_completed_limited, encode_event, stream_format
+from app.core.upload_limit import UploadSizeLimitMiddleware
 from app.models.registry import ModelRegistry
+from app.models.resolution import ResolutionPolicy
 from app.schemas import DescribeRequest, PredictByIdRequest
+from app.services.artifact_writer_service import ArtifactWriterService
 from app.services.description_service import DescriptionService
-from app.services.inference_service import InferenceService
+from app.services.image_ingest_service import DecodedImage, ImageIngestService
+from app.services.inference_executor import InferenceExecutor
+from app.services.inference_service import POSTPROCESS_VERSION, InferenceService
+from app.services.job_queue_service import TERMINAL_STATES, JobContext, JobQueueService
 from app.services.metrics_service import MetricsService
+from app.services.model_warmup_service import ModelWarmupService
 from app.services.image_catalog_service import ImageCatalogService
+from app.services.prediction_cache_service import PredictionCacheService
+from app.services.result_retention_service import ResultRetentionService
+from app.services.thumbnail_service import ThumbnailService
 from app.services.visualization_service import VisualizationService
 
 model_registry = ModelRegistry()
-visualization_service = VisualizationService(RESULT_DIR)
+artifact_writer = ArtifactWriterService(max_workers=ARTIFACT_WRITER_WORKERS)
+visualization_service = VisualizationService(
+    RESULT_DIR,
+    artifact_writer=artifact_writer,
+    image_format=ARTIFACT_IMAGE_FORMAT,
+    png_compress_level=ARTIFACT_PNG_COMPRESS_LEVEL,
+    lossy_quality=ARTIFACT_LOSSY_QUALITY,
+)
 metrics_service = MetricsService()
-inference_service = InferenceService(model_registry, visualization_service, metrics_service)
-description_service = DescriptionService()
-test_image_service = ImageCatalogService(TEST_IMAGE_DIR)
+inference_service = InferenceService(
+    model_registry,
+    visualization_service,
+    metrics_service,
+    max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+    max_batch_wait_ms=INFERENCE_MAX_BATCH_WAIT_MS,
+    mask_mode=MASK_ARTIFACT_MODE,
+    model_memory_budget_mb=MODEL_MEMORY_BUDGET_MB,
+    onnx_export_dir=ONNX_EXPORT_DIR,
+    onnx_input_size=ONNX_INPUT_SIZE,
+    ort_intra_op_threads=ORT_INTRA_OP_THREADS,
+    ort_inter_op_threads=ORT_INTER_OP_THREADS,
+    resolution_policies={
+        "resize": ResolutionPolicy("resize", max_side=INFERENCE_MAX_SIDE),
+        "tiled": ResolutionPolicy(
+            "tiled",
+            max_side=INFERENCE_TILED_MAX_SIDE,
+            tile_size=INFERENCE_TILE_SIZE,
+            tile_overlap=INFERENCE_TILE_OVERLAP,
+        ),
+    },
+    default_resolution_mode=INFERENCE_RESOLUTION_MODE,
+)
+inference_executor = InferenceExecutor(max_workers=INFERENCE_WORKERS, max_queue=INFERENCE_QUEUE_SIZE)
+prediction_cache = PredictionCacheService(
+    PREDICTION_CACHE_DIR,
+    STATIC_DIR,
+    version=f"{POSTPROCESS_VERSION}-{MASK_ARTIFACT_MODE}",
+    max_memory_entries=PREDICTION_CACHE_MEMORY_ENTRIES,
+    max_disk_entries=PREDICTION_CACHE_DISK_ENTRIES,
+    is_pending=artifact_writer.is_pending,
+)
+result_retention = ResultRetentionService(
+    RESULT_DIR,
+    ttl_sec=RESULT_TTL_SEC,
+    max_total_bytes=RESULT_MAX_BYTES,
+    max_files=RESULT_MAX_FILES,
+    sweep_interval_sec=RESULT_SWEEP_INTERVAL_SEC,
+)
+model_warmup = ModelWarmupService(
+    inference_service,
+    PRELOAD_MODELS,
+    warmup_runs=WARMUP_RUNS,
+    warmup_sizes=WARMUP_SIZES,
+)
+description_service = DescriptionService(
+    max_concurrency=GEMINI_MAX_CONCURRENCY,
+    max_retries=GEMINI_MAX_RETRIES,
+    backoff_base_sec=GEMINI_RETRY_BACKOFF_SEC,
+    cache_ttl_sec=DESCRIPTION_CACHE_TTL_SEC,
+    cache_max_entries=DESCRIPTION_CACHE_MAX_ENTRIES,
+)
+thumbnail_service = ThumbnailService(
+    THUMBNAIL_DIR,
+    sizes=THUMBNAIL_SIZES,
+    default_size=THUMBNAIL_DEFAULT_SIZE,
+    image_format=THUMBNAIL_FORMAT,
+    quality=THUMBNAIL_QUALITY,
+)
+test_image_service = ImageCatalogService(
+    TEST_IMAGE_DIR,
+    index_path=CATALOG_INDEX_PATH,
+    full_scan_interval_sec=CATALOG_FULL_SCAN_INTERVAL_SEC,
+    refresh_interval_sec=CATALOG_REFRESH_INTERVAL_SEC,
+    thumbnail_service=thumbnail_service,
+)
+image_ingest = ImageIngestService(
+    max_upload_bytes=INGEST_MAX_UPLOAD_BYTES, max_pixels=INGEST_MAX_PIXELS, jpeg_draft=INGEST_JPEG_DRAFT
+)
+job_queue = JobQueueService(
+    max_workers=JOB_WORKERS,
+    max_queued=JOB_MAX_QUEUED,
+    retention_sec=JOB_RESULT_TTL_SEC,
+    max_retained=JOB_MAX_RETAINED,
+)
+JOB_EVENT_POLL_SEC = 0.25
+JOB_ADMISSION_POLL_SEC = 0.25
+
+
+StatsCallback = Callable[[dict[str, Any]], None]
+ARTIFACT_FIELDS = ("prediction_id", "original_url", "overlay_url", "label_map_url", "class_masks")
+
+
+def _predict_decoded(
+    decoded: DecodedImage,
+    model_key: str,
+    policy: ResolutionPolicy,
+    original_url: str,
+    on_stats: StatsCallback | None = None,
+) -> dict:
+    result = inference_service.run_prediction(
+        decoded.image,
+        model_key=model_key,
+        policy=policy,
+        original_url=original_url,
+        on_stats=on_stats,
+        output_size=decoded.source_size,
+    )
+    return {**result, "decode_ms": decoded.decode_ms, "ingest": decoded.describe()}
+
+
+def _predict_upload(
+    raw: bytes, model_key: str, policy: ResolutionPolicy, on_stats: StatsCallback | None = None
+) -> dict:
+    decoded = image_ingest.decode(raw, max_side=policy.max_side)
+    original_url = visualization_service.save_upload(raw, decoded.format, prediction_cache.content_hash(raw))
+    return _predict_decoded(decoded, model_key, policy, original_url, on_stats)
+
+
+def _stored_predictor(image_id: str) -> Callable[..., dict]:
+    def predict(
+        raw: bytes, model_key: str, policy: ResolutionPolicy, on_stats: StatsCallback | None = None
+    ) -> dict:
+        decoded = image_ingest.decode(raw, max_side=policy.max_side, invalid_detail="Invalid stored image")
+        return _predict_decoded(decoded, model_key, policy, test_image_service.url_for(image_id), on_stats)
+
+    return predict
+
+
+def _cache_variant(model_key: str, policy: ResolutionPolicy) -> str:
+    return f"{model_key}@{model_registry.backend(model_key)}:{model_registry.execution_mode(model_key)}/{policy.tag}"
+
+
+async def _cached_prediction(
+    raw: bytes,
+    model_key: str,
+    policy: ResolutionPolicy,
+    predict: Callable[[bytes, str, ResolutionPolicy], dict],
+) -> dict:
+    cache_key = await run_in_threadpool(prediction_cache.key_for, raw, _cache_variant(model_key, policy))
+    cached = await run_in_threadpool(prediction_cache.get, cache_key)
+    if cached is not None:
+        return cached
+
+    result = await inference_executor.run(predict, raw, model_key, policy)
+    await run_in_threadpool(prediction_cache.put, cache_key, result)
+    return {**result, "cached": False}
+
+
+def _catalog_image_path(image_id: str) -> Path:
+    image_path = test_image_service.resolve(image_id)
+    if not image_path.is_file():
+        raise HTTPException(status_code=404, detail=f"Unknown image_id: {image_id}")
+    return image_path
+
+
+async def _predict_catalog_image(image_id: str, model_key: str, policy: ResolutionPolicy) -> dict:
+    raw = await run_in_threadpool(_catalog_image_path(image_id).read_bytes)
+    return await _cached_prediction(raw, model_key, policy, _stored_predictor(image_id))
+
+
+def _run_admitted(ctx: JobContext, fn: Callable[..., dict], *args: Any) -> dict:
+    # Jobs share the inference executor's slots with requests, so JOB_WORKERS never adds inference concurrency.
+    # A full executor makes a request fail fast with 503; a job instead stays in "waiting" until a slot frees up.
+    waiting = False
+    while True:
+        try:
+            future = inference_executor.submit(fn, *args)
+            break
+        except HTTPException as exc:
+            if exc.status_code != 503:
+                raise
+            if not waiting:
+                ctx.report("waiting")
+                waiting = True
+            ctx.check_cancelled()
+            time.sleep(JOB_ADMISSION_POLL_SEC)
+    ctx.report("inference")
+    return future.result()
+
+
+def _prediction_job(
+    read: Callable[[], bytes],
+    model_key: str,
+    policy: ResolutionPolicy,
+    predict: Callable[[bytes, str, ResolutionPolicy], dict],
+) -> Callable[[JobContext], dict]:
+    # Runs on a job worker thread, but inference itself goes through the inference executor like any request;
+    # the batch scheduler still coalesces it with concurrent requests.
+    def task(ctx: JobContext) -> dict:
+        ctx.report("reading")
+        raw = read()
+        cache_key = prediction_cache.key_for(raw, _cache_variant(model_key, policy))
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = _run_admitted(ctx, predict, raw, model_key, policy)
+        ctx.report("caching")
+        prediction_cache.put(cache_key, result)
+        return {**result, "cached": False}
+
+    return task
+
+
+def _wait_for_artifacts(result: dict) -> None:
+    urls = [result.get("original_url"), result.get("overlay_url"), result.get("label_map_url")]
+    for url in urls:
+        if url and url.startswith("/static/results/"):
+            artifact_writer.wait(visualization_service.result_path(url.rsplit("/", 1)[-1]), ARTIFACT_WAIT_TIMEOUT_SEC)
+
+
+def _failing_job(error: HTTPException) -> Callable[[], Awaitable[dict]]:
+    async def job() -> dict:
+        raise error
+
+    return job
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    result_retention.start()
+    test_image_service.start()
+    await description_service.aopen()
+    model_warmup.start()
+    try:
+        yield
+    finally:
+        result_retention.stop()
+        test_image_service.stop()
+        job_queue.shutdown()
+        artifact_writer.shutdown()
+        await description_service.aclose()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Mask2Former ADE20K Demo", version="0.3.0")
+    app = FastAPI(title="Mask2Former ADE20K Demo", version="0.3.0", lifespan=lifespan)
+    app.add_middleware(
+        UploadSizeLimitMiddleware,
+        max_body_bytes=INGEST_MAX_UPLOAD_BYTES,
+        paths={"/predict", "/jobs", "/predict-describe"},
+    )
+    app.add_middleware(UploadSizeLimitMiddleware, max_body_bytes=PREDICT_BATCH_MAX_BYTES, paths={"/predict-batch"})
+    app.add_middleware(JSONCompressionMiddleware, min_bytes=COMPRESSION_MIN_BYTES)
+    # Added last so it is outermost: responses sent by the middlewares above (e.g. early 413s) still get CORS headers.
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Mask-BBox"],
     )
+
+    # Registered ahead of the /static mount so result artifacts still being encoded can be awaited.
+    @app.get("/static/results/{name}")
+    async def result_artifact(request: Request, name: str, wait: bool = True) -> Response:
+        path = visualization_service.result_path(name)
+        if artifact_writer.is_pending(path):
+            if wait:
+                await run_in_threadpool(artifact_writer.wait, path, ARTIFACT_WAIT_TIMEOUT_SEC)
+            if artifact_writer.is_pending(path):
+                return JSONResponse(
+                    status_code=202,
+                    content={"detail": "Artifact is still being written"},
+                    headers={"Retry-After": "1"},
+                )
+        if not path.is_file():
+            raise HTTPException(status_code=404, detail=f"Unknown artifact: {name}")
+        # Names are derived from the artifact content and never rewritten with different bytes.
+        return cached_file_response(request, path, ARTIFACT_MAX_AGE_SEC)
+
     app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
     @app.get("/health")
     def health() -> dict[str, str]:
         return {"status": "ok"}
 
+    @app.get("/ready")
+    def ready() -> JSONResponse:
+        ready = model_warmup.is_ready()
+        return JSONResponse(
+            status_code=200 if ready else 503,
+            content={"ready": ready, "models": model_warmup.status()},
+        )
+
+    @app.get("/metrics")
+    def metrics() -> dict[str, dict]:
+        return {
+            "prediction_cache": prediction_cache.stats(),
+            "inference_executor": inference_executor.stats(),
+            "model_pool": inference_service.model_pool.stats(),
+            "result_retention": result_retention.stats(),
+            "artifact_writer": artifact_writer.stats(),
+            "jobs": job_queue.stats(),
+            "description": description_service.stats(),
+            "catalog": test_image_service.stats(),
+            "thumbnails": thumbnail_service.stats(),
+        }
+
     @app.get("/models")
     def models() -> dict[str, list[dict[str, str]]]:
         return {"models": model_registry.list_models()}
 
     @app.get("/test-images")
-    def test_images() -> dict[str, list[dict[str, str | list[str]]]]:
-        return {"images": test_image_service.list_images()}
+    def test_images(
+        limit: int | None = Query(None, ge=1),
+        cursor: str | None = None,
+        q: str | None = None,
+        tag: str | None = None,
+        min_width: int | None = Query(None, ge=1),
+        min_height: int | None = Query(None, ge=1),
+    ) -> dict:
+        # Without `limit` every matching image is returned, as before pagination existed.
+        return test_image_service.list_page(
+            limit=min(limit, CATALOG_PAGE_MAX_LIMIT) if limit is not None else None,
+            cursor=cursor,
+            q=q,
+            tag=tag,
+            min_width=min_width,
+            min_height=min_height,
+        )
+
+    @app.get("/thumbnails/{size}/{name}")
+    async def thumbnail(request: Request, size: int, name: str) -> Response:
+        content_hash = thumbnail_service.parse_name(size, name)
+        source = await run_in_threadpool(test_image_service.find_by_hash, content_hash)
+        path = await run_in_threadpool(thumbnail_service.ensure, source, content_hash, size)
+        # The URL embeds the source hash, so the bytes behind it never change.
+        return cached_file_response(
+            request, path, THUMBNAIL_MAX_AGE_SEC, media_type=f"image/{thumbnail_service.image_format}"
+        )
 
     @app.post("/predict")
-    async def predict(file: UploadFile = File(...), model_key: str = Form(ADE20K_MODEL_KEY)) -> dict:
+    async def predict(
+        file: UploadFile = File(...),
+        model_key: str = Form(ADE20K_MODEL_KEY),
+        resolution_mode: str | None = Form(None),
+        max_side: int | None = Form(None),
+    ) -> dict:
         if not file.content_type or not file.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="Upload an image file")
 
-        raw = await file.read()
-        try:
-            image = Image.open(io.BytesIO(raw)).convert("RGB")
-        except Exception as exc:
-            raise HTTPException(status_code=400, detail="Invalid image") from exc
-
-        return inference_service.run_prediction(image, model_key=model_key)
+        policy = inference_service.resolution_policy(resolution_mode, max_side)
+        raw = await image_ingest.read_upload(file)
+        return await _cached_prediction(raw, model_key, policy, _predict_upload)
 
     @app.post("/predict-by-id")
-    def predict_by_id(req: PredictByIdRequest) -> dict:
-        image_path = test_image_service.resolve(req.image_id)
-        if not image_path.exists() or not image_path.is_file():
-            raise HTTPException(status_code=404, detail=f"Unknown image_id: {req.image_id}")
+    async def predict_by_id(req: PredictByIdRequest) -> dict:
+        policy = inference_service.resolution_policy(req.resolution_mode, req.max_side)
+        return await _predict_catalog_image(req.image_id, ADE20K_MODEL_KEY, policy)
 
-        try:
-            image = Image.open(image_path).convert("RGB")
-        except Exception as exc:
-            raise HTTPException(status_code=400, detail="Invalid stored image") from exc
+    @app.post("/predict-batch")
+    async def predict_batch(
+        request: Request,
+        files: list[UploadFile] | None = File(None),
+        image_ids: list[str] | None = Form(None),
+        model_key: str = Form(ADE20K_MODEL_KEY),
+        resolution_mode: str | None = Form(None),
+        max_side: int | None = Form(None),
+        response_format: str | None = Query(None, alias="format"),
+    ) -> StreamingResponse:
+        fmt = stream_format(response_format, request.headers.get("accept"))
+        model_registry.hf_id(model_key)
+        policy = inference_service.resolution_policy(resolution_mode, max_side)
+        files = files or []
+        image_ids = image_ids or []
+        total = len(files) + len(image_ids)
+        if total == 0:
+            raise HTTPException(status_code=400, detail="Provide at least one file or image_id")
+        if total > PREDICT_BATCH_MAX_ITEMS:
+            raise HTTPException(status_code=400, detail=f"At most {PREDICT_BATCH_MAX_ITEMS} items per batch")
+
+        # Uploads are read before streaming starts; the form's temp files close once the handler returns.
+        sources: list[dict[str, str]] = []
+        jobs = []
+        for file in files:
+            sources.append({"filename": file.filename or ""})
+            if not file.content_type or not file.content_type.startswith("image/"):
+                jobs.append(_failing_job(HTTPException(status_code=400, detail="Upload an image file")))
+                continue
+            raw = await image_ingest.read_upload(file)
+            jobs.append(lambda raw=raw: _cached_prediction(raw, model_key, policy, _predict_upload))
+        for image_id in image_ids:
+            sources.append({"image_id": image_id})
+            jobs.append(lambda image_id=image_id: _predict_catalog_image(image_id, model_key, policy))
+
+        async def events() -> AsyncIterator[bytes]:
+            start = time.perf_counter()
+            succeeded = 0
+            async for index, result, error in as_completed_limited(jobs, inference_executor.max_workers):
+                if error is None:
+                    succeeded += 1
+                    line = {"index": index, "source": sources[index], "status": 200, "result": result}
+                else:
+                    line = {
+                        "index": index,
+                        "source": sources[index],
+                        "status": error.status_code,
+                        "detail": error.detail,
+                    }
+                yield encode_event(fmt, "result", line)
+            summary = {
+                "done": True,
+                "total": total,
+                "succeeded": succeeded,
+                "failed": total - succeeded,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+            }
+            yield encode_event(fmt, "done", summary)
+
+        return StreamingResponse(
+            events(),
+            media_type=STREAM_FORMATS[fmt],
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.post("/jobs", status_code=202)
+    async def submit_job(
+        file: UploadFile | None = File(None),
+        image_id: str | None = Form(None),
+        model_key: str = Form(ADE20K_MODEL_KEY),
+        resolution_mode: str | None = Form(None),
+        max_side: int | None = Form(None),
+        priority: int = Form(0),
+    ) -> dict:
+        if (file is None) == (image_id is None):
+            raise HTTPException(status_code=400, detail="Provide exactly one of file or image_id")
+        model_registry.hf_id(model_key)
+        policy = inference_service.resolution_policy(resolution_mode, max_side)
+
+        if file is not None:
+            if not file.content_type or not file.content_type.startswith("image/"):
+                raise HTTPException(status_code=400, detail="Upload an image file")
+            raw = await image_ingest.read_upload(file)
+            task = _prediction_job(lambda: raw, model_key, policy, _predict_upload)
+            source = {"filename": file.filename or ""}
+        else:
+            image_path = _catalog_image_path(image_id)
+            task = _prediction_job(image_path.read_bytes, model_key, policy, _stored_predictor(image_id))
+            source = {"image_id": image_id}
+
+        job = job_queue.submit(
+            task,
+            priority=priority,
+            meta={"source": source, "model_key": model_key, "resolution": policy.describe()},
+        )
+        return {
+            **job,
+            "status_url": f"/jobs/{job['job_id']}",
+            "events_url": f"/jobs/{job['job_id']}/events",
+        }
+
+    @app.get("/jobs/{job_id}")
+    def job_status(job_id: str) -> dict:
+        return job_queue.get(job_id)
+
+    @app.delete("/jobs/{job_id}")
+    def cancel_job(job_id: str) -> dict:
+        return job_queue.cancel(job_id)
+
+    @app.get("/jobs/{job_id}/events")
+    async def job_events(
+        job_id: str,
+        request: Request,
+        response_format: str | None = Query(None, alias="format"),
+    ) -> StreamingResponse:
+        fmt = stream_format(response_format, request.headers.get("accept"))
+        job_queue.get(job_id)
+
+        async def events() -> AsyncIterator[bytes]:
+            version = -1
+            while True:
+                try:
+                    job = job_queue.get(job_id)
+                except HTTPException as exc:
+                    error = {"job_id": job_id, "status": exc.status_code, "detail": exc.detail}
+                    yield encode_event(fmt, "error", error)
+                    return
+                if job["version"] != version:
+                    version = job["version"]
+                    terminal = job["status"] in TERMINAL_STATES
+                    yield encode_event(fmt, "done" if terminal else "progress", job)
+                    if terminal:
+                        return
+                await asyncio.sleep(JOB_EVENT_POLL_SEC)
+
+        return StreamingResponse(
+            events(),
+            media_type=STREAM_FORMATS[fmt],
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.post("/predict-describe")
+    async def predict_describe(
+        request: Request,
+        file: UploadFile | None = File(None),
+        image_id: str | None = Form(None),
+        model_key: str = Form(ADE20K_MODEL_KEY),
+        resolution_mode: str | None = Form(None),
+        max_side: int | None = Form(None),
+        describe: bool = Form(True),
+        response_format: str | None = Query(None, alias="format"),
+    ) -> StreamingResponse:
+        fmt = stream_format(response_format, request.headers.get("accept"))
+        if (file is None) == (image_id is None):
+            raise HTTPException(status_code=400, detail="Provide exactly one of file or image_id")
+        model_registry.hf_id(model_key)
+        policy = inference_service.resolution_policy(resolution_mode, max_side)
+        if file is not None:
+            if not file.content_type or not file.content_type.startswith("image/"):
+                raise HTTPException(status_code=400, detail="Upload an image file")
+            raw = await image_ingest.read_upload(file)
+            predictor: Callable[..., dict] = _predict_upload
+        else:
+            raw = await run_in_threadpool(_catalog_image_path(image_id).read_bytes)
+            predictor = _stored_predictor(image_id)
+
+        loop = asyncio.get_running_loop()
+        stages: asyncio.Queue[tuple[str, Any]] = asyncio.Queue()
+
+        def on_stats(stats: dict[str, Any]) -> None:
+            loop.call_soon_threadsafe(stages.put_nowait, ("stats", stats))
+
+        async def predict_stage() -> None:
+            try:
+                result = await _cached_prediction(raw, model_key, policy, partial(predictor, on_stats=on_stats))
+            except HTTPException as exc:
+                await stages.put(("error", exc))
+            except Exception as exc:
+                await stages.put(("error", HTTPException(status_code=500, detail=str(exc) or type(exc).__name__)))
+            else:
+                await stages.put(("result", result))
+
+        async def describe_stage(stats: dict[str, Any]) -> dict[str, Any]:
+            payload = DescribeRequest(
+                top_classes=stats["top_classes"],
+                area_stats=stats["area_stats"],
+                inference_ms=stats.get("inference_ms"),
+            )
+            try:
+                return {"status": 200, **await description_service.describe(payload)}
+            except HTTPException as exc:
+                return {"status": exc.status_code, "detail": exc.detail}
+
+        async def events() -> AsyncIterator[bytes]:
+            start = time.perf_counter()
+            marks: dict[str, float] = {}
+
+            def mark(stage: str) -> None:
+                marks[f"{stage}_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+            prediction = asyncio.create_task(predict_stage())
+            description: asyncio.Task | None = None
+            stats_sent = False
+            try:
+                while True:
+                    kind, payload = await stages.get()
+                    if kind == "error":
+                        yield encode_event(fmt, "error", {"status": payload.status_code, "detail": payload.detail})
+                        return
+                    if kind == "stats" or not stats_sent:
+                        # Stats normally arrive from the inference thread before rendering; a cache hit
+                        # skips that callback, so they are then taken from the cached result.
+                        stats = payload
+                        if kind == "result":
+                            stats = {key: value for key, value in payload.items() if key not in ARTIFACT_FIELDS}
+                        stats_sent = True
+                        mark("stats")
+                        yield encode_event(fmt, "stats", stats)
+                        if describe:
+                            description = asyncio.create_task(describe_stage(stats))
+                    if kind == "result":
+                        await run_in_threadpool(_wait_for_artifacts, payload)
+                        mark("artifacts")
+                        yield encode_event(fmt, "artifacts", payload)
+                        break
+
+                if description is not None:
+                    described = await description
+                    mark("description")
+                    yield encode_event(fmt, "description", described)
+                mark("total")
+                yield encode_event(fmt, "done", {"done": True, **marks})
+            finally:
+                prediction.cancel()
+                if description is not None:
+                    description.cancel()
+
+        return StreamingResponse(
+            events(),
+            media_type=STREAM_FORMATS[fmt],
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
-        return inference_service.run_prediction(image, model_key=ADE20K_MODEL_KEY)
+    @app.get("/class-masks/{label_map_name}/{class_id}")
+    def class_mask(request: Request, label_map_name: str, class_id: int, crop: bool = False) -> Response:
+        content, bbox = visualization_service.encode_class_mask(label_map_name, class_id, crop=crop)
+        etag = content_etag(content)
+        headers = {
+            "X-Mask-BBox": ",".join(str(v) for v in bbox),
+            "Cache-Control": immutable_cache_control(ARTIFACT_MAX_AGE_SEC),
+        }
+        return not_modified(request, etag, headers) or Response(
+            content=content, media_type="image/png", headers={**headers, "ETag": etag}
+        )
 
     @app.post("/describe")
-    def describe(req: DescribeRequest) -> dict:
-        return description_service.describe(req)
+    async def describe(req: DescribeRequest) -> dict:
+        return await description_service.describe(req)
 
     @app.get("/")
     def root() -> dict[str, str]:
@@ -0,0 +1,60 @@
+import contextlib
+from typing import Iterator
+
+import torch
+
+EXECUTION_MODES = ("fp32", "int8_dynamic", "bf16", "channels_last")
+
+
+def parse_execution_mode(raw: str) -> frozenset[str]:
+    modes = frozenset(part.strip() for part in raw.lower().split("+") if part.strip()) - {"fp32"}
+    unknown = modes - set(EXECUTION_MODES)
+    if unknown:
+        raise ValueError(f"Unknown execution mode(s): {', '.join(sorted(unknown))}")
+    if "int8_dynamic" in modes and "bf16" in modes:
+        raise ValueError("int8_dynamic and bf16 cannot be combined")
+    return modes
+
+
+def format_execution_mode(modes: frozenset[str]) -> str:
+    return "+".join(mode for mode in EXECUTION_MODES if mode in modes) or "fp32"
+
+
+def bf16_supported(device: torch.device) -> bool:
+    if device.type == "cuda":
+        return torch.cuda.is_bf16_supported()
+    if device.type == "cpu":
+        try:
+            return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+        except (AttributeError, RuntimeError):
+            return False
+    return False
+
+
+def prepare_model(model: torch.nn.Module, modes: frozenset[str], device: torch.device) -> torch.nn.Module:
+    if "int8_dynamic" in modes:
+        if device.type != "cpu":
+            raise ValueError("int8_dynamic execution is only supported on CPU")
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if "bf16" in modes and not bf16_supported(device):
+        # Falling back to fp32 here would still report "bf16" in responses and mode comparisons.
+        raise ValueError(f"bf16 execution is not supported on {device.type} here")
+    if "channels_last" in modes:
+        model = model.to(memory_format=torch.channels_last)
+    return model.eval()
+
+
+def prepare_inputs(inputs: dict[str, torch.Tensor], modes: frozenset[str]) -> dict[str, torch.Tensor]:
+    if "channels_last" in modes and "pixel_values" in inputs:
+        inputs = {**inputs, "pixel_values": inputs["pixel_values"].contiguous(memory_format=torch.channels_last)}
+    return inputs
+
+
+@contextlib.contextmanager
+def forward_context(modes: frozenset[str], device: torch.device) -> Iterator[None]:
+    with torch.inference_mode():
+        if "bf16" in modes:
+            with torch.autocast(device_type=device.type, dtype=torch.bfloat16):
+                yield
+        else:
+            yield
@@ -0,0 +1,104 @@
+import math
+import re
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+import torch
+
+ONNX_OPSET = 17
+ONNX_OUTPUT_NAMES = ["class_queries_logits", "masks_queries_logits"]
+DEFAULT_INPUT_SIZE = (1024, 1024)
+
+
+class _LogitsOnly(torch.nn.Module):
+    def __init__(self, model: torch.nn.Module) -> None:
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+        outputs = self.model(pixel_values=pixel_values)
+        return outputs.class_queries_logits, outputs.masks_queries_logits
+
+
+def onnx_artifact_path(export_dir: Path, hf_id: str, input_size: tuple[int, int] = DEFAULT_INPUT_SIZE) -> Path:
+    safe_id = re.sub(r"[^A-Za-z0-9._-]+", "--", hf_id)
+    torch_version = torch.__version__.split("+")[0]
+    width, height = input_size
+    return export_dir / f"{safe_id}.{width}x{height}.opset{ONNX_OPSET}.torch{torch_version}.onnx"
+
+
+def export_onnx(model: torch.nn.Module, path: Path, input_size: tuple[int, int] = DEFAULT_INPUT_SIZE) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".onnx.tmp")
+    width, height = input_size
+    sample = torch.zeros((1, 3, height, width), dtype=torch.float32)
+    # Tracing freezes Swin's padding branches and the pixel decoder's spatial shapes at the sample size, so
+    # the graph is only valid for that size; only the batch axis is dynamic and OnnxRuntimeModel pads to it.
+    with torch.no_grad():
+        torch.onnx.export(
+            _LogitsOnly(model.cpu().eval()),
+            (sample,),
+            str(tmp_path),
+            input_names=["pixel_values"],
+            output_names=ONNX_OUTPUT_NAMES,
+            dynamic_axes={
+                "pixel_values": {0: "batch"},
+                "class_queries_logits": {0: "batch"},
+                "masks_queries_logits": {0: "batch"},
+            },
+            opset_version=ONNX_OPSET,
+            dynamo=False,
+        )
+    tmp_path.replace(path)
+    return path
+
+
+class OnnxRuntimeModel:
+    def __init__(self, onnx_path: Path, config: Any, intra_op_threads: int = 0, inter_op_threads: int = 0) -> None:
+        try:
+            import onnxruntime as ort
+        except ImportError as exc:
+            raise RuntimeError("The onnxruntime backend requires `pip install onnxruntime`") from exc
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(onnx_path), options, providers=["CPUExecutionProvider"])
+        self.onnx_path = onnx_path
+        self.config = config
+        _, _, height, width = self.session.get_inputs()[0].shape
+        self.input_size = (int(width), int(height))
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.onnx_path.stat().st_size
+
+    def _fit(self, pixel_values: torch.Tensor) -> tuple[torch.Tensor, int, int]:
+        # Larger inputs are downscaled to fit, then everything is zero-padded at the bottom/right like
+        # the image processor's batch padding. Returns the padded batch and the valid region inside it.
+        target_w, target_h = self.input_size
+        height, width = pixel_values.shape[-2:]
+        scale = min(1.0, target_h / height, target_w / width)
+        if scale < 1.0:
+            height, width = max(1, round(height * scale)), max(1, round(width * scale))
+            pixel_values = torch.nn.functional.interpolate(
+                pixel_values, size=(height, width), mode="bilinear", align_corners=False
+            )
+        padded = torch.nn.functional.pad(pixel_values, (0, target_w - width, 0, target_h - height))
+        return padded, height, width
+
+    def __call__(self, pixel_values: torch.Tensor, **_: Any) -> SimpleNamespace:
+        padded, valid_h, valid_w = self._fit(pixel_values.detach().float().cpu())
+        feed = {"pixel_values": np.ascontiguousarray(padded.numpy())}
+        class_logits, mask_logits = self.session.run(ONNX_OUTPUT_NAMES, feed)
+        target_w, target_h = self.input_size
+        mask_h, mask_w = mask_logits.shape[-2:]
+        crop_h = max(1, math.ceil(valid_h * mask_h / target_h))
+        crop_w = max(1, math.ceil(valid_w * mask_w / target_w))
+        return SimpleNamespace(
+            class_queries_logits=torch.from_numpy(class_logits),
+            masks_queries_logits=torch.from_numpy(np.ascontiguousarray(mask_logits[..., :crop_h, :crop_w])),
+        )
@@ -11,6 +11,8 @@ class ModelRegistry:
                 "hf_id": meta["hf_id"],
                 "label_space": meta["label_space"],
                 "note": meta["note"],
+                "execution_mode": meta.get("execution_mode", "fp32"),
+                "backend": meta.get("backend", "torch"),
             }
             for model_key, meta in MODELS.items()
         ]
@@ -19,3 +21,11 @@ class ModelRegistry:
         if model_key not in MODELS:
             raise HTTPException(status_code=400, detail=f"Unknown model_key: {model_key}")
         return MODELS[model_key]["hf_id"]
+
+    def execution_mode(self, model_key: str) -> str:
+        self.hf_id(model_key)
+        return MODELS[model_key].get("execution_mode", "fp32")
+
+    def backend(self, model_key: str) -> str:
+        self.hf_id(model_key)
+        return MODELS[model_key].get("backend", "torch")
@@ -0,0 +1,91 @@
+import math
+from dataclasses import dataclass
+from typing import Any
+
+RESOLUTION_MODES = ("resize", "tiled")
+MIN_INFERENCE_SIDE = 64
+MAX_INFERENCE_SIDE = 8192
+
+
+@dataclass(frozen=True)
+class ResolutionPolicy:
+    mode: str = "resize"
+    max_side: int = 1024
+    tile_size: int = 640
+    tile_overlap: int = 128
+
+    @property
+    def tag(self) -> str:
+        if self.mode == "tiled":
+            return f"tiled{self.max_side}-t{self.tile_size}-o{self.tile_overlap}"
+        return f"resize{self.max_side}"
+
+    def describe(self) -> dict[str, Any]:
+        described: dict[str, Any] = {"mode": self.mode, "max_side": self.max_side}
+        if self.mode == "tiled":
+            described.update({"tile_size": self.tile_size, "tile_overlap": self.tile_overlap})
+        return described
+
+
+DEFAULT_RESOLUTION_POLICIES = {
+    "resize": ResolutionPolicy("resize", max_side=1024),
+    "tiled": ResolutionPolicy("tiled", max_side=2048, tile_size=640, tile_overlap=128),
+}
+
+
+def parse_resolution_policy(
+    mode: str | None,
+    max_side: int | None,
+    defaults: dict[str, ResolutionPolicy],
+    default_mode: str = "resize",
+) -> ResolutionPolicy:
+    mode = (mode or default_mode).strip().lower()
+    if mode not in RESOLUTION_MODES:
+        raise ValueError(f"Unknown resolution mode: {mode} (expected one of {', '.join(RESOLUTION_MODES)})")
+    policy = defaults[mode]
+    if max_side is None:
+        return policy
+    if not MIN_INFERENCE_SIDE <= max_side <= MAX_INFERENCE_SIDE:
+        raise ValueError(f"max_side must be between {MIN_INFERENCE_SIDE} and {MAX_INFERENCE_SIDE}")
+    return ResolutionPolicy(policy.mode, max_side, policy.tile_size, policy.tile_overlap)
+
+
+def fit_within(size: tuple[int, int], max_side: int) -> tuple[int, int]:
+    width, height = size
+    longest = max(width, height)
+    if longest <= max_side:
+        return width, height
+    scale = max_side / longest
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def inference_size(
+    size: tuple[int, int],
+    shortest_edge: int | None,
+    longest_edge: int | None,
+    size_divisor: int = 0,
+) -> tuple[int, int]:
+    # Mirrors Mask2FormerImageProcessor's resize rule so do_resize=False sees the same geometry.
+    width, height = size
+    if shortest_edge:
+        short, long = sorted((width, height))
+        new_short, new_long = shortest_edge, int(shortest_edge * long / short)
+        if longest_edge and new_long > longest_edge:
+            new_short, new_long = int(longest_edge * new_short / new_long), longest_edge
+        width, height = (new_short, new_long) if width <= height else (new_long, new_short)
+    else:
+        width, height = fit_within((width, height), longest_edge or max(width, height))
+
+    if size_divisor > 0:
+        width = math.ceil(width / size_divisor) * size_divisor
+        height = math.ceil(height / size_divisor) * size_divisor
+    return max(1, width), max(1, height)
+
+
+def tile_origins(length: int, tile: int, overlap: int) -> list[int]:
+    if length <= tile:
+        return [0]
+    stride = max(1, tile - overlap)
+    origins = list(range(0, length - tile, stride))
+    origins.append(length - tile)
+    return origins
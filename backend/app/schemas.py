@@ -5,6 +5,8 @@ from pydantic import BaseModel
 
 class PredictByIdRequest(BaseModel):
     image_id: str
+    resolution_mode: str | None = None
+    max_side: int | None = None
 
 
 class DescribeRequest(BaseModel):
@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactWriterService:
+    def __init__(self, max_workers: int = 2) -> None:
+        self.max_workers = max(0, max_workers)
+        self._executor = (
+            ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="artifact-writer")
+            if self.max_workers
+            else None
+        )
+        self._lock = threading.Lock()
+        self._pending: dict[Path, Future] = {}
+        self._counters = {"submitted": 0, "written": 0, "failed": 0, "reused": 0}
+        self._write_ms_total = 0.0
+
+    def _reuse(self, path: Path) -> Future | None:
+        # Artifact names are derived from their content, so an in-flight or existing file already holds these bytes.
+        future = self._pending.get(path)
+        if future is None:
+            if not path.is_file():
+                return None
+            # Refreshing mtime keeps a reused artifact out of retention while it is referenced again.
+            path.touch()
+            future = Future()
+            future.set_result(path)
+        self._counters["reused"] += 1
+        return future
+
+    def submit(self, path: Path, render: Callable[[], Image.Image], save_kwargs: dict[str, Any]) -> Future:
+        with self._lock:
+            self._counters["submitted"] += 1
+            reused = self._reuse(path)
+            if reused is not None:
+                return reused
+            if self._executor is not None:
+                future = self._executor.submit(self._write, path, render, save_kwargs)
+                self._pending[path] = future
+
+        if self._executor is None:
+            future = Future()
+            future.set_result(self._write(path, render, save_kwargs))
+            return future
+        future.add_done_callback(lambda _: self._forget(path, future))
+        return future
+
+    def _forget(self, path: Path, future: Future) -> None:
+        with self._lock:
+            if self._pending.get(path) is future:
+                del self._pending[path]
+
+    def _write(self, path: Path, render: Callable[[], Image.Image], save_kwargs: dict[str, Any]) -> Path:
+        start = time.perf_counter()
+        # Per-thread temp names let inline writers race on the same content-derived path safely.
+        tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        try:
+            render().save(tmp_path, **save_kwargs)
+            tmp_path.replace(path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            with self._lock:
+                self._counters["failed"] += 1
+            logger.exception("artifact write failed: %s", path.name)
+            raise
+
+        with self._lock:
+            self._counters["written"] += 1
+            self._write_ms_total += (time.perf_counter() - start) * 1000
+        return path
+
+    def is_pending(self, path: Path) -> bool:
+        with self._lock:
+            return path in self._pending
+
+    def wait(self, path: Path, timeout: float | None = None) -> bool:
+        with self._lock:
+            future = self._pending.get(path)
+        if future is None:
+            return path.is_file()
+        try:
+            future.result(timeout=timeout)
+        except Exception:
+            return False
+        return True
+
+    def flush(self, timeout: float | None = None) -> None:
+        with self._lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            written = self._counters["written"]
+            return {
+                **self._counters,
+                "workers": self.max_workers,
+                "pending": len(self._pending),
+                "avg_write_ms": round(self._write_ms_total / written, 2) if written else 0.0,
+            }
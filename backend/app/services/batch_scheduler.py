@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+
+
+@dataclass
+class BatchResult:
+    value: Any
+    batch_size: int
+    queue_wait_ms: float
+
+
+@dataclass
+class _PendingItem:
+    key: Hashable
+    payload: Any
+    future: Future
+    enqueued_at: float
+
+
+class BatchScheduler:
+    def __init__(
+        self,
+        handler: Callable[[Hashable, list[Any]], list[Any]],
+        max_batch_size: int = 1,
+        max_wait_ms: float = 0.0,
+    ) -> None:
+        self.handler = handler
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_sec = max(0.0, max_wait_ms) / 1000
+        self._pending: deque[_PendingItem] = deque()
+        self._cond = threading.Condition()
+        self._worker: threading.Thread | None = None
+        self._closed = False
+
+    def submit(self, key: Hashable, payload: Any) -> "Future[BatchResult]":
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("BatchScheduler is closed")
+            self._pending.append(_PendingItem(key, payload, future, time.perf_counter()))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+                self._worker.start()
+            self._cond.notify_all()
+        return future
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join()
+
+    def _take_batch(self) -> list[_PendingItem]:
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return []
+
+            first = self._pending[0]
+            deadline = first.enqueued_at + self.max_wait_sec
+            while not self._closed:
+                same_key = sum(1 for item in self._pending if item.key == first.key)
+                remaining = deadline - time.perf_counter()
+                if same_key >= self.max_batch_size or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = [item for item in self._pending if item.key == first.key][: self.max_batch_size]
+            for item in batch:
+                self._pending.remove(item)
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list[_PendingItem]) -> None:
+        batch = [item for item in batch if item.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        try:
+            values = list(self.handler(batch[0].key, [item.payload for item in batch]))
+            if len(values) != len(batch):
+                # A short result list would otherwise leave the unmatched futures (and their requests) hanging.
+                raise RuntimeError(f"Batch handler returned {len(values)} results for {len(batch)} inputs")
+        except BaseException as exc:
+            for item in batch:
+                item.future.set_exception(exc)
+            return
+
+        for item, value in zip(batch, values):
+            item.future.set_result(
+                BatchResult(
+                    value=value,
+                    batch_size=len(batch),
+                    queue_wait_ms=round((started - item.enqueued_at) * 1000, 2),
+                )
+            )
@@ -1,11 +1,145 @@
+import json
+import math
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 from PIL import Image
 
 from app.services.image_catalog_service import ImageCatalogService
 from app.services.inference_service import InferenceService
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = (
+    "decode_ms",
+    "preprocess_ms",
+    "forward_ms",
+    "postprocess_ms",
+    "stats_ms",
+    "overlay_ms",
+    "artifacts_ms",
+    "total_ms",
+)
+PERCENTILES = (50, 90, 99)
+
+
+def latency_stats(values: list[float]) -> dict[str, float]:
+    ordered = sorted(values)
+    stats: dict[str, float] = {"count": len(ordered)}
+    for percentile in PERCENTILES:
+        # Nearest-rank percentile: always an observed value, stable for small samples.
+        rank = max(1, math.ceil(percentile / 100 * len(ordered)))
+        stats[f"p{percentile}"] = round(ordered[rank - 1], 2) if ordered else 0.0
+    stats["max"] = round(ordered[-1], 2) if ordered else 0.0
+    return stats
+
+
+def peak_rss_mb(children: bool = False) -> float | None:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss / scale, 1)
+
+
+def load_checkpoint(path: Path, model_key: str) -> dict[str, dict[str, Any]]:
+    records: dict[str, dict[str, Any]] = {}
+    if not path.is_file():
+        return records
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write leaves a truncated last line; that image is simply redone.
+                continue
+            if record.get("model_key") == model_key and "image_id" in record:
+                records[str(record["image_id"])] = record
+    return records
+
+
+def summarize(
+    records: Iterable[dict[str, Any]],
+    total: int,
+    wall_ms: float | None = None,
+    processed: int | None = None,
+    peak_rss: float | None = None,
+) -> dict[str, Any]:
+    results: list[dict[str, Any]] = []
+    failures: list[dict[str, str]] = []
+    stage_values: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    for record in records:
+        if record.get("status") == "ok":
+            timings = record.get("timings", {})
+            for stage in STAGES:
+                if stage in timings:
+                    stage_values[stage].append(float(timings[stage]))
+            results.append(
+                {
+                    "image_id": record["image_id"],
+                    "inference_ms": float(record["inference_ms"]),
+                    "top_label": record["top_label"],
+                    "num_labels": record["num_labels"],
+                    "timings": timings,
+                }
+            )
+        else:
+            failures.append({"image_id": record["image_id"], "error": record.get("error", "")})
+
+    avg_ms = 0.0
+    if results:
+        avg_ms = sum(item["inference_ms"] for item in results) / len(results)
+
+    summary: dict[str, Any] = {
+        "total": total,
+        "success": len(results),
+        "failed": len(failures),
+        "avg_inference_ms": round(avg_ms, 2),
+        "stages": {stage: latency_stats(values) for stage, values in stage_values.items() if values},
+        "results": results,
+        "failures": failures,
+    }
+    if wall_ms is not None:
+        summary["wall_ms"] = round(wall_ms, 2)
+        if processed is not None and wall_ms > 0:
+            summary["throughput_ips"] = round(processed / (wall_ms / 1000), 3)
+    if peak_rss is not None:
+        summary["peak_rss_mb"] = peak_rss
+    return summary
+
+
+def compare_to_baseline(
+    summary: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float = 0.1,
+    min_delta_ms: float = 1.0,
+) -> list[str]:
+    regressions: list[str] = []
+    for stage, stats in summary.get("stages", {}).items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+        for key in ("p50", "p90"):
+            current, previous = stats[key], base.get(key, 0.0)
+            if current > previous * (1 + tolerance) and current - previous >= min_delta_ms:
+                regressions.append(f"{stage} {key} {previous} -> {current}")
+
+    current, previous = summary.get("throughput_ips"), baseline.get("throughput_ips")
+    if current is not None and previous and current < previous * (1 - tolerance):
+        regressions.append(f"throughput_ips {previous} -> {current}")
+    current, previous = summary.get("peak_rss_mb"), baseline.get("peak_rss_mb")
+    if current is not None and previous and current > previous * (1 + tolerance):
+        regressions.append(f"peak_rss_mb {previous} -> {current}")
+    return regressions
+
 
 class DatasetInferenceCheckService:
     def __init__(
@@ -13,53 +147,125 @@ class DatasetInferenceCheckService:
         image_catalog_service: ImageCatalogService,
         inference_service: InferenceService,
         model_key: str,
+        prefetch_workers: int = 2,
+        checkpoint_path: Path | None = None,
     ) -> None:
         self.image_catalog_service = image_catalog_service
         self.inference_service = inference_service
         self.model_key = model_key
+        self.prefetch_workers = max(0, prefetch_workers)
+        self.checkpoint_path = checkpoint_path
+
+    def _decode(self, image_id: str) -> tuple[Image.Image, float]:
+        start = time.perf_counter()
+        with Image.open(self.image_catalog_service.resolve(image_id)) as image:
+            decoded = image.convert("RGB")
+        return decoded, (time.perf_counter() - start) * 1000
+
+    def _predict(self, image_id: str, decoded: Future) -> dict[str, Any]:
+        try:
+            image, decode_ms = decoded.result()
+            start = time.perf_counter()
+            prediction = self.inference_service.run_prediction(image, model_key=self.model_key)
+            predict_ms = (time.perf_counter() - start) * 1000
+        except Exception as exc:
+            return {"image_id": image_id, "model_key": self.model_key, "status": "failed", "error": str(exc)}
+
+        top_label = "-"
+        if prediction.get("top_classes"):
+            top_label = str(prediction["top_classes"][0].get("label", "-"))
+        return {
+            "image_id": image_id,
+            "model_key": self.model_key,
+            "status": "ok",
+            "inference_ms": float(prediction.get("inference_ms", 0.0)),
+            "timings": {
+                "decode_ms": round(decode_ms, 2),
+                **prediction.get("timings", {}),
+                "total_ms": round(decode_ms + predict_ms, 2),
+            },
+            "top_label": top_label,
+            "num_labels": len(prediction.get("labels", [])),
+        }
 
-    def run(self, limit: int | None = None) -> dict[str, Any]:
+    def _decode_inline(self, image_id: str) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(self._decode(image_id))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def run(
+        self,
+        limit: int | None = None,
+        resume: bool = False,
+        shard_index: int = 0,
+        shard_count: int = 1,
+    ) -> dict[str, Any]:
+        start = time.perf_counter()
         entries = self.image_catalog_service.list_images()
         if limit is not None:
             entries = entries[:limit]
+        image_ids = [str(entry["id"]) for entry in entries][shard_index::max(1, shard_count)]
 
-        results: list[dict[str, Any]] = []
-        failures: list[dict[str, str]] = []
+        done: dict[str, dict[str, Any]] = {}
+        if resume and self.checkpoint_path is not None:
+            # Only successes are kept; previously failed images are retried.
+            done = {
+                image_id: record
+                for image_id, record in load_checkpoint(self.checkpoint_path, self.model_key).items()
+                if record.get("status") == "ok" and image_id in image_ids
+            }
+        pending = [image_id for image_id in image_ids if image_id not in done]
 
-        for entry in entries:
-            image_id = str(entry["id"])
-            image_path = self.image_catalog_service.resolve(image_id)
-            try:
-                with Image.open(image_path) as image:
-                    prediction = self.inference_service.run_prediction(image.convert("RGB"), model_key=self.model_key)
-
-                top_label = "-"
-                if prediction.get("top_classes"):
-                    top_label = str(prediction["top_classes"][0].get("label", "-"))
-
-                results.append(
-                    {
-                        "image_id": image_id,
-                        "inference_ms": float(prediction.get("inference_ms", 0.0)),
-                        "top_label": top_label,
-                        "num_labels": len(prediction.get("labels", [])),
-                    }
-                )
-            except Exception as exc:
-                failures.append({"image_id": image_id, "error": str(exc)})
-
-        avg_ms = 0.0
-        if results:
-            avg_ms = sum(item["inference_ms"] for item in results) / len(results)
+        checkpoint = None
+        if self.checkpoint_path is not None:
+            self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+            checkpoint = self.checkpoint_path.open("a" if resume else "w", encoding="utf-8")
 
-        return {
-            "total": len(entries),
-            "success": len(results),
-            "failed": len(failures),
-            "avg_inference_ms": round(avg_ms, 2),
-            "results": results,
-            "failures": failures,
-        }
+        records = dict(done)
+        executor = None
+        if self.prefetch_workers:
+            executor = ThreadPoolExecutor(self.prefetch_workers, thread_name_prefix="dataset-decode")
+        try:
+            # Decoding runs ahead of the model by a bounded window so only a few images are held in memory.
+            window: deque[tuple[str, Future]] = deque()
+            queue = iter(pending)
+            depth = self.prefetch_workers * 2
+
+            def fill() -> None:
+                while len(window) <= depth:
+                    image_id = next(queue, None)
+                    if image_id is None:
+                        return
+                    future = executor.submit(self._decode, image_id) if executor else self._decode_inline(image_id)
+                    window.append((image_id, future))
+
+            fill()
+            while window:
+                image_id, decoded = window.popleft()
+                fill()
+                record = self._predict(image_id, decoded)
+                records[image_id] = record
+                if checkpoint is not None:
+                    checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    checkpoint.flush()
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+            if checkpoint is not None:
+                checkpoint.close()
+
+        summary = summarize(
+            (records[image_id] for image_id in image_ids if image_id in records),
+            total=len(image_ids),
+            wall_ms=(time.perf_counter() - start) * 1000,
+            processed=len(pending),
+            peak_rss=peak_rss_mb(),
+        )
+        summary["resumed"] = len(done)
+        return summary
 
 
 def format_cli_report(summary: dict[str, Any]) -> str:
@@ -67,6 +273,17 @@ def format_cli_report(summary: dict[str, Any]) -> str:
     lines.append("=== Dataset Inference Check ===")
     lines.append(f"total={summary['total']} success={summary['success']} failed={summary['failed']}")
     lines.append(f"avg_inference_ms={summary['avg_inference_ms']}")
+    if "wall_ms" in summary:
+        lines.append(f"wall_ms={summary['wall_ms']} resumed={summary.get('resumed', 0)}")
+    if "throughput_ips" in summary or "peak_rss_mb" in summary:
+        throughput, peak_rss = summary.get("throughput_ips", "-"), summary.get("peak_rss_mb", "-")
+        lines.append(f"throughput_ips={throughput} peak_rss_mb={peak_rss}")
+    if summary.get("stages"):
+        lines.append("--- stages (ms) ---")
+        for stage, stats in summary["stages"].items():
+            lines.append(
+                f"{stage:<15} p50={stats['p50']} p90={stats['p90']} p99={stats['p99']} max={stats['max']}"
+            )
     lines.append("--- per image ---")
 
     for item in summary["results"]:
@@ -1,15 +1,43 @@
+import asyncio
+import contextlib
+import hashlib
 import json
 import os
-from typing import Any
+import random
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator
 
-import requests
+import httpx
 from fastapi import HTTPException
 
 from app.schemas import DescribeRequest
 
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER_SEC = 10.0
+
+
+def description_cache_key(payload: DescribeRequest) -> str:
+    # Canonical JSON so the same statistics hash identically regardless of key order.
+    canonical = json.dumps(
+        {"top_classes": payload.top_classes, "area_stats": payload.area_stats},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
 
 class DescriptionService:
-    def __init__(self, endpoint: str | None = None) -> None:
+    def __init__(
+        self,
+        endpoint: str | None = None,
+        max_concurrency: int = 4,
+        max_retries: int = 2,
+        backoff_base_sec: float = 0.5,
+        cache_ttl_sec: float = 3600.0,
+        cache_max_entries: int = 512,
+    ) -> None:
         api_base = os.getenv(
             "GEMINI_API_BASE",
             "https://generativelanguage.googleapis.com/v1beta/models",
@@ -21,16 +49,84 @@ class DescriptionService:
             self.timeout_sec = float(timeout_raw)
         except ValueError:
             self.timeout_sec = 20.0
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base_sec = max(0.0, backoff_base_sec)
+        self.cache_ttl_sec = max(0.0, cache_ttl_sec)
+        self.cache_max_entries = max(0, cache_max_entries)
 
-    def describe(self, payload: DescribeRequest) -> dict[str, Any]:
-        enabled_raw = os.getenv("GEMINI_ENABLED", "true").strip().lower()
-        if enabled_raw in {"0", "false", "no", "off"}:
-            raise HTTPException(status_code=503, detail="Gemini description is disabled (GEMINI_ENABLED=false)")
+        self._cache: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self._client: httpx.AsyncClient | None = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._counters = {
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "coalesced": 0,
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+        }
 
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=503, detail="GEMINI_API_KEY is not set")
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=self.timeout_sec,
+            limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+        )
+
+    def _loop_state(self) -> asyncio.Semaphore:
+        # The semaphore and in-flight tasks belong to one event loop; rebuild them if the loop changes.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+            self._in_flight.clear()
+        return self._semaphore
+
+    async def aopen(self) -> None:
+        # Called from the app lifespan: the pooled keep-alive client lives exactly as long as the serving loop.
+        await self.aclose()
+        self._client = self._new_client()
+        self._client_loop = asyncio.get_running_loop()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
 
+    @contextlib.asynccontextmanager
+    async def _client_scope(self) -> AsyncIterator[httpx.AsyncClient]:
+        if self._client is not None and self._client_loop is asyncio.get_running_loop():
+            yield self._client
+            return
+        # Outside the lifespan (scripts, tests) a call gets its own client, closed on the loop that opened it.
+        async with self._new_client() as client:
+            yield client
+
+    def _cache_get(self, key: str) -> dict[str, Any] | None:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return value
+
+    def _cache_put(self, key: str, value: dict[str, Any]) -> None:
+        if not self.cache_max_entries or not self.cache_ttl_sec:
+            return
+        self._cache[key] = (time.monotonic() + self.cache_ttl_sec, value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_max_entries:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _build_request(payload: DescribeRequest) -> dict[str, Any]:
         lines = [
             "あなたは『空間を読むナレーター』です。",
             "Mask2Formerのセグメンテーション統計から、読んで楽しい短い紹介文を日本語で作成してください。",
@@ -54,23 +150,15 @@ class DescriptionService:
         if payload.inference_ms is not None:
             lines.append(f"inference_ms: {payload.inference_ms}")
 
-        req_body = {
+        return {
             "contents": [{"parts": [{"text": "\n".join(lines)}]}],
             "generationConfig": {"responseMimeType": "application/json"},
         }
 
-        res = requests.post(
-            self.endpoint,
-            params={"key": api_key},
-            json=req_body,
-            timeout=self.timeout_sec,
-        )
-        if res.status_code >= 400:
-            raise HTTPException(status_code=502, detail=f"Gemini API error: {res.text[:200]}")
-
+    @staticmethod
+    def _parse_response(body: dict[str, Any]) -> dict[str, Any]:
         text = (
-            res.json()
-            .get("candidates", [{}])[0]
+            body.get("candidates", [{}])[0]
             .get("content", {})
             .get("parts", [{}])[0]
             .get("text", "")
@@ -88,3 +176,93 @@ class DescriptionService:
             }
         except Exception:
             return {"summary_ja": text, "highlights": [], "cautions": []}
+
+    def _backoff_sec(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(MAX_RETRY_AFTER_SEC, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        # Full jitter keeps many clients retrying a throttled upstream from synchronizing.
+        return random.uniform(0, self.backoff_base_sec * (2**attempt))
+
+    async def _post(self, api_key: str, body: dict[str, Any]) -> dict[str, Any]:
+        async with self._client_scope() as client:
+            return await self._post_with(client, self._loop_state(), api_key, body)
+
+    async def _post_with(
+        self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, api_key: str, body: dict[str, Any]
+    ) -> dict[str, Any]:
+        attempt = 0
+        while True:
+            response: httpx.Response | None = None
+            error = ""
+            async with semaphore:
+                self._counters["requests"] += 1
+                try:
+                    response = await client.post(self.endpoint, params={"key": api_key}, json=body)
+                except httpx.TimeoutException:
+                    error = "Gemini API timed out"
+                except httpx.TransportError as exc:
+                    error = f"Gemini API unreachable: {type(exc).__name__}"
+
+            if response is not None and response.status_code < 400:
+                return self._parse_response(response.json())
+            if response is not None:
+                error = f"Gemini API error: {response.text[:200]}"
+                if response.status_code not in RETRY_STATUS_CODES:
+                    break
+            if attempt >= self.max_retries:
+                break
+            self._counters["retries"] += 1
+            await asyncio.sleep(self._backoff_sec(attempt, response))
+            attempt += 1
+
+        self._counters["errors"] += 1
+        raise HTTPException(status_code=502, detail=error)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Marks the error as retrieved even when every waiter has gone away.
+            task.exception()
+
+    async def describe(self, payload: DescribeRequest) -> dict[str, Any]:
+        enabled_raw = os.getenv("GEMINI_ENABLED", "true").strip().lower()
+        if enabled_raw in {"0", "false", "no", "off"}:
+            raise HTTPException(status_code=503, detail="Gemini description is disabled (GEMINI_ENABLED=false)")
+
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise HTTPException(status_code=503, detail="GEMINI_API_KEY is not set")
+
+        key = description_cache_key(payload)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._counters["cache_hits"] += 1
+            return {**cached, "cached": True}
+        self._counters["cache_misses"] += 1
+
+        # Identical statistics requested concurrently share a single upstream call.
+        self._loop_state()
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._post(api_key, self._build_request(payload)))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self._counters["coalesced"] += 1
+
+        result = await asyncio.shield(task)
+        self._cache_put(key, result)
+        return {**result, "cached": False}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self._counters,
+            "cache_entries": len(self._cache),
+            "max_concurrency": self.max_concurrency,
+            "pooled_client": self._client is not None,
+        }
@@ -0,0 +1,133 @@
+from typing import Any, Callable
+
+import numpy as np
+from PIL import Image
+
+from app.services.image_catalog_service import ImageCatalogService
+from app.services.inference_service import InferenceService
+
+REFERENCE_MODE = "fp32"
+
+
+class ExecutionModeCheckService:
+    def __init__(
+        self,
+        image_catalog_service: ImageCatalogService,
+        inference_service_factory: Callable[[str], InferenceService],
+        model_key: str,
+    ) -> None:
+        self.image_catalog_service = image_catalog_service
+        self.inference_service_factory = inference_service_factory
+        self.model_key = model_key
+
+    def _load_images(self, limit: int | None) -> list[tuple[str, Image.Image]]:
+        entries = self.image_catalog_service.list_images()
+        if limit is not None:
+            entries = entries[:limit]
+
+        images: list[tuple[str, Image.Image]] = []
+        for entry in entries:
+            image_id = str(entry["id"])
+            with Image.open(self.image_catalog_service.resolve(image_id)) as image:
+                images.append((image_id, image.convert("RGB")))
+        return images
+
+    @staticmethod
+    def _compare(
+        seg: np.ndarray,
+        stats: tuple[list[dict[str, Any]], list[dict[str, Any]]],
+        ref_seg: np.ndarray,
+        ref_stats: tuple[list[dict[str, Any]], list[dict[str, Any]]],
+    ) -> dict[str, float]:
+        top, area = stats
+        ref_top, ref_area = ref_stats
+
+        confidences = {row["class_id"]: row["confidence"] for row in top}
+        ref_confidences = {row["class_id"]: row["confidence"] for row in ref_top}
+        shared = confidences.keys() & ref_confidences.keys()
+        areas = {row["class_id"]: row["area_ratio"] for row in area}
+        ref_areas = {row["class_id"]: row["area_ratio"] for row in ref_area}
+
+        return {
+            "pixel_agreement": float((seg == ref_seg).mean()),
+            "top1_match": float(bool(top) and bool(ref_top) and top[0]["class_id"] == ref_top[0]["class_id"]),
+            "max_confidence_delta": max((abs(confidences[c] - ref_confidences[c]) for c in shared), default=0.0),
+            "max_area_delta": max(
+                (abs(areas.get(c, 0.0) - ref_areas.get(c, 0.0)) for c in areas.keys() | ref_areas.keys()),
+                default=0.0,
+            ),
+        }
+
+    def run(self, modes: list[str], limit: int | None = None) -> dict[str, Any]:
+        images = self._load_images(limit)
+        ordered_modes = [REFERENCE_MODE, *[mode for mode in modes if mode != REFERENCE_MODE]]
+        reference: dict[str, tuple[np.ndarray, Any]] = {}
+        rows: list[dict[str, Any]] = []
+
+        for mode in ordered_modes:
+            service = self.inference_service_factory(mode)
+            try:
+                if images:
+                    service.predict_batch(self.model_key, [images[0][1]])
+
+                latencies: list[float] = []
+                comparisons: list[dict[str, float]] = []
+                for image_id, image in images:
+                    output = service.predict_batch(self.model_key, [image])[0]
+                    stats = service.metrics_service.class_stats(output.seg, output.confidence, output.id2label)
+                    latencies.append(output.inference_ms)
+                    if mode == REFERENCE_MODE:
+                        reference[image_id] = (output.seg, stats)
+                    else:
+                        comparisons.append(self._compare(output.seg, stats, *reference[image_id]))
+            except Exception as exc:
+                rows.append({"mode": mode, "error": str(exc)})
+                continue
+            finally:
+                del service
+
+            row: dict[str, Any] = {
+                "mode": mode,
+                "avg_inference_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            }
+            if comparisons:
+                row.update(
+                    {
+                        "pixel_agreement": round(sum(c["pixel_agreement"] for c in comparisons) / len(comparisons), 4),
+                        "min_pixel_agreement": round(min(c["pixel_agreement"] for c in comparisons), 4),
+                        "top1_match_rate": round(sum(c["top1_match"] for c in comparisons) / len(comparisons), 4),
+                        "max_confidence_delta": round(max(c["max_confidence_delta"] for c in comparisons), 4),
+                        "max_area_delta": round(max(c["max_area_delta"] for c in comparisons), 2),
+                    }
+                )
+            rows.append(row)
+
+        baseline_ms = rows[0].get("avg_inference_ms") if rows and "error" not in rows[0] else None
+        for row in rows:
+            if baseline_ms and row.get("avg_inference_ms"):
+                row["speedup"] = round(baseline_ms / row["avg_inference_ms"], 2)
+
+        return {"model_key": self.model_key, "images": len(images), "modes": rows}
+
+
+def format_cli_report(summary: dict[str, Any]) -> str:
+    lines: list[str] = []
+    lines.append("=== Execution Mode Check ===")
+    lines.append(f"model_key={summary['model_key']} images={summary['images']} reference={REFERENCE_MODE}")
+    lines.append("--- per mode ---")
+
+    for row in summary["modes"]:
+        if "error" in row:
+            lines.append(f"{row['mode']} | error={row['error']}")
+            continue
+        line = f"{row['mode']} | ms={row['avg_inference_ms']} | speedup={row.get('speedup', '-')}"
+        if "pixel_agreement" in row:
+            line += (
+                f" | pixel_agreement={row['pixel_agreement']} (min {row['min_pixel_agreement']})"
+                f" | top1_match={row['top1_match_rate']}"
+                f" | max_conf_delta={row['max_confidence_delta']}"
+                f" | max_area_delta={row['max_area_delta']}"
+            )
+        lines.append(line)
+
+    return "\n".join(lines)
@@ -1,25 +1,282 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
 from pathlib import Path
+from typing import Any
+
+from fastapi import HTTPException
+from PIL import Image
+
+from app.services.thumbnail_service import ThumbnailService
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+DEFAULT_TAGS = ["ade20k-real", "local"]
+DEFAULT_TAGS_JSON = json.dumps(DEFAULT_TAGS)
+HASH_CHUNK_BYTES = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS images (
+    id TEXT PRIMARY KEY,
+    width INTEGER,
+    height INTEGER,
+    bytes INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    tags TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS images_sha256 ON images (sha256);
+"""
+
+
+def encode_cursor(image_id: str) -> str:
+    return base64.urlsafe_b64encode(image_id.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode()
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
 
 
 class ImageCatalogService:
-    def __init__(self, test_image_dir: Path) -> None:
+    def __init__(
+        self,
+        test_image_dir: Path,
+        index_path: Path | None = None,
+        full_scan_interval_sec: float = 300.0,
+        refresh_interval_sec: float = 2.0,
+        thumbnail_service: ThumbnailService | None = None,
+    ) -> None:
         self.test_image_dir = test_image_dir
+        self.thumbnail_service = thumbnail_service
+        self.index_path = index_path
+        self.full_scan_interval_sec = max(0.0, full_scan_interval_sec)
+        self.refresh_interval_sec = max(0.1, refresh_interval_sec)
+        self._last_scan = 0.0
+        if index_path is not None:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(index_path or ":memory:"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._scanned = threading.Event()
+        self._worker: threading.Thread | None = None
+        self._counters = {"refreshes": 0, "indexed": 0, "removed": 0}
+
+    def _meta(self, key: str) -> str | None:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
 
-    def list_images(self) -> list[dict[str, str | list[str]]]:
-        images: list[dict[str, str | list[str]]] = []
-        for path in sorted(self.test_image_dir.glob("*")):
-            if path.suffix.lower() not in {".png", ".jpg", ".jpeg", ".webp"}:
-                continue
-            images.append(
-                {
-                    "id": path.name,
-                    "name": path.stem,
-                    "thumbnail_url": f"/static/test_images/{path.name}",
-                    "image_url": f"/static/test_images/{path.name}",
-                    "tags": ["ade20k-real", "local"],
+    @staticmethod
+    def _describe_file(path: Path) -> tuple[int | None, int | None, str]:
+        digest = hashlib.sha256()
+        with path.open("rb") as handle:
+            while chunk := handle.read(HASH_CHUNK_BYTES):
+                digest.update(chunk)
+        try:
+            # Only the header is parsed, so this stays cheap for large images.
+            with Image.open(path) as image:
+                width, height = image.size
+        except Exception:
+            width = height = None
+        return width, height, digest.hexdigest()
+
+    def refresh(self, force: bool = False) -> None:
+        # Only one refresh scans at a time; readers share self._lock with the short index reads/writes below, so
+        # hashing changed files never blocks a request.
+        with self._refresh_lock:
+            root = str(self.test_image_dir.resolve())
+            try:
+                dir_mtime = str(self.test_image_dir.stat().st_mtime_ns)
+            except FileNotFoundError:
+                dir_mtime = "missing"
+            with self._lock:
+                if self._meta("root") != root:
+                    # The index belongs to a single directory; pointing the service elsewhere rebuilds it.
+                    self._db.execute("DELETE FROM images")
+                    self._set_meta("root", root)
+                    self._db.commit()
+                elif (
+                    not force
+                    and self._meta("dir_mtime_ns") == dir_mtime
+                    and time.monotonic() - self._last_scan < self.full_scan_interval_sec
+                ):
+                    self._scanned.set()
+                    return
+                known = {
+                    row["id"]: (row["bytes"], row["mtime_ns"])
+                    for row in self._db.execute("SELECT id, bytes, mtime_ns FROM images")
                 }
-            )
-        return images
+
+            # Adding, removing or renaming files bumps the directory mtime; in-place edits do not, so a full
+            # stat pass also runs every full_scan_interval_sec. Unchanged files (same size and mtime) keep
+            # their stored hash and dimensions, so only new or modified files are read.
+            changed: list[tuple[str, int | None, int | None, int, int, str, str]] = []
+            seen: set[str] = set()
+            if dir_mtime != "missing":
+                with os.scandir(self.test_image_dir) as entries:
+                    for entry in entries:
+                        if not entry.is_file() or Path(entry.name).suffix.lower() not in IMAGE_SUFFIXES:
+                            continue
+                        seen.add(entry.name)
+                        stat = entry.stat()
+                        if known.get(entry.name) == (stat.st_size, stat.st_mtime_ns):
+                            continue
+                        width, height, sha256 = self._describe_file(Path(entry.path))
+                        changed.append(
+                            (entry.name, width, height, stat.st_size, stat.st_mtime_ns, sha256, DEFAULT_TAGS_JSON)
+                        )
+
+            removed = [(image_id,) for image_id in known if image_id not in seen]
+            with self._lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO images (id, width, height, bytes, mtime_ns, sha256, tags)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    changed,
+                )
+                self._db.executemany("DELETE FROM images WHERE id = ?", removed)
+                self._set_meta("dir_mtime_ns", dir_mtime)
+                self._db.commit()
+                self._counters["indexed"] += len(changed)
+                self._counters["removed"] += len(removed)
+                self._counters["refreshes"] += 1
+            self._last_scan = time.monotonic()
+            self._scanned.set()
+
+    def _ensure_scanned(self) -> None:
+        # Until the first scan completes (e.g. no lifespan ran start()), the first read fills the index itself.
+        if not self._scanned.is_set():
+            self.refresh()
+
+    def _refresh_logged(self) -> None:
+        try:
+            self.refresh()
+        except (OSError, sqlite3.Error):
+            logger.exception("catalog refresh failed")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_interval_sec):
+            self._refresh_logged()
+
+    def start(self) -> None:
+        if self._worker is not None:
+            return
+        # The first scan runs before startup completes, so the app never serves an empty catalog.
+        self._refresh_logged()
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="catalog-refresh", daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def _entry(self, row: sqlite3.Row) -> dict[str, Any]:
+        entry = {
+            "id": row["id"],
+            "name": Path(row["id"]).stem,
+            "thumbnail_url": self.url_for(row["id"]),
+            "image_url": self.url_for(row["id"]),
+            "tags": json.loads(row["tags"]),
+            "width": row["width"],
+            "height": row["height"],
+            "bytes": row["bytes"],
+            "sha256": row["sha256"],
+        }
+        if self.thumbnail_service is not None and row["width"] is not None:
+            entry["thumbnail_url"] = self.thumbnail_service.url_for(row["sha256"])
+            entry["thumbnail_urls"] = self.thumbnail_service.urls_for(row["sha256"])
+        return entry
+
+    def list_images(self) -> list[dict[str, Any]]:
+        return self.list_page()["images"]
+
+    def list_page(
+        self,
+        limit: int | None = None,
+        cursor: str | None = None,
+        q: str | None = None,
+        tag: str | None = None,
+        min_width: int | None = None,
+        min_height: int | None = None,
+    ) -> dict[str, Any]:
+        # Requests only read the index; start() keeps it current from a background thread.
+        self._ensure_scanned()
+        clauses: list[str] = []
+        params: list[Any] = []
+        if q:
+            clauses.append("instr(lower(id), ?) > 0")
+            params.append(q.lower())
+        if tag:
+            clauses.append("EXISTS (SELECT 1 FROM json_each(images.tags) WHERE value = ?)")
+            params.append(tag)
+        if min_width:
+            clauses.append("width >= ?")
+            params.append(min_width)
+        if min_height:
+            clauses.append("height >= ?")
+            params.append(min_height)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        page_clauses = list(clauses)
+        page_params = list(params)
+        if cursor:
+            page_clauses.append("id > ?")
+            page_params.append(decode_cursor(cursor))
+        page_where = f" WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+        sql = f"SELECT * FROM images{page_where} ORDER BY id"
+        if limit is not None:
+            # One extra row tells whether another page exists without a second query.
+            sql += " LIMIT ?"
+            page_params.append(limit + 1)
+
+        with self._lock:
+            rows = self._db.execute(sql, page_params).fetchall()
+            total = self._db.execute(f"SELECT COUNT(*) FROM images{where}", params).fetchone()[0]
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["id"])
+        return {"images": [self._entry(row) for row in rows], "next_cursor": next_cursor, "total": total}
+
+    @staticmethod
+    def url_for(image_id: str) -> str:
+        return f"/static/test_images/{image_id}"
 
     def resolve(self, image_id: str) -> Path:
-        return self.test_image_dir / image_id
+        self._ensure_scanned()
+        with self._lock:
+            row = self._db.execute("SELECT id FROM images WHERE id = ?", (image_id,)).fetchone()
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Unknown image_id: {image_id}")
+        return self.test_image_dir / row["id"]
+
+    def find_by_hash(self, sha256: str) -> Path:
+        self._ensure_scanned()
+        with self._lock:
+            row = self._db.execute("SELECT id FROM images WHERE sha256 = ? ORDER BY id LIMIT 1", (sha256,)).fetchone()
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Unknown image hash: {sha256}")
+        return self.test_image_dir / row["id"]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+        return {**self._counters, "images": count}
@@ -0,0 +1,94 @@
+import io
+import time
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from fastapi import HTTPException, UploadFile
+from PIL import Image, ImageOps
+
+from app.models.resolution import fit_within
+
+UPLOAD_READ_CHUNK_BYTES = 1024 * 1024
+EXIF_ORIENTATION_TAG = 0x0112
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+@dataclass
+class DecodedImage:
+    image: Image.Image
+    format: str | None
+    source_width: int
+    source_height: int
+    draft: bool
+    decode_ms: float
+
+    @property
+    def source_size(self) -> tuple[int, int]:
+        return self.source_width, self.source_height
+
+    def describe(self) -> dict[str, Any]:
+        info = asdict(self)
+        del info["image"], info["decode_ms"]
+        return {**info, "decoded_width": self.image.width, "decoded_height": self.image.height}
+
+
+class ImageIngestService:
+    def __init__(self, max_upload_bytes: int, max_pixels: int, jpeg_draft: bool = True) -> None:
+        self.max_upload_bytes = max_upload_bytes
+        self.max_pixels = max_pixels
+        self.jpeg_draft = jpeg_draft
+
+    async def read_upload(self, file: UploadFile) -> bytes:
+        buffer = bytearray()
+        while chunk := await file.read(UPLOAD_READ_CHUNK_BYTES):
+            buffer.extend(chunk)
+            if self.max_upload_bytes and len(buffer) > self.max_upload_bytes:
+                raise HTTPException(
+                    status_code=413, detail=f"Upload exceeds {self.max_upload_bytes // (1024 * 1024)} MiB limit"
+                )
+        return bytes(buffer)
+
+    def decode(self, raw: bytes, max_side: int | None = None, invalid_detail: str = "Invalid image") -> DecodedImage:
+        start = time.perf_counter()
+        try:
+            # Image.open only parses the header; pixel data is not decoded until convert().
+            image = Image.open(io.BytesIO(raw))
+        except Image.DecompressionBombError as exc:
+            raise HTTPException(status_code=413, detail="Image has too many pixels") from exc
+        except Exception as exc:
+            raise HTTPException(status_code=400, detail=invalid_detail) from exc
+
+        image_format = image.format
+        source_width, source_height = image.size
+        if self.max_pixels and source_width * source_height > self.max_pixels:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Image is {source_width}x{source_height}; at most {self.max_pixels} pixels are accepted",
+            )
+
+        draft = False
+        if self.jpeg_draft and max_side and image_format == "JPEG" and max(image.size) > max_side:
+            # Decodes at 1/2, 1/4 or 1/8 scale in libjpeg, never below the requested size.
+            image.draft("RGB", fit_within(image.size, max_side))
+            draft = image.size != (source_width, source_height)
+
+        try:
+            # Originals are served as uploaded and browsers honour EXIF orientation, so inference must too.
+            orientation = image.getexif().get(EXIF_ORIENTATION_TAG, 1)
+            if orientation != 1:
+                image = ImageOps.exif_transpose(image)
+            if orientation in ROTATED_ORIENTATIONS:
+                # The source size is reported as displayed, which is what predictions are upsampled to.
+                source_width, source_height = source_height, source_width
+            decoded = image.convert("RGB")
+        except Exception as exc:
+            raise HTTPException(status_code=400, detail=invalid_detail) from exc
+
+        return DecodedImage(
+            image=decoded,
+            format=image_format,
+            source_width=source_width,
+            source_height=source_height,
+            draft=draft,
+            decode_ms=round((time.perf_counter() - start) * 1000, 2),
+        )
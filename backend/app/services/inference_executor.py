@@ -0,0 +1,78 @@
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException
+
+
+class InferenceExecutor:
+    def __init__(self, max_workers: int, max_queue: int) -> None:
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._avg_task_sec = 1.0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.max_workers),
+                "avg_task_ms": round(self._avg_task_sec * 1000, 2),
+            }
+
+    def retry_after_sec(self) -> int:
+        with self._lock:
+            backlog = max(1, self._in_flight - self.max_workers + 1)
+            return max(1, math.ceil(self._avg_task_sec * backlog / self.max_workers))
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._in_flight < self.capacity:
+                self._in_flight += 1
+                return
+        raise HTTPException(
+            status_code=503,
+            detail="Inference queue is full, retry later",
+            headers={"Retry-After": str(self.retry_after_sec())},
+        )
+
+    def _release(self, elapsed_sec: float | None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if elapsed_sec is not None:
+                self._avg_task_sec = 0.8 * self._avg_task_sec + 0.2 * elapsed_sec
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        self._admit()
+
+        def task() -> Any:
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._release(time.perf_counter() - start)
+
+        try:
+            future = self._executor.submit(task)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(lambda f: self._release(None) if f.cancelled() else None)
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -1,15 +1,53 @@
+import math
 import time
-from typing import Any
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable
 
 import numpy as np
 import torch
+from fastapi import HTTPException
 from PIL import Image
-from transformers import AutoImageProcessor, Mask2FormerForUniversalSegmentation
+from transformers import AutoConfig, AutoImageProcessor, Mask2FormerForUniversalSegmentation
 
+from app.models.execution import (
+    format_execution_mode,
+    forward_context,
+    parse_execution_mode,
+    prepare_inputs,
+    prepare_model,
+)
+from app.models.onnx_backend import DEFAULT_INPUT_SIZE, OnnxRuntimeModel, export_onnx, onnx_artifact_path
 from app.models.registry import ModelRegistry
+from app.models.resolution import (
+    DEFAULT_RESOLUTION_POLICIES,
+    ResolutionPolicy,
+    fit_within,
+    inference_size,
+    parse_resolution_policy,
+    tile_origins,
+)
+from app.services.batch_scheduler import BatchScheduler
 from app.services.metrics_service import MetricsService
+from app.services.model_pool import ModelPool, estimate_module_bytes
 from app.services.visualization_service import VisualizationService
 
+# Bump whenever post-processing or artifact rendering changes so cached predictions are not reused.
+POSTPROCESS_VERSION = "2"
+
+BACKENDS = ("torch", "onnxruntime")
+
+
+@dataclass
+class SegmentationOutput:
+    seg: np.ndarray
+    confidence: torch.Tensor
+    inference_ms: float
+    id2label: dict[int, str]
+    resolution: dict[str, Any] = field(default_factory=dict)
+    timings: dict[str, float] = field(default_factory=dict)
+
 
 class InferenceService:
     def __init__(
@@ -17,11 +55,38 @@ class InferenceService:
         model_registry: ModelRegistry,
         visualization_service: VisualizationService,
         metrics_service: MetricsService,
+        max_batch_size: int = 1,
+        max_batch_wait_ms: float = 0.0,
+        mask_mode: str = "label_map",
+        model_memory_budget_mb: int = 0,
+        execution_mode: str | None = None,
+        backend: str | None = None,
+        onnx_export_dir: Path | None = None,
+        onnx_input_size: tuple[int, int] = DEFAULT_INPUT_SIZE,
+        ort_intra_op_threads: int = 0,
+        ort_inter_op_threads: int = 0,
+        resolution_policies: dict[str, ResolutionPolicy] | None = None,
+        default_resolution_mode: str = "resize",
     ) -> None:
         self.model_registry = model_registry
         self.visualization_service = visualization_service
         self.metrics_service = metrics_service
-        self._model_cache: dict[str, Any] = {}
+        self.mask_mode = mask_mode
+        self.execution_mode_override = execution_mode
+        self.backend_override = backend
+        self.onnx_export_dir = onnx_export_dir
+        self.onnx_input_size = onnx_input_size
+        self.ort_intra_op_threads = ort_intra_op_threads
+        self.ort_inter_op_threads = ort_inter_op_threads
+        self.resolution_policies = resolution_policies or DEFAULT_RESOLUTION_POLICIES
+        self.default_resolution_mode = default_resolution_mode
+        self.tile_batch_size = max(1, max_batch_size)
+        self.model_pool = ModelPool(
+            self._load_model_uncached,
+            lambda loaded: self._model_bytes(loaded[1]),
+            memory_budget_bytes=model_memory_budget_mb * 2**20,
+        )
+        self.batch_scheduler = BatchScheduler(self._run_batch, max_batch_size, max_batch_wait_ms)
 
     @staticmethod
     def _device() -> torch.device:
@@ -31,60 +96,309 @@ class InferenceService:
             return torch.device("cuda")
         return torch.device("cpu")
 
+    @staticmethod
+    def _model_bytes(model: Any) -> int:
+        if isinstance(model, OnnxRuntimeModel):
+            return model.memory_bytes
+        return estimate_module_bytes(model)
+
+    def backend(self, model_key: str) -> str:
+        backend = self.backend_override or self.model_registry.backend(model_key)
+        if backend not in BACKENDS:
+            raise HTTPException(status_code=500, detail=f"Invalid backend for {model_key}: {backend}")
+        return backend
+
+    def execution_modes(self, model_key: str) -> frozenset[str]:
+        if self.backend(model_key) == "onnxruntime":
+            return frozenset()
+        raw = self.execution_mode_override or self.model_registry.execution_mode(model_key)
+        try:
+            return parse_execution_mode(raw)
+        except ValueError as exc:
+            raise HTTPException(status_code=500, detail=f"Invalid execution mode for {model_key}: {exc}") from exc
+
+    def resolution_policy(self, mode: str | None = None, max_side: int | None = None) -> ResolutionPolicy:
+        try:
+            return parse_resolution_policy(mode, max_side, self.resolution_policies, self.default_resolution_mode)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
     def load_model(
         self, model_key: str
     ) -> tuple[AutoImageProcessor, Mask2FormerForUniversalSegmentation, torch.device]:
-        if model_key in self._model_cache:
-            return self._model_cache[model_key]
+        return self.model_pool.get(model_key)
 
+    def _load_model_uncached(
+        self, model_key: str
+    ) -> tuple[AutoImageProcessor, Mask2FormerForUniversalSegmentation, torch.device]:
         hf_id = self.model_registry.hf_id(model_key)
         processor = AutoImageProcessor.from_pretrained(hf_id)
+        if self.backend(model_key) == "onnxruntime":
+            return processor, self._load_onnx_model(hf_id), torch.device("cpu")
+
         model = Mask2FormerForUniversalSegmentation.from_pretrained(hf_id)
-        device = self._device()
+        modes = self.execution_modes(model_key)
+        device = torch.device("cpu") if "int8_dynamic" in modes else self._device()
         model.to(device)
-        model.eval()
-
-        self._model_cache[model_key] = (processor, model, device)
+        model = prepare_model(model, modes, device)
         return processor, model, device
 
-    def run_prediction(self, image: Image.Image, model_key: str) -> dict[str, Any]:
+    def _load_onnx_model(self, hf_id: str) -> OnnxRuntimeModel:
+        if self.onnx_export_dir is None:
+            raise HTTPException(status_code=500, detail="ONNX export directory is not configured")
+        onnx_path = onnx_artifact_path(self.onnx_export_dir, hf_id, self.onnx_input_size)
+        if onnx_path.exists():
+            config = AutoConfig.from_pretrained(hf_id)
+        else:
+            model = Mask2FormerForUniversalSegmentation.from_pretrained(hf_id)
+            export_onnx(model, onnx_path, self.onnx_input_size)
+            config = model.config
+            del model
+        return OnnxRuntimeModel(onnx_path, config, self.ort_intra_op_threads, self.ort_inter_op_threads)
+
+    @staticmethod
+    def _unpadded_outputs(outputs: Any, pixel_mask: torch.Tensor | None, index: int) -> Any:
+        masks_queries_logits = outputs.masks_queries_logits[index : index + 1]
+        if pixel_mask is not None:
+            padded_h, padded_w = pixel_mask.shape[-2:]
+            mask_h, mask_w = masks_queries_logits.shape[-2:]
+            valid = pixel_mask[index].bool()
+            valid_h = int(valid.any(dim=1).sum().item())
+            valid_w = int(valid.any(dim=0).sum().item())
+            crop_h = max(1, math.ceil(valid_h * mask_h / padded_h))
+            crop_w = max(1, math.ceil(valid_w * mask_w / padded_w))
+            masks_queries_logits = masks_queries_logits[..., :crop_h, :crop_w]
+
+        return SimpleNamespace(
+            class_queries_logits=outputs.class_queries_logits[index : index + 1].float(),
+            masks_queries_logits=masks_queries_logits.float(),
+        )
+
+    @staticmethod
+    def _resize_for_inference(processor: Any, image: Image.Image, policy: ResolutionPolicy) -> Image.Image:
+        size = getattr(processor, "size", None) or {}
+        if "height" in size and "width" in size:
+            target = (int(size["width"]), int(size["height"]))
+        else:
+            longest_edge = min(size.get("longest_edge") or policy.max_side, policy.max_side)
+            target = inference_size(
+                image.size, size.get("shortest_edge"), longest_edge, getattr(processor, "size_divisor", 0) or 0
+            )
+        if target == image.size:
+            return image
+        return image.resize(target, getattr(processor, "resample", Image.Resampling.BILINEAR))
+
+    def predict_batch(
+        self,
+        model_key: str,
+        images: list[Image.Image],
+        policy: ResolutionPolicy | None = None,
+        output_sizes: list[tuple[int, int]] | None = None,
+    ) -> list[SegmentationOutput]:
         processor, model, device = self.load_model(model_key)
+        modes = self.execution_modes(model_key)
+        policy = policy or self.resolution_policy("resize")
 
-        inputs = processor(images=image, return_tensors="pt")
-        inputs = {k: v.to(device) for k, v in inputs.items()}
+        # Downscale once up front; the processor then only normalizes and pads, and the logits are
+        # upsampled straight to the original size at the end.
+        preprocess_start = time.perf_counter()
+        resized = [self._resize_for_inference(processor, image, policy) for image in images]
+        inputs = processor(images=resized, return_tensors="pt", do_resize=False)
+        inputs = prepare_inputs({k: v.to(device) for k, v in inputs.items()}, modes)
 
         start = time.perf_counter()
-        with torch.inference_mode():
+        with forward_context(modes, device):
             outputs = model(**inputs)
+        forward_end = time.perf_counter()
+
+        id2label = model.config.id2label or {}
+        pixel_mask = inputs.get("pixel_mask") if len(images) > 1 else None
+        results: list[SegmentationOutput] = []
+        targets = output_sizes or [image.size for image in images]
+        for index, (target, inference_image) in enumerate(zip(targets, resized)):
+            image_outputs = self._unpadded_outputs(outputs, pixel_mask, index)
+            seg, confidence = self.metrics_service.semantic_segmentation(image_outputs, target[::-1])
+            resolution = {
+                **policy.describe(),
+                "inference_width": inference_image.width,
+                "inference_height": inference_image.height,
+            }
+            results.append(
+                SegmentationOutput(
+                    seg=seg, confidence=confidence, inference_ms=0.0, id2label=id2label, resolution=resolution
+                )
+            )
 
-        post = processor.post_process_semantic_segmentation(outputs, target_sizes=[image.size[::-1]])
-        seg = post[0].detach().cpu().numpy().astype(np.int32)
-        semantic_probs = self.metrics_service.semantic_probabilities(outputs, image.size[::-1]).detach().cpu()
+        end = time.perf_counter()
+        timings = {
+            "preprocess_ms": (start - preprocess_start) * 1000,
+            "forward_ms": (forward_end - start) * 1000,
+            "postprocess_ms": (end - forward_end) * 1000,
+        }
+        for result in results:
+            result.inference_ms = (end - start) * 1000
+            result.timings = timings
+        return results
 
+    def predict_tiled(
+        self,
+        model_key: str,
+        image: Image.Image,
+        policy: ResolutionPolicy,
+        output_size: tuple[int, int] | None = None,
+    ) -> SegmentationOutput:
+        processor, model, device = self.load_model(model_key)
+        modes = self.execution_modes(model_key)
+
+        working_size = fit_within(image.size, policy.max_side)
+        working = image if working_size == image.size else image.resize(working_size, Image.Resampling.BILINEAR)
+        work_w, work_h = working.size
+        tile_w, tile_h = min(policy.tile_size, work_w), min(policy.tile_size, work_h)
+        boxes = [
+            (x, y, x + tile_w, y + tile_h)
+            for y in tile_origins(work_h, tile_h, policy.tile_overlap)
+            for x in tile_origins(work_w, tile_w, policy.tile_overlap)
+        ]
+
+        # Tile scores are accumulated at mask-logit resolution (a fraction of the working image) and
+        # averaged where tiles overlap, so the full-size map is produced by a single final upsample.
+        canvas: torch.Tensor | None = None
+        weight: torch.Tensor | None = None
+        scale_y = scale_x = 1.0
+        preprocess_ms = forward_ms = 0.0
+        start = time.perf_counter()
+        for offset in range(0, len(boxes), self.tile_batch_size):
+            chunk = boxes[offset : offset + self.tile_batch_size]
+            chunk_start = time.perf_counter()
+            inputs = processor(images=[working.crop(box) for box in chunk], return_tensors="pt", do_resize=False)
+            inputs = prepare_inputs({k: v.to(device) for k, v in inputs.items()}, modes)
+            forward_start = time.perf_counter()
+            with forward_context(modes, device):
+                outputs = model(**inputs)
+            preprocess_ms += (forward_start - chunk_start) * 1000
+            forward_ms += (time.perf_counter() - forward_start) * 1000
+            scores = self.metrics_service.semantic_scores(
+                outputs.class_queries_logits, outputs.masks_queries_logits
+            ).cpu()
+
+            if canvas is None:
+                mask_h, mask_w = scores.shape[-2:]
+                scale_y, scale_x = mask_h / tile_h, mask_w / tile_w
+                canvas_h, canvas_w = math.ceil(work_h * scale_y), math.ceil(work_w * scale_x)
+                canvas = torch.zeros((scores.shape[1], canvas_h, canvas_w), dtype=torch.float32)
+                weight = torch.zeros((1, canvas_h, canvas_w), dtype=torch.float32)
+
+            for (x0, y0, _, _), tile_scores in zip(chunk, scores):
+                top, left = round(y0 * scale_y), round(x0 * scale_x)
+                height = min(tile_scores.shape[-2], canvas.shape[-2] - top)
+                width = min(tile_scores.shape[-1], canvas.shape[-1] - left)
+                canvas[:, top : top + height, left : left + width] += tile_scores[:, :height, :width]
+                weight[:, top : top + height, left : left + width] += 1
+
+        canvas /= weight.clamp_(min=1)
+        seg, confidence = self.metrics_service.upsample_segmentation(canvas, (output_size or image.size)[::-1])
+        resolution = {
+            **policy.describe(),
+            "inference_width": work_w,
+            "inference_height": work_h,
+            "tiles": len(boxes),
+        }
         elapsed_ms = (time.perf_counter() - start) * 1000
+        return SegmentationOutput(
+            seg=seg,
+            confidence=confidence,
+            inference_ms=elapsed_ms,
+            id2label=model.config.id2label or {},
+            resolution=resolution,
+            timings={
+                "preprocess_ms": preprocess_ms,
+                "forward_ms": forward_ms,
+                "postprocess_ms": elapsed_ms - preprocess_ms - forward_ms,
+            },
+        )
 
-        overlay = self.visualization_service.to_overlay(image, seg)
-        original_url = self.visualization_service.save_image(image, "orig")
-        overlay_url = self.visualization_service.save_image(overlay, "overlay")
+    def _run_batch(
+        self, key: tuple[str, ResolutionPolicy], items: list[tuple[Image.Image, tuple[int, int]]]
+    ) -> list[SegmentationOutput]:
+        model_key, policy = key
+        if policy.mode == "tiled":
+            return [self.predict_tiled(model_key, image, policy, output_size) for image, output_size in items]
+        return self.predict_batch(
+            model_key, [image for image, _ in items], policy, [output_size for _, output_size in items]
+        )
 
-        id2label = model.config.id2label or {}
+    def run_prediction(
+        self,
+        image: Image.Image,
+        model_key: str,
+        policy: ResolutionPolicy | None = None,
+        original_url: str | None = None,
+        on_stats: Callable[[dict[str, Any]], None] | None = None,
+        output_size: tuple[int, int] | None = None,
+    ) -> dict[str, Any]:
+        hf_id = self.model_registry.hf_id(model_key)
+        policy = policy or self.resolution_policy()
+        # A draft-decoded JPEG is smaller than its original; results are still produced at the original size.
+        output_size = output_size or image.size
+        batched = self.batch_scheduler.submit((model_key, policy), (image, output_size)).result()
+        output: SegmentationOutput = batched.value
+        seg = output.seg
+
+        # With a background artifact writer these stages only cover enqueueing; inline writers include encoding/IO.
+        stage_start = time.perf_counter()
+        id2label = output.id2label
         labels = [
             {"class_id": int(class_id), "label": id2label.get(int(class_id), str(class_id))}
             for class_id in sorted(np.unique(seg).tolist())
         ]
-        top_classes, area_stats = self.metrics_service.class_stats(seg, semantic_probs, id2label)
-        class_masks = self.visualization_service.class_mask_urls(seg, id2label)
-
-        return {
+        top_classes, area_stats = self.metrics_service.class_stats(seg, output.confidence, id2label)
+        stats = {
             "model_key": model_key,
-            "model_hf_id": self.model_registry.hf_id(model_key),
-            "inference_ms": round(elapsed_ms, 2),
-            "original_url": original_url,
-            "overlay_url": overlay_url,
+            "model_hf_id": hf_id,
+            "backend": self.backend(model_key),
+            "execution_mode": format_execution_mode(self.execution_modes(model_key)),
+            "inference_ms": round(output.inference_ms, 2),
+            "batch_size": batched.batch_size,
+            "queue_wait_ms": batched.queue_wait_ms,
+            "resolution": output.resolution,
             "labels": labels,
             "top_classes": top_classes,
             "area_stats": area_stats,
+            "width": output_size[0],
+            "height": output_size[1],
+        }
+        stats_end = time.perf_counter()
+        if on_stats is not None:
+            # Lets streaming callers publish the statistics before any artifact is rendered.
+            on_stats(stats)
+
+        if image.size != output_size:
+            image = image.resize(output_size, Image.Resampling.BILINEAR)
+        artifact_id = self.visualization_service.content_artifact_id(image, seg, self.mask_mode)
+        overlay_url = self.visualization_service.save_overlay(image, seg, artifact_id)
+        overlay_end = time.perf_counter()
+
+        if original_url is None:
+            original_url = self.visualization_service.save_display_image(image, "orig", artifact_id)
+        label_map_url: str | None = None
+        if self.mask_mode == "files":
+            class_masks = self.visualization_service.class_mask_urls(seg, id2label, artifact_id)
+        else:
+            label_map_url = self.visualization_service.save_label_map(seg, artifact_id)
+            class_masks = self.visualization_service.class_mask_refs(label_map_url, seg, id2label)
+        timings = {
+            **output.timings,
+            "stats_ms": (stats_end - stage_start) * 1000,
+            "overlay_ms": (overlay_end - stats_end) * 1000,
+            "artifacts_ms": (time.perf_counter() - overlay_end) * 1000,
+        }
+
+        return {
+            **stats,
+            "prediction_id": artifact_id,
+            "timings": {name: round(value, 2) for name, value in timings.items()},
+            "original_url": original_url,
+            "overlay_url": overlay_url,
+            "label_map_url": label_map_url,
             "class_masks": class_masks,
-            "width": image.width,
-            "height": image.height,
         }
@@ -0,0 +1,231 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    job_id: str
+    kind: str
+    priority: int
+    created_at: float
+    meta: dict[str, Any] = field(default_factory=dict)
+    status: str = "queued"
+    stage: str = "queued"
+    started_at: float | None = None
+    finished_at: float | None = None
+    result: Any = None
+    error: dict[str, Any] | None = None
+    version: int = 0
+    cancel_requested: bool = False
+
+    def snapshot(self) -> dict[str, Any]:
+        snapshot: dict[str, Any] = {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "priority": self.priority,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "version": self.version,
+            **self.meta,
+        }
+        if self.started_at is not None:
+            snapshot["queue_wait_ms"] = round((self.started_at - self.created_at) * 1000, 2)
+        if self.finished_at is not None and self.started_at is not None:
+            snapshot["run_ms"] = round((self.finished_at - self.started_at) * 1000, 2)
+        if self.status == "succeeded":
+            snapshot["result"] = self.result
+        if self.error is not None:
+            snapshot["error"] = self.error
+        return snapshot
+
+
+class JobContext:
+    def __init__(self, queue: "JobQueueService", job: Job) -> None:
+        self._queue = queue
+        self._job = job
+
+    def report(self, stage: str) -> None:
+        # Progress checkpoints double as cancellation points for running jobs.
+        self._queue._update(self._job, stage=stage)
+        self.check_cancelled()
+
+    def check_cancelled(self) -> None:
+        if self._job.cancel_requested:
+            raise JobCancelled
+
+
+class JobQueueService:
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queued: int = 100,
+        retention_sec: float = 3600.0,
+        max_retained: int = 1000,
+    ) -> None:
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max(0, max_queued)
+        self.retention_sec = max(0.0, retention_sec)
+        self.max_retained = max(1, max_retained)
+
+        self._cond = threading.Condition()
+        self._heap: list[tuple[int, int, str]] = []
+        self._sequence = itertools.count()
+        self._jobs: dict[str, Job] = {}
+        self._tasks: dict[str, Callable[[JobContext], Any]] = {}
+        self._workers: list[threading.Thread] = []
+        self._closed = False
+        self._counters = {"submitted": 0, "succeeded": 0, "failed": 0, "cancelled": 0, "expired": 0}
+
+    def _update(self, job: Job, **fields: Any) -> None:
+        with self._cond:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.version += 1
+            self._cond.notify_all()
+
+    def _queued_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == "queued")
+
+    def submit(
+        self,
+        task: Callable[[JobContext], Any],
+        priority: int = 0,
+        kind: str = "predict",
+        meta: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        with self._cond:
+            if self._closed:
+                raise HTTPException(status_code=503, detail="Job queue is shutting down")
+            self._purge_expired(time.time())
+            if self.max_queued and self._queued_count() >= self.max_queued:
+                raise HTTPException(status_code=503, detail="Job queue is full", headers={"Retry-After": "5"})
+
+            job = Job(uuid.uuid4().hex, kind, priority, time.time(), meta=meta or {})
+            self._jobs[job.job_id] = job
+            self._tasks[job.job_id] = task
+            # Higher priority first; FIFO within the same priority.
+            heapq.heappush(self._heap, (-priority, next(self._sequence), job.job_id))
+            self._counters["submitted"] += 1
+            self._ensure_workers()
+            self._cond.notify_all()
+            return job.snapshot()
+
+    def _ensure_workers(self) -> None:
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._run, name=f"job-worker-{len(self._workers)}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_job(self) -> tuple[Job, Callable[[JobContext], Any]] | None:
+        with self._cond:
+            while True:
+                while self._heap:
+                    _, _, job_id = heapq.heappop(self._heap)
+                    job = self._jobs.get(job_id)
+                    task = self._tasks.pop(job_id, None)
+                    if job is None or task is None or job.status != "queued":
+                        continue
+                    job.status = "running"
+                    job.stage = "running"
+                    job.started_at = time.time()
+                    job.version += 1
+                    self._cond.notify_all()
+                    return job, task
+                if self._closed:
+                    return None
+                self._cond.wait()
+
+    def _run(self) -> None:
+        while True:
+            picked = self._next_job()
+            if picked is None:
+                return
+            job, task = picked
+            try:
+                result = task(JobContext(self, job))
+            except JobCancelled:
+                self._finish(job, "cancelled")
+            except HTTPException as exc:
+                self._finish(job, "failed", error={"status": exc.status_code, "detail": exc.detail})
+            except Exception as exc:
+                logger.exception("job %s failed", job.job_id)
+                self._finish(job, "failed", error={"status": 500, "detail": str(exc) or type(exc).__name__})
+            else:
+                if job.cancel_requested:
+                    self._finish(job, "cancelled")
+                else:
+                    self._finish(job, "succeeded", result=result)
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: dict[str, Any] | None = None) -> None:
+        with self._cond:
+            self._counters[status] += 1
+        self._update(job, status=status, stage=status, finished_at=time.time(), result=result, error=error)
+
+    def get(self, job_id: str) -> dict[str, Any]:
+        with self._cond:
+            self._purge_expired(time.time())
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+            return job.snapshot()
+
+    def cancel(self, job_id: str) -> dict[str, Any]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+            if job.status in TERMINAL_STATES:
+                raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+            job.cancel_requested = True
+            if job.status == "queued":
+                self._tasks.pop(job_id, None)
+                self._counters["cancelled"] += 1
+                job.status = job.stage = "cancelled"
+                job.finished_at = time.time()
+            job.version += 1
+            self._cond.notify_all()
+            return job.snapshot()
+
+    def _purge_expired(self, now: float) -> None:
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished_at is not None),
+            key=lambda job: job.finished_at,
+        )
+        overflow = max(0, len(finished) - self.max_retained)
+        for index, job in enumerate(finished):
+            if index < overflow or now - job.finished_at > self.retention_sec:
+                del self._jobs[job.job_id]
+                self._counters["expired"] += 1
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=5)
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            states: dict[str, int] = {}
+            for job in self._jobs.values():
+                states[job.status] = states.get(job.status, 0) + 1
+            return {**self._counters, "workers": self.max_workers, "max_queued": self.max_queued, "jobs": states}
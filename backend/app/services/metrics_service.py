@@ -5,24 +5,80 @@ import torch
 import torch.nn.functional as F
 
 
-class MetricsService:
-    @staticmethod
-    def semantic_probabilities(outputs: Any, target_size: tuple[int, int]) -> torch.Tensor:
-        class_logits = outputs.class_queries_logits[0]
-        mask_logits = outputs.masks_queries_logits[0]
+SEGMENTATION_CHUNK_BYTES = 32 * 1024 * 1024
+# Mask2FormerImageProcessor.post_process_semantic_segmentation resamples masks to this size first.
+POST_PROCESS_MASK_SIZE = (384, 384)
+
 
-        class_probs = torch.softmax(class_logits, dim=-1)[:, :-1]
-        mask_probs = torch.sigmoid(mask_logits)
+def _bilinear_taps(in_size: int, out_size: int) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    # Same source-coordinate rule as F.interpolate(mode="bilinear", align_corners=False).
+    scale = in_size / out_size
+    src = ((torch.arange(out_size, dtype=torch.float32) + 0.5) * scale - 0.5).clamp_(min=0)
+    lower = src.floor().long().clamp_(max=in_size - 1)
+    upper = (lower + 1).clamp_(max=in_size - 1)
+    return lower, upper, src - lower
 
-        semantic_logits = torch.einsum("qc,qhw->chw", class_probs, mask_probs)
-        semantic_logits = F.interpolate(
-            semantic_logits.unsqueeze(0),
-            size=target_size,
+
+class MetricsService:
+    @staticmethod
+    def semantic_logits(outputs: Any) -> torch.Tensor:
+        mask_logits = F.interpolate(
+            outputs.masks_queries_logits[:1],
+            size=POST_PROCESS_MASK_SIZE,
             mode="bilinear",
             align_corners=False,
-        ).squeeze(0)
+        )[0]
+        class_probs = torch.softmax(outputs.class_queries_logits[0], dim=-1)[:, :-1]
+        return torch.einsum("qc,qhw->chw", class_probs, torch.sigmoid(mask_logits))
 
-        return torch.softmax(semantic_logits, dim=0)
+    # Fused replacement for post_process_semantic_segmentation plus a softmax over the native-resolution
+    # scores: upsamples in row chunks and keeps only the argmax label and its softmax probability per
+    # pixel. The label map equals the processor's; for mask logits at the usual 1/4 input resolution the
+    # confidence stays within 5e-3 of the old softmax (about 1e-4 on average).
+    @classmethod
+    def semantic_segmentation(
+        cls,
+        outputs: Any,
+        target_size: tuple[int, int],
+        chunk_bytes: int = SEGMENTATION_CHUNK_BYTES,
+    ) -> tuple[np.ndarray, torch.Tensor]:
+        return cls.upsample_segmentation(cls.semantic_logits(outputs).float().cpu(), target_size, chunk_bytes)
+
+    # Upsamples a (C, h, w) semantic score map to target_size once, in row chunks. Shared by the
+    # single-pass path and the tiled path, which stitches tile scores into one map first.
+    @staticmethod
+    def upsample_segmentation(
+        logits: torch.Tensor,
+        target_size: tuple[int, int],
+        chunk_bytes: int = SEGMENTATION_CHUNK_BYTES,
+    ) -> tuple[np.ndarray, torch.Tensor]:
+        num_classes, in_h, in_w = logits.shape
+        out_h, out_w = target_size
+
+        row_lo, row_hi, row_frac = _bilinear_taps(in_h, out_h)
+        col_lo, col_hi, col_frac = _bilinear_taps(in_w, out_w)
+        col_frac = col_frac.view(1, 1, -1)
+
+        seg = torch.empty((out_h, out_w), dtype=torch.int32)
+        confidence = torch.empty((out_h, out_w), dtype=torch.float32)
+        rows_per_chunk = max(1, chunk_bytes // (num_classes * out_w * 4))
+
+        for start in range(0, out_h, rows_per_chunk):
+            rows = slice(start, min(start + rows_per_chunk, out_h))
+            frac = row_frac[rows].view(1, -1, 1)
+            vertical = torch.lerp(logits[:, row_lo[rows], :], logits[:, row_hi[rows], :], frac)
+            chunk = torch.lerp(vertical[:, :, col_lo], vertical[:, :, col_hi], col_frac)
+
+            top_logit, top_class = chunk.max(dim=0)
+            seg[rows] = top_class.to(torch.int32)
+            confidence[rows] = torch.exp(chunk - top_logit).sum(dim=0).reciprocal()
+
+        return seg.numpy(), confidence
+
+    @staticmethod
+    def semantic_scores(class_queries_logits: torch.Tensor, masks_queries_logits: torch.Tensor) -> torch.Tensor:
+        class_probs = torch.softmax(class_queries_logits.float(), dim=-1)[..., :-1]
+        return torch.einsum("bqc,bqhw->bchw", class_probs, torch.sigmoid(masks_queries_logits.float()))
 
     @staticmethod
     def class_stats(
@@ -31,16 +87,23 @@ class MetricsService:
         id2label: dict[int, str],
     ) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
         total_pixels = seg.size
+        flat_seg = np.ascontiguousarray(seg, dtype=np.int64).reshape(-1)
+
+        if semantic_probs.dim() == seg.ndim:
+            pixel_confidence = semantic_probs.reshape(-1)
+        else:
+            probs = semantic_probs.reshape(semantic_probs.shape[0], -1)
+            pixel_confidence = torch.gather(probs, 0, torch.from_numpy(flat_seg).unsqueeze(0))[0]
+
+        counts = np.bincount(flat_seg)
+        confidence_sums = np.bincount(flat_seg, weights=pixel_confidence.double().numpy())
+
         top_classes: list[dict[str, Any]] = []
         area_stats: list[dict[str, Any]] = []
 
-        for class_id in sorted(np.unique(seg).tolist()):
-            mask = seg == class_id
-            if not mask.any():
-                continue
-
-            area_ratio = (mask.sum() / total_pixels) * 100.0
-            confidence = float(semantic_probs[class_id][torch.from_numpy(mask)].mean().item())
+        for class_id in np.flatnonzero(counts).tolist():
+            area_ratio = (counts[class_id] / total_pixels) * 100.0
+            confidence = float(confidence_sums[class_id] / counts[class_id])
             label = id2label.get(int(class_id), str(class_id))
 
             top_classes.append(
@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PoolEntry:
+    value: Any
+    memory_bytes: int
+    loaded_at: float
+
+
+def estimate_module_bytes(module: torch.nn.Module) -> int:
+    tensors = list(module.parameters()) + list(module.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+class ModelPool:
+    def __init__(
+        self,
+        loader: Callable[[str], Any],
+        size_of: Callable[[Any], int],
+        memory_budget_bytes: int = 0,
+        max_events: int = 50,
+    ) -> None:
+        self.loader = loader
+        self.size_of = size_of
+        self.memory_budget_bytes = max(0, memory_budget_bytes)
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _PoolEntry] = OrderedDict()
+        self._loading: dict[str, Future] = {}
+        self._events: deque[dict[str, Any]] = deque(maxlen=max_events)
+        self._counters = {"hits": 0, "loads": 0, "shared_loads": 0, "load_failures": 0, "evictions": 0}
+
+    def _record(self, event: str, key: str, **fields: Any) -> None:
+        self._events.append({"event": event, "model_key": key, "at": time.time(), **fields})
+        logger.info("model pool %s: %s %s", event, key, fields)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry.value
+
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._loading[key] = future
+            else:
+                self._counters["shared_loads"] += 1
+
+        if not owner:
+            return future.result()
+
+        start = time.perf_counter()
+        try:
+            value = self.loader(key)
+            memory_bytes = self.size_of(value)
+        except BaseException as exc:
+            with self._lock:
+                self._loading.pop(key, None)
+                self._counters["load_failures"] += 1
+                self._record("load_failed", key, error=str(exc))
+            future.set_exception(exc)
+            raise
+
+        with self._lock:
+            self._entries[key] = _PoolEntry(value, memory_bytes, time.time())
+            self._loading.pop(key, None)
+            self._counters["loads"] += 1
+            self._record(
+                "loaded",
+                key,
+                memory_mb=round(memory_bytes / 2**20, 1),
+                load_ms=round((time.perf_counter() - start) * 1000, 2),
+            )
+            self._evict_over_budget(keep=key)
+        future.set_result(value)
+        return value
+
+    def _evict_over_budget(self, keep: str) -> None:
+        if self.memory_budget_bytes == 0:
+            return
+        while self._resident_bytes() > self.memory_budget_bytes:
+            victim = next((key for key in self._entries if key != keep), None)
+            if victim is None:
+                return
+            entry = self._entries.pop(victim)
+            self._counters["evictions"] += 1
+            self._record("evicted", victim, memory_mb=round(entry.memory_bytes / 2**20, 1))
+
+    def _resident_bytes(self) -> int:
+        return sum(entry.memory_bytes for entry in self._entries.values())
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "memory_budget_mb": round(self.memory_budget_bytes / 2**20, 1),
+                "resident_mb": round(self._resident_bytes() / 2**20, 1),
+                "resident": [
+                    {"model_key": key, "memory_mb": round(entry.memory_bytes / 2**20, 1)}
+                    for key, entry in self._entries.items()
+                ],
+                "loading": sorted(self._loading),
+                "events": list(self._events),
+            }
@@ -0,0 +1,70 @@
+import threading
+import time
+from typing import Any
+
+from PIL import Image
+
+from app.services.inference_service import InferenceService
+
+
+class ModelWarmupService:
+    def __init__(
+        self,
+        inference_service: InferenceService,
+        model_keys: list[str],
+        warmup_runs: int = 1,
+        warmup_sizes: list[tuple[int, int]] | None = None,
+    ) -> None:
+        self.inference_service = inference_service
+        self.model_keys = model_keys
+        self.warmup_runs = max(0, warmup_runs)
+        self.warmup_sizes = warmup_sizes or [(512, 512)]
+
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+        self._status: dict[str, dict[str, Any]] = {
+            model_key: {"state": "pending", "load_ms": None, "warmup_ms": [], "error": None}
+            for model_key in model_keys
+        }
+
+    def _update(self, model_key: str, **fields: Any) -> None:
+        with self._lock:
+            self._status[model_key].update(fields)
+
+    def warm_up(self, model_key: str) -> None:
+        try:
+            self._update(model_key, state="loading")
+            start = time.perf_counter()
+            self.inference_service.load_model(model_key)
+            self._update(model_key, state="warming", load_ms=round((time.perf_counter() - start) * 1000, 2))
+
+            warmup_ms: list[dict[str, Any]] = []
+            for width, height in self.warmup_sizes:
+                image = Image.new("RGB", (width, height), color=(128, 128, 128))
+                for _ in range(self.warmup_runs):
+                    start = time.perf_counter()
+                    self.inference_service.predict_batch(model_key, [image])
+                    warmup_ms.append(
+                        {"size": f"{width}x{height}", "ms": round((time.perf_counter() - start) * 1000, 2)}
+                    )
+            self._update(model_key, state="ready", warmup_ms=warmup_ms)
+        except Exception as exc:
+            self._update(model_key, state="failed", error=str(exc))
+
+    def run(self) -> None:
+        for model_key in self.model_keys:
+            self.warm_up(model_key)
+
+    def start(self) -> None:
+        if self._worker is not None:
+            return
+        self._worker = threading.Thread(target=self.run, name="model-warmup", daemon=True)
+        self._worker.start()
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return all(status["state"] == "ready" for status in self._status.values())
+
+    def status(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {model_key: dict(status) for model_key, status in self._status.items()}
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+ARTIFACT_URL_FIELDS = ("original_url", "overlay_url", "label_map_url")
+
+
+class PredictionCacheService:
+    def __init__(
+        self,
+        cache_dir: Path,
+        static_dir: Path,
+        version: str,
+        max_memory_entries: int = 128,
+        max_disk_entries: int = 1024,
+        is_pending: Callable[[Path], bool] | None = None,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.static_dir = static_dir
+        self.version = version
+        self.max_memory_entries = max(0, max_memory_entries)
+        self.max_disk_entries = max(0, max_disk_entries)
+        self.is_pending = is_pending or (lambda _: False)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._disk: OrderedDict[str, None] = OrderedDict(
+            (path.stem, None) for path in sorted(self.cache_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        )
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+    @staticmethod
+    def content_hash(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    def key_for(self, content: bytes, model_key: str) -> str:
+        return hashlib.sha256(f"{self.content_hash(content)}:{model_key}:{self.version}".encode()).hexdigest()
+
+    def _artifact_paths(self, response: dict[str, Any]) -> list[Path]:
+        urls = [response.get(field) for field in ARTIFACT_URL_FIELDS]
+        urls.extend(mask.get("mask_url") for mask in response.get("class_masks", []))
+        return [
+            self.static_dir / url.removeprefix("/static/")
+            for url in urls
+            if isinstance(url, str) and url.startswith("/static/")
+        ]
+
+    def _artifacts_exist(self, response: dict[str, Any]) -> bool:
+        paths = self._artifact_paths(response)
+        # Artifacts still queued in the writer pool count as present; a failed write shows up as stale later.
+        return bool(paths) and all(path.is_file() or self.is_pending(path) for path in paths)
+
+    def _remember(self, key: str, response: dict[str, Any]) -> None:
+        if self.max_memory_entries == 0:
+            return
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _drop(self, key: str) -> None:
+        self._memory.pop(key, None)
+        if key in self._disk:
+            del self._disk[key]
+            (self.cache_dir / f"{key}.json").unlink(missing_ok=True)
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            response = self._memory.get(key)
+            tier = "memory_hits"
+            if response is None and key in self._disk:
+                try:
+                    response = json.loads((self.cache_dir / f"{key}.json").read_text())
+                except (OSError, ValueError):
+                    response = None
+                tier = "disk_hits"
+
+            if response is None:
+                self._counters["misses"] += 1
+                return None
+            if not self._artifacts_exist(response):
+                self._drop(key)
+                self._counters["stale"] += 1
+                self._counters["misses"] += 1
+                return None
+
+            self._counters[tier] += 1
+            self._remember(key, response)
+            if key in self._disk:
+                self._disk.move_to_end(key)
+                (self.cache_dir / f"{key}.json").touch()
+            return {**response, "cached": True}
+
+    def put(self, key: str, response: dict[str, Any]) -> None:
+        if not self._artifacts_exist(response):
+            return
+        response = {k: v for k, v in response.items() if k != "cached"}
+        with self._lock:
+            self._remember(key, response)
+            if self.max_disk_entries == 0:
+                return
+            path = self.cache_dir / f"{key}.json"
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(response, ensure_ascii=False))
+            tmp_path.replace(path)
+            self._disk[key] = None
+            self._disk.move_to_end(key)
+            while len(self._disk) > self.max_disk_entries:
+                evicted, _ = self._disk.popitem(last=False)
+                (self.cache_dir / f"{evicted}.json").unlink(missing_ok=True)
+                self._counters["evictions"] += 1
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                **self._counters,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk),
+            }
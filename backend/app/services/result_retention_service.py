@@ -0,0 +1,126 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+
+@dataclass
+class _ArtifactGroup:
+    artifact_id: str
+    paths: list[Path] = field(default_factory=list)
+    total_bytes: int = 0
+    newest_mtime: float = 0.0
+
+
+class ResultRetentionService:
+    def __init__(
+        self,
+        result_dir: Path,
+        ttl_sec: float = 0.0,
+        max_total_bytes: int = 0,
+        max_files: int = 0,
+        sweep_interval_sec: float = 300.0,
+        min_age_sec: float = 60.0,
+    ) -> None:
+        self.result_dir = result_dir
+        self.ttl_sec = ttl_sec
+        self.max_total_bytes = max_total_bytes
+        self.max_files = max_files
+        self.sweep_interval_sec = sweep_interval_sec
+        self.min_age_sec = min_age_sec
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: threading.Thread | None = None
+        self._last_sweep: dict[str, Any] = {}
+        self._totals = {"sweeps": 0, "deleted_predictions": 0, "deleted_files": 0, "freed_bytes": 0}
+
+    @staticmethod
+    def artifact_id_for(path: Path) -> str:
+        return path.stem.rsplit("_", 1)[-1]
+
+    def _scan(self) -> list[_ArtifactGroup]:
+        groups: dict[str, _ArtifactGroup] = {}
+        for path in self.result_dir.iterdir():
+            # Dotfiles are in-flight writer temp files; subdirectories (e.g. the prediction cache) are not results.
+            if path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if not path.is_file():
+                continue
+            artifact_id = self.artifact_id_for(path)
+            group = groups.setdefault(artifact_id, _ArtifactGroup(artifact_id))
+            group.paths.append(path)
+            group.total_bytes += stat.st_size
+            group.newest_mtime = max(group.newest_mtime, stat.st_mtime)
+        return sorted(groups.values(), key=lambda g: g.newest_mtime)
+
+    def sweep(self, now: float | None = None) -> dict[str, Any]:
+        now = time.time() if now is None else now
+        with self._lock:
+            groups = self._scan()
+            total_bytes = sum(g.total_bytes for g in groups)
+            total_files = sum(len(g.paths) for g in groups)
+            deleted_predictions = deleted_files = freed_bytes = 0
+
+            for group in groups:
+                age = now - group.newest_mtime
+                if age < self.min_age_sec:
+                    break
+                expired = self.ttl_sec > 0 and age > self.ttl_sec
+                over_bytes = self.max_total_bytes > 0 and total_bytes > self.max_total_bytes
+                over_files = self.max_files > 0 and total_files > self.max_files
+                if not (expired or over_bytes or over_files):
+                    break
+
+                for path in group.paths:
+                    path.unlink(missing_ok=True)
+                deleted_predictions += 1
+                deleted_files += len(group.paths)
+                freed_bytes += group.total_bytes
+                total_bytes -= group.total_bytes
+                total_files -= len(group.paths)
+
+            self._totals["sweeps"] += 1
+            self._totals["deleted_predictions"] += deleted_predictions
+            self._totals["deleted_files"] += deleted_files
+            self._totals["freed_bytes"] += freed_bytes
+            self._last_sweep = {
+                "at": now,
+                "deleted_predictions": deleted_predictions,
+                "deleted_files": deleted_files,
+                "freed_bytes": freed_bytes,
+                "remaining_files": total_files,
+                "remaining_bytes": total_bytes,
+            }
+            return dict(self._last_sweep)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self._totals, "last_sweep": dict(self._last_sweep)}
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.sweep()
+            except OSError:
+                pass
+            if self._stop.wait(self.sweep_interval_sec):
+                return
+
+    def start(self) -> None:
+        if self._worker is not None:
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="result-retention", daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
@@ -0,0 +1,103 @@
+import re
+import threading
+from pathlib import Path
+from typing import Any
+
+from fastapi import HTTPException
+from PIL import Image, ImageOps
+
+THUMBNAIL_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+CONTENT_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ThumbnailService:
+    def __init__(
+        self,
+        cache_dir: Path,
+        sizes: tuple[int, ...] = (160, 320, 640),
+        default_size: int = 320,
+        image_format: str = "webp",
+        quality: int = 80,
+    ) -> None:
+        if image_format not in THUMBNAIL_FORMATS:
+            raise ValueError(f"Unknown thumbnail format: {image_format}")
+        self.cache_dir = cache_dir
+        self.sizes = tuple(sorted(set(sizes))) or (default_size,)
+        self.default_size = default_size if default_size in self.sizes else self.sizes[0]
+        self.image_format = image_format
+        self.quality = quality
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._key_locks: dict[Path, threading.Lock] = {}
+        self._counters = {"hits": 0, "generated": 0}
+
+    @property
+    def extension(self) -> str:
+        return "jpg" if self.image_format == "jpeg" else self.image_format
+
+    def url_for(self, content_hash: str, size: int | None = None) -> str:
+        # The content hash is part of the URL, so a changed original gets a new URL and old ones stay immutable.
+        return f"/thumbnails/{size or self.default_size}/{content_hash}.{self.extension}"
+
+    def urls_for(self, content_hash: str) -> dict[str, str]:
+        return {str(size): self.url_for(content_hash, size) for size in self.sizes}
+
+    def parse_name(self, size: int, name: str) -> str:
+        content_hash, _, extension = name.partition(".")
+        if size not in self.sizes or extension != self.extension or not CONTENT_HASH_PATTERN.match(content_hash):
+            raise HTTPException(status_code=404, detail=f"Unknown thumbnail: {size}/{name}")
+        return content_hash
+
+    def path_for(self, content_hash: str, size: int) -> Path:
+        return self.cache_dir / content_hash[:2] / f"{content_hash}_{size}.{self.extension}"
+
+    def ensure(self, source: Path, content_hash: str, size: int) -> Path:
+        path = self.path_for(content_hash, size)
+        if path.is_file():
+            with self._lock:
+                self._counters["hits"] += 1
+            return path
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(path, threading.Lock())
+        # Concurrent first requests for the same thumbnail render it once.
+        with key_lock:
+            if not path.is_file():
+                self._render(source, path, size)
+                with self._lock:
+                    self._counters["generated"] += 1
+        with self._lock:
+            self._key_locks.pop(path, None)
+        return path
+
+    def _render(self, source: Path, path: Path, size: int) -> None:
+        try:
+            with Image.open(source) as image:
+                # JPEG draft decoding skips most of the full-resolution decode for small targets.
+                image.draft("RGB", (size, size))
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+                thumbnail = image.convert("RGB")
+        except Exception as exc:
+            raise HTTPException(status_code=422, detail="Cannot render thumbnail for this image") from exc
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        try:
+            thumbnail.save(tmp_path, format=THUMBNAIL_FORMATS[self.image_format], quality=self.quality)
+            tmp_path.replace(path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def pregenerate(self, source: Path, content_hash: str) -> int:
+        generated = 0
+        for size in self.sizes:
+            if not self.path_for(content_hash, size).is_file():
+                self.ensure(source, content_hash, size)
+                generated += 1
+        return generated
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "sizes": list(self.sizes), "format": self.image_format}
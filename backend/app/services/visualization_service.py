@@ -1,13 +1,46 @@
+import hashlib
+import io
+import re
 import uuid
 from pathlib import Path
+from typing import Any, Callable
 
 import numpy as np
+from fastapi import HTTPException
 from PIL import Image
 
+from app.services.artifact_writer_service import ArtifactWriterService
+
+# Integer form of the 0.45 alpha blend; (arr * 55 + color * 45) // 100 equals
+# (arr * 0.55 + color * 0.45).astype(np.uint8) for every uint8 pair.
+OVERLAY_ALPHA_PERCENT = 45
+# Content-derived ids are 16 hex characters; 10-character ids come from older random names still on disk.
+LABEL_MAP_NAME_PATTERN = re.compile(r"^labels_[0-9a-f]{10}(?:[0-9a-f]{6})?\.png$")
+IMAGE_FORMATS = {"png": ("PNG", "png"), "webp": ("WEBP", "webp"), "jpeg": ("JPEG", "jpg")}
+# Uploads are kept in their original encoding; the extension follows the format PIL detected.
+UPLOAD_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif", "BMP": "bmp", "TIFF": "tif"}
+RESULT_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]+\.(png|webp|jpg|gif|bmp|tif|bin)$")
+
 
 class VisualizationService:
-    def __init__(self, result_dir: Path) -> None:
+    def __init__(
+        self,
+        result_dir: Path,
+        num_classes: int = 150,
+        artifact_writer: ArtifactWriterService | None = None,
+        image_format: str = "png",
+        png_compress_level: int = 6,
+        lossy_quality: int = 90,
+    ) -> None:
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown artifact image format: {image_format}")
         self.result_dir = result_dir
+        self.artifact_writer = artifact_writer or ArtifactWriterService(max_workers=0)
+        self.image_format = image_format
+        self.png_compress_level = png_compress_level
+        self.lossy_quality = lossy_quality
+        palette = self.build_palette(num_classes)
+        self._lookup_tables = (palette, self._pack_tinted(palette))
 
     @staticmethod
     def color_for_class(class_id: int) -> tuple[int, int, int]:
@@ -15,29 +48,101 @@ class VisualizationService:
         color = rng.integers(40, 230, size=3, dtype=np.uint8)
         return int(color[0]), int(color[1]), int(color[2])
 
+    @classmethod
+    def build_palette(cls, num_classes: int) -> np.ndarray:
+        return np.array([cls.color_for_class(class_id) for class_id in range(num_classes)], dtype=np.uint8).reshape(-1, 3)
+
+    @staticmethod
+    def _pack_tinted(palette: np.ndarray) -> np.ndarray:
+        tinted = np.zeros((len(palette), 4), dtype=np.uint16)
+        tinted[:, :3] = palette.astype(np.uint16) * OVERLAY_ALPHA_PERCENT
+        return tinted.view(np.uint64)[:, 0]
+
+    def _tables_for(self, num_classes: int) -> tuple[np.ndarray, np.ndarray]:
+        tables = self._lookup_tables
+        if num_classes > len(tables[0]):
+            palette = self.build_palette(num_classes)
+            tables = (palette, self._pack_tinted(palette))
+            self._lookup_tables = tables
+        return tables
+
+    def palette(self, num_classes: int) -> np.ndarray:
+        return self._tables_for(num_classes)[0][:num_classes]
+
     def to_overlay(self, image: Image.Image, seg: np.ndarray) -> Image.Image:
-        arr = np.array(image.convert("RGB"))
-        color_mask = np.zeros_like(arr)
+        arr = np.asarray(image if image.mode == "RGB" else image.convert("RGB"))
+        _, tinted_palette = self._tables_for(int(seg.max()) + 1 if seg.size else 0)
 
-        for class_id in np.unique(seg):
-            color_mask[seg == class_id] = np.array(self.color_for_class(int(class_id)), dtype=np.uint8)
+        tint = tinted_palette[seg].view(np.uint16).reshape(*seg.shape, 4)[..., :3]
+        blended = arr.astype(np.uint16)
+        blended *= 100 - OVERLAY_ALPHA_PERCENT
+        blended += tint
+        blended //= 100
+        return Image.fromarray(blended.astype(np.uint8))
+
+    @staticmethod
+    def new_artifact_id() -> str:
+        return uuid.uuid4().hex[:10]
+
+    def content_artifact_id(self, image: Image.Image, seg: np.ndarray, mask_mode: str = "") -> str:
+        # Every artifact of a prediction is rendered from the image pixels, the segmentation and the encoder
+        # settings, so hashing those names the files by their content before they are encoded.
+        digest = hashlib.blake2b(digest_size=8)
+        settings = (
+            f"{self.image_format}:{self.png_compress_level}:{self.lossy_quality}:{mask_mode}:"
+            f"{image.mode}:{image.size}:{seg.dtype}:{seg.shape}"
+        )
+        digest.update(settings.encode())
+        digest.update(image.tobytes())
+        digest.update(np.ascontiguousarray(seg).data)
+        return digest.hexdigest()
+
+    def _save_kwargs(self, image_format: str) -> dict[str, Any]:
+        pil_format, _ = IMAGE_FORMATS[image_format]
+        if image_format == "png":
+            return {"format": pil_format, "compress_level": self.png_compress_level}
+        return {"format": pil_format, "quality": self.lossy_quality}
+
+    def _write(
+        self, render: Callable[[], Image.Image], prefix: str, artifact_id: str | None, image_format: str = "png"
+    ) -> str:
+        # The URL is fixed before encoding; the writer pool persists the file in the background.
+        _, extension = IMAGE_FORMATS[image_format]
+        name = f"{prefix}_{artifact_id or self.new_artifact_id()}.{extension}"
+        self.artifact_writer.submit(self.result_dir / name, render, self._save_kwargs(image_format))
+        return f"/static/results/{name}"
 
-        alpha = 0.45
-        overlay = (arr * (1 - alpha) + color_mask * alpha).astype(np.uint8)
-        return Image.fromarray(overlay)
+    def save_image(self, img: Image.Image, prefix: str, artifact_id: str | None = None) -> str:
+        return self._write(lambda: img, prefix, artifact_id)
 
-    def save_image(self, img: Image.Image, prefix: str) -> str:
-        name = f"{prefix}_{uuid.uuid4().hex[:10]}.png"
+    def save_display_image(self, img: Image.Image, prefix: str, artifact_id: str | None = None) -> str:
+        return self._write(lambda: img, prefix, artifact_id, self.image_format)
+
+    def save_upload(self, raw: bytes, image_format: str | None, content_hash: str) -> str:
+        name = f"upload_{content_hash[:16]}.{UPLOAD_EXTENSIONS.get(image_format or '', 'bin')}"
         path = self.result_dir / name
-        img.save(path, format="PNG")
+        if path.is_file():
+            # Identical uploads share one file; refreshing mtime keeps it out of retention while in use.
+            path.touch()
+        else:
+            tmp_path = path.with_name(f".{name}.tmp")
+            tmp_path.write_bytes(raw)
+            tmp_path.replace(path)
         return f"/static/results/{name}"
 
-    def class_mask_urls(self, seg: np.ndarray, id2label: dict[int, str]) -> list[dict[str, str | int]]:
+    def save_overlay(self, image: Image.Image, seg: np.ndarray, artifact_id: str | None = None) -> str:
+        return self._write(lambda: self.to_overlay(image, seg), "overlay", artifact_id, self.image_format)
+
+    def class_mask_urls(
+        self, seg: np.ndarray, id2label: dict[int, str], artifact_id: str | None = None
+    ) -> list[dict[str, str | int]]:
         urls: list[dict[str, str | int]] = []
         for class_id in sorted(np.unique(seg).tolist()):
-            binary = (seg == class_id).astype(np.uint8) * 255
-            img = Image.fromarray(binary, mode="L")
-            url = self.save_image(img, f"mask_{class_id}")
+            url = self._write(
+                lambda class_id=class_id: Image.fromarray((seg == class_id).astype(np.uint8) * 255, mode="L"),
+                f"mask_{class_id}",
+                artifact_id,
+            )
             urls.append(
                 {
                     "class_id": int(class_id),
@@ -47,3 +152,54 @@ class VisualizationService:
             )
 
         return urls
+
+    def _label_map_image(self, seg: np.ndarray) -> Image.Image:
+        if seg.size and int(seg.max()) > 255:
+            return Image.fromarray(seg.astype(np.uint16))
+        img = Image.fromarray(seg.astype(np.uint8), mode="P")
+        img.putpalette(self.palette(256).tobytes())
+        return img
+
+    def save_label_map(self, seg: np.ndarray, artifact_id: str | None = None) -> str:
+        return self._write(lambda: self._label_map_image(seg), "labels", artifact_id)
+
+    def result_path(self, name: str) -> Path:
+        if not RESULT_NAME_PATTERN.match(name):
+            raise HTTPException(status_code=404, detail=f"Unknown artifact: {name}")
+        return self.result_dir / name
+
+    def load_label_map(self, name: str) -> np.ndarray:
+        path = self.result_dir / name
+        if not LABEL_MAP_NAME_PATTERN.match(name) or not self.artifact_writer.wait(path):
+            raise HTTPException(status_code=404, detail=f"Unknown label map: {name}")
+        with Image.open(path) as img:
+            return np.asarray(img).astype(np.int32)
+
+    def class_mask_refs(self, label_map_url: str, seg: np.ndarray, id2label: dict[int, str]) -> list[dict[str, str | int]]:
+        name = label_map_url.rsplit("/", 1)[-1]
+        return [
+            {
+                "class_id": int(class_id),
+                "label": id2label.get(int(class_id), str(class_id)),
+                "mask_url": f"/class-masks/{name}/{class_id}",
+            }
+            for class_id in sorted(np.unique(seg).tolist())
+        ]
+
+    def encode_class_mask(
+        self, label_map_name: str, class_id: int, crop: bool = False
+    ) -> tuple[bytes, tuple[int, int, int, int]]:
+        seg = self.load_label_map(label_map_name)
+        mask = seg == class_id
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        if rows.size == 0:
+            raise HTTPException(status_code=404, detail=f"class_id {class_id} not present in {label_map_name}")
+
+        bbox = (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+        if crop:
+            mask = mask[bbox[1] : bbox[3], bbox[0] : bbox[2]]
+
+        buf = io.BytesIO()
+        Image.fromarray(mask.astype(np.uint8) * 255, mode="L").save(buf, format="PNG")
+        return buf.getvalue(), bbox
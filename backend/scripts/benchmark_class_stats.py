@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import torch
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services.metrics_service import MetricsService
+
+
+def per_class_loop_stats(
+    seg: np.ndarray,
+    semantic_probs: torch.Tensor,
+    id2label: dict[int, str],
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    total_pixels = seg.size
+    top_classes: list[dict[str, Any]] = []
+    area_stats: list[dict[str, Any]] = []
+
+    for class_id in sorted(np.unique(seg).tolist()):
+        mask = seg == class_id
+        area_ratio = (mask.sum() / total_pixels) * 100.0
+        confidence = float(semantic_probs[class_id][torch.from_numpy(mask)].mean().item())
+        label = id2label.get(int(class_id), str(class_id))
+        top_classes.append({"class_id": int(class_id), "label": label, "confidence": round(confidence, 4)})
+        area_stats.append({"class_id": int(class_id), "label": label, "area_ratio": round(float(area_ratio), 2)})
+
+    top_classes.sort(key=lambda x: x["confidence"], reverse=True)
+    area_stats.sort(key=lambda x: x["area_ratio"], reverse=True)
+    return top_classes[:8], area_stats[:12]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark MetricsService.class_stats against the per-class loop")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[512, 1024, 2048], help="Square image sides")
+    parser.add_argument("--classes", type=int, nargs="+", default=[5, 30, 60], help="Distinct classes per image")
+    parser.add_argument("--num-labels", type=int, default=150, help="Channels in semantic_probs")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (best is reported)")
+    return parser.parse_args()
+
+
+def best_ms(fn: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main() -> int:
+    args = parse_args()
+    rng = np.random.default_rng(0)
+
+    print(f"{'size':>6} {'classes':>8} {'loop_ms':>10} {'vectorized_ms':>14} {'speedup':>8} {'identical':>10}")
+    for side in args.sizes:
+        semantic_probs = torch.rand(args.num_labels, side, side)
+        for num_classes in args.classes:
+            class_ids = rng.choice(args.num_labels, size=num_classes, replace=False)
+            seg = class_ids[rng.integers(0, num_classes, size=(side, side))].astype(np.int32)
+
+            identical = per_class_loop_stats(seg, semantic_probs, {}) == MetricsService.class_stats(seg, semantic_probs, {})
+            loop_ms = best_ms(lambda: per_class_loop_stats(seg, semantic_probs, {}), args.repeat)
+            fast_ms = best_ms(lambda: MetricsService.class_stats(seg, semantic_probs, {}), args.repeat)
+            print(
+                f"{side:>6} {num_classes:>8} {loop_ms:>10.2f} {fast_ms:>14.2f} "
+                f"{loop_ms / fast_ms:>7.1f}x {str(identical):>10}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services.visualization_service import VisualizationService
+
+
+def per_class_loop_overlay(image: Image.Image, seg: np.ndarray) -> Image.Image:
+    arr = np.array(image.convert("RGB"))
+    color_mask = np.zeros_like(arr)
+
+    for class_id in np.unique(seg):
+        color_mask[seg == class_id] = np.array(VisualizationService.color_for_class(int(class_id)), dtype=np.uint8)
+
+    alpha = 0.45
+    overlay = (arr * (1 - alpha) + color_mask * alpha).astype(np.uint8)
+    return Image.fromarray(overlay)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark VisualizationService.to_overlay against the per-class loop")
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[1.0, 4.0, 12.0], help="Image sizes (4:3)")
+    parser.add_argument("--classes", type=int, default=30, help="Distinct classes per image")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (best is reported)")
+    return parser.parse_args()
+
+
+def best_ms(fn: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main() -> int:
+    args = parse_args()
+    rng = np.random.default_rng(0)
+    service = VisualizationService(Path(tempfile.gettempdir()))
+
+    print(f"{'size':>11} {'loop_ms':>10} {'lut_ms':>10} {'speedup':>8} {'identical':>10}")
+    for megapixels in args.megapixels:
+        width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+        height = int(width * 3 / 4)
+        image = Image.fromarray(rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8))
+        class_ids = rng.choice(150, size=args.classes, replace=False)
+        seg = class_ids[rng.integers(0, args.classes, size=(height, width))].astype(np.int32)
+
+        identical = np.array_equal(np.asarray(per_class_loop_overlay(image, seg)), np.asarray(service.to_overlay(image, seg)))
+        loop_ms = best_ms(lambda: per_class_loop_overlay(image, seg), args.repeat)
+        lut_ms = best_ms(lambda: service.to_overlay(image, seg), args.repeat)
+        print(f"{width:>5}x{height:<5} {loop_ms:>10.2f} {lut_ms:>10.2f} {loop_ms / lut_ms:>7.1f}x {str(identical):>10}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from transformers import Mask2FormerForUniversalSegmentation
+
+from app.core.config import ADE20K_MODEL_KEY, ONNX_EXPORT_DIR, ONNX_INPUT_SIZE
+from app.models.onnx_backend import export_onnx, onnx_artifact_path
+from app.models.registry import ModelRegistry
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export a Mask2Former checkpoint to ONNX for the onnxruntime backend")
+    parser.add_argument("--model-key", default=ADE20K_MODEL_KEY, help="Key from MODELS to export")
+    parser.add_argument("--force", action="store_true", help="Re-export even if a cached artifact exists")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    hf_id = ModelRegistry().hf_id(args.model_key)
+    onnx_path = onnx_artifact_path(ONNX_EXPORT_DIR, hf_id, ONNX_INPUT_SIZE)
+    if onnx_path.exists() and not args.force:
+        print(f"cached: {onnx_path}")
+        return 0
+
+    start = time.perf_counter()
+    model = Mask2FormerForUniversalSegmentation.from_pretrained(hf_id)
+    export_onnx(model, onnx_path, ONNX_INPUT_SIZE)
+    print(f"exported: {onnx_path} ({onnx_path.stat().st_size / 2**20:.1f} MB, {time.perf_counter() - start:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.core.config import (
+    CATALOG_INDEX_PATH,
+    TEST_IMAGE_DIR,
+    THUMBNAIL_DEFAULT_SIZE,
+    THUMBNAIL_DIR,
+    THUMBNAIL_FORMAT,
+    THUMBNAIL_QUALITY,
+    THUMBNAIL_SIZES,
+)
+from app.services.image_catalog_service import ImageCatalogService
+from app.services.thumbnail_service import ThumbnailService
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Pre-generate gallery thumbnails for every catalog image")
+    parser.add_argument("--workers", type=int, default=4, help="Images rendered in parallel")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    thumbnails = ThumbnailService(
+        THUMBNAIL_DIR,
+        sizes=THUMBNAIL_SIZES,
+        default_size=THUMBNAIL_DEFAULT_SIZE,
+        image_format=THUMBNAIL_FORMAT,
+        quality=THUMBNAIL_QUALITY,
+    )
+    catalog = ImageCatalogService(TEST_IMAGE_DIR, index_path=CATALOG_INDEX_PATH)
+    catalog.refresh()
+    entries = [entry for entry in catalog.list_images() if entry["width"] is not None]
+
+    def render(entry: dict) -> int:
+        return thumbnails.pregenerate(TEST_IMAGE_DIR / entry["id"], entry["sha256"])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        generated = sum(pool.map(render, entries))
+    print(
+        f"images={len(entries)} generated={generated} sizes={','.join(map(str, thumbnails.sizes))} "
+        f"dir={THUMBNAIL_DIR} ({time.perf_counter() - start:.1f}s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.core.config import (
+    ADE20K_MODEL_KEY,
+    ONNX_EXPORT_DIR,
+    ONNX_INPUT_SIZE,
+    ORT_INTER_OP_THREADS,
+    ORT_INTRA_OP_THREADS,
+    RESULT_DIR,
+    TEST_IMAGE_DIR,
+)
+from app.models.execution import EXECUTION_MODES
+from app.models.registry import ModelRegistry
+from app.services.execution_mode_check_service import ExecutionModeCheckService, format_cli_report
+from app.services.image_catalog_service import ImageCatalogService
+from app.services.inference_service import InferenceService
+from app.services.metrics_service import MetricsService
+from app.services.visualization_service import VisualizationService
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare execution modes against fp32 on local test images (latency and label agreement)"
+    )
+    parser.add_argument("--limit", type=int, default=10, help="Max number of images to run")
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=[*EXECUTION_MODES, "onnxruntime"],
+        help="Execution modes to compare; combine with '+' (e.g. int8_dynamic+channels_last), "
+        "'onnxruntime' runs the exported ONNX graph",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+
+    model_registry = ModelRegistry()
+    visualization_service = VisualizationService(RESULT_DIR)
+    metrics_service = MetricsService()
+
+    def inference_service_factory(mode: str) -> InferenceService:
+        if mode == "onnxruntime":
+            return InferenceService(
+                model_registry,
+                visualization_service,
+                metrics_service,
+                backend="onnxruntime",
+                onnx_export_dir=ONNX_EXPORT_DIR,
+                onnx_input_size=ONNX_INPUT_SIZE,
+                ort_intra_op_threads=ORT_INTRA_OP_THREADS,
+                ort_inter_op_threads=ORT_INTER_OP_THREADS,
+            )
+        return InferenceService(model_registry, visualization_service, metrics_service, execution_mode=mode, backend="torch")
+
+    image_catalog_service = ImageCatalogService(TEST_IMAGE_DIR)
+    image_catalog_service.refresh()
+    runner = ExecutionModeCheckService(
+        image_catalog_service=image_catalog_service,
+        inference_service_factory=inference_service_factory,
+        model_key=ADE20K_MODEL_KEY,
+    )
+    summary = runner.run(args.modes, limit=args.limit)
+    print(format_cli_report(summary))
+    return 0 if all("error" not in row for row in summary["modes"]) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
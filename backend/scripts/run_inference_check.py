@@ -2,7 +2,10 @@
 from __future__ import annotations
 
 import argparse
+import json
+import subprocess
 import sys
+import time
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -11,36 +14,177 @@ if str(ROOT) not in sys.path:
 
 from app.core.config import ADE20K_MODEL_KEY, RESULT_DIR, TEST_IMAGE_DIR
 from app.models.registry import ModelRegistry
-from app.services.dataset_inference_check_service import DatasetInferenceCheckService, format_cli_report
+from app.services.dataset_inference_check_service import (
+    DatasetInferenceCheckService,
+    compare_to_baseline,
+    format_cli_report,
+    load_checkpoint,
+    peak_rss_mb,
+    summarize,
+)
 from app.services.image_catalog_service import ImageCatalogService
 from app.services.inference_service import InferenceService
 from app.services.metrics_service import MetricsService
 from app.services.visualization_service import VisualizationService
 
+DEFAULT_CHECKPOINT = ROOT / "inference_check.jsonl"
+SHARD_LOG_TAIL_LINES = 50
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run inference check over local test images and print CLI report")
     parser.add_argument("--limit", type=int, default=None, help="Optional max number of images to run")
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=DEFAULT_CHECKPOINT,
+        help="JSONL file receiving one record per finished image",
+    )
+    parser.add_argument("--resume", action="store_true", help="Skip images already recorded as successful")
+    parser.add_argument("--prefetch", type=int, default=2, help="Decoder threads reading ahead of the model")
+    parser.add_argument("--shards", type=int, default=1, help="Split the catalog across this many processes")
+    parser.add_argument("--shard-index", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--json", type=Path, default=None, help="Also write the summary as JSON to this path")
+    parser.add_argument("--from-json", type=Path, default=None, help="Render a saved summary JSON instead of running")
+    parser.add_argument("--baseline", type=Path, default=None, help="Summary JSON to compare stage latencies against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1, help="Allowed relative slowdown before flagging a regression"
+    )
     return parser.parse_args()
 
 
+def shard_checkpoint(checkpoint: Path, index: int, count: int) -> Path:
+    return checkpoint.with_name(f"{checkpoint.stem}.shard{index}of{count}{checkpoint.suffix}")
+
+
+def load_shard_records(args: argparse.Namespace) -> dict[str, dict]:
+    records: dict[str, dict] = {}
+    for index in range(args.shards):
+        records.update(load_checkpoint(shard_checkpoint(args.checkpoint, index, args.shards), ADE20K_MODEL_KEY))
+    return records
+
+
+def run_shards(args: argparse.Namespace) -> dict:
+    resumed = 0
+    if args.resume:
+        resumed = sum(1 for record in load_shard_records(args).values() if record.get("status") == "ok")
+    start = time.perf_counter()
+    commands = []
+    for index in range(args.shards):
+        command = [
+            sys.executable,
+            str(Path(__file__).resolve()),
+            "--checkpoint",
+            str(args.checkpoint),
+            "--prefetch",
+            str(args.prefetch),
+            "--shards",
+            str(args.shards),
+            "--shard-index",
+            str(index),
+        ]
+        if args.limit is not None:
+            command += ["--limit", str(args.limit)]
+        if args.resume:
+            command.append("--resume")
+        commands.append(command)
+
+    # Each shard writes stderr to its own log file, so a chatty shard never blocks on a pipe nobody is reading.
+    log_paths = [
+        shard_checkpoint(args.checkpoint, index, args.shards).with_suffix(".log") for index in range(args.shards)
+    ]
+    args.checkpoint.parent.mkdir(parents=True, exist_ok=True)
+    processes = []
+    for command, log_path in zip(commands, log_paths):
+        with log_path.open("w") as log:
+            processes.append(subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=log))
+    failed_shards: list[int] = []
+    for index, (command, process, log_path) in enumerate(zip(commands, processes, log_paths)):
+        if process.wait() != 0:
+            failed_shards.append(index)
+            print(f"shard {index} exited with {process.returncode}: {' '.join(command)}", file=sys.stderr)
+            # The full log stays on disk; the tail is usually the traceback.
+            tail = log_path.read_text(errors="replace").splitlines()[-SHARD_LOG_TAIL_LINES:]
+            print(f"--- last {len(tail)} lines of {log_path} ---", file=sys.stderr)
+            print("\n".join(tail), file=sys.stderr)
+
+    catalog = ImageCatalogService(TEST_IMAGE_DIR)
+    catalog.refresh()
+    entries = catalog.list_images()
+    if args.limit is not None:
+        entries = entries[: args.limit]
+    records = load_shard_records(args)
+    image_ids = [str(entry["id"]) for entry in entries]
+    found = [records[image_id] for image_id in image_ids if image_id in records]
+    summary = summarize(
+        found,
+        total=len(image_ids),
+        wall_ms=(time.perf_counter() - start) * 1000,
+        processed=len(found) - resumed,
+        # Largest resident set among the shard processes.
+        peak_rss=peak_rss_mb(children=True),
+    )
+    summary["resumed"] = resumed
+    summary["missing"] = len(image_ids) - len(found)
+    summary["failed_shards"] = failed_shards
+    return summary
+
+
+def report(summary: dict, args: argparse.Namespace) -> int:
+    print(format_cli_report(summary))
+    if summary.get("missing"):
+        print(f"missing={summary['missing']} (a shard exited early; rerun with --resume)")
+    if args.json is not None:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    regressions: list[str] = []
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare_to_baseline(summary, baseline, tolerance=args.tolerance)
+        print("--- baseline ---")
+        print("\n".join(f"REGRESSION {line}" for line in regressions) or "no regressions")
+    if summary.get("failed_shards"):
+        print(f"failed_shards={','.join(map(str, summary['failed_shards']))}")
+    ok = summary["failed"] == 0 and not summary.get("missing") and not summary.get("failed_shards")
+    return 0 if ok and not regressions else 1
+
+
 def main() -> int:
     args = parse_args()
+    if args.from_json is not None:
+        return report(json.loads(args.from_json.read_text(encoding="utf-8")), args)
+    if args.shards > 1 and args.shard_index is None:
+        return report(run_shards(args), args)
+
+    checkpoint = args.checkpoint
+    if args.shard_index is not None:
+        checkpoint = shard_checkpoint(args.checkpoint, args.shard_index, args.shards)
 
     model_registry = ModelRegistry()
     visualization_service = VisualizationService(RESULT_DIR)
     metrics_service = MetricsService()
     inference_service = InferenceService(model_registry, visualization_service, metrics_service)
     image_catalog_service = ImageCatalogService(TEST_IMAGE_DIR)
+    image_catalog_service.refresh()
 
     runner = DatasetInferenceCheckService(
         image_catalog_service=image_catalog_service,
         inference_service=inference_service,
         model_key=ADE20K_MODEL_KEY,
+        prefetch_workers=args.prefetch,
+        checkpoint_path=checkpoint,
     )
-    summary = runner.run(limit=args.limit)
-    print(format_cli_report(summary))
-    return 0 if summary["failed"] == 0 else 1
+    summary = runner.run(
+        limit=args.limit,
+        resume=args.resume,
+        shard_index=args.shard_index or 0,
+        shard_count=args.shards,
+    )
+    if args.shard_index is not None:
+        # Per-image failures are in the checkpoint; a non-zero exit from a shard means it crashed.
+        return 0
+    return report(summary, args)
 
 
 if __name__ == "__main__":
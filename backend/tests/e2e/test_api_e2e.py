@@ -1,13 +1,47 @@
 import io
+import json
+import threading
+import time
+from collections import OrderedDict
 
+import pytest
 from fastapi.testclient import TestClient
 from PIL import Image
 
 import app.main as main
+from app.core.upload_limit import MULTIPART_OVERHEAD_BYTES
+from app.services.image_catalog_service import ImageCatalogService
+from app.services.inference_executor import InferenceExecutor
 
 client = TestClient(main.app)
 
 
+@pytest.fixture(autouse=True)
+def result_dir(monkeypatch, tmp_path):
+    # Uploads and rendered artifacts go to a per-test directory instead of app/static/results.
+    static_dir = tmp_path / "static"
+    result_dir = static_dir / "results"
+    cache_dir = result_dir / "cache"
+    cache_dir.mkdir(parents=True)
+    monkeypatch.setattr(main.visualization_service, "result_dir", result_dir)
+    monkeypatch.setattr(main.result_retention, "result_dir", result_dir)
+    monkeypatch.setattr(main.prediction_cache, "static_dir", static_dir)
+    monkeypatch.setattr(main.prediction_cache, "cache_dir", cache_dir)
+    monkeypatch.setattr(main.prediction_cache, "_memory", OrderedDict())
+    monkeypatch.setattr(main.prediction_cache, "_disk", OrderedDict())
+    return result_dir
+
+
+def _use_catalog(monkeypatch, image_dir, tmp_path):
+    # A throwaway index, so tests never touch the developer's CATALOG_INDEX_PATH.
+    catalog = ImageCatalogService(
+        image_dir, index_path=tmp_path / "idx.sqlite3", thumbnail_service=main.thumbnail_service
+    )
+    catalog.refresh()
+    monkeypatch.setattr(main, "test_image_service", catalog)
+    return catalog
+
+
 def _png_bytes(width=2, height=2):
     img = Image.new("RGB", (width, height), color=(128, 128, 128))
     buf = io.BytesIO()
@@ -48,14 +82,24 @@ def test_health_ok():
     assert res.json() == {"status": "ok"}
 
 
+def test_metrics_reports_cache_and_executor():
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert {"memory_hits", "disk_hits", "misses"} <= set(res.json()["prediction_cache"])
+    assert "in_flight" in res.json()["inference_executor"]
+
+
 def test_models_has_ade20k_official():
     res = client.get("/models")
     assert res.status_code == 200
     assert res.json()["models"][0]["model_key"] == "ade20k_official"
+    assert res.json()["models"][0]["backend"] in {"torch", "onnxruntime"}
 
 
 def test_predict_success_with_mocked_inference(monkeypatch):
-    monkeypatch.setattr(main.inference_service, "run_prediction", lambda image, model_key: _fake_predict_payload())
+    monkeypatch.setattr(
+        main.inference_service, "run_prediction", lambda image, model_key, **_: _fake_predict_payload()
+    )
 
     files = {"file": ("sample.png", _png_bytes(), "image/png")}
     data = {"model_key": "ade20k_official"}
@@ -65,6 +109,30 @@ def test_predict_success_with_mocked_inference(monkeypatch):
     body = res.json()
     assert body["model_key"] == "ade20k_official"
     assert body["top_classes"][0]["label"] == "wall"
+    assert body["decode_ms"] >= 0
+    assert body["ingest"]["format"] == "PNG"
+
+
+def test_predict_references_stored_upload_and_catalog_originals(monkeypatch, tmp_path, result_dir):
+    seen: list[str] = []
+
+    def fake_run_prediction(image, model_key, **kwargs):
+        seen.append(kwargs["original_url"])
+        return {**_fake_predict_payload(), "original_url": kwargs["original_url"]}
+
+    monkeypatch.setattr(main.inference_service, "run_prediction", fake_run_prediction)
+    raw = _png_bytes(5, 4)
+    res = client.post("/predict", files={"file": ("sample.png", raw, "image/png")})
+    assert res.status_code == 200
+    name = seen[0].rsplit("/", 1)[-1]
+    assert name == f"upload_{main.prediction_cache.content_hash(raw)[:16]}.png"
+    assert (result_dir / name).read_bytes() == raw
+
+    (tmp_path / "demo.png").write_bytes(_png_bytes(6, 4))
+    _use_catalog(monkeypatch, tmp_path, tmp_path)
+    res = client.post("/predict-by-id", json={"image_id": "demo.png"})
+    assert res.status_code == 200
+    assert seen[1] == "/static/test_images/demo.png"
 
 
 def test_predict_rejects_non_image_upload():
@@ -73,24 +141,70 @@ def test_predict_rejects_non_image_upload():
     assert res.status_code == 400
 
 
-def test_test_images_endpoint(monkeypatch):
-    monkeypatch.setattr(
-        main.test_image_service,
-        "list_images",
-        lambda: [
-            {
-                "id": "demo.png",
-                "name": "demo",
-                "thumbnail_url": "/x",
-                "image_url": "/x",
-                "tags": ["ade20k-real", "local"],
-            }
-        ],
-    )
+def test_predict_rejects_unknown_resolution_mode():
+    files = {"file": ("sample.png", _png_bytes(), "image/png")}
+    res = client.post("/predict", files=files, data={"model_key": "ade20k_official", "resolution_mode": "huge"})
+    assert res.status_code == 400
+
+    res = client.post("/predict", files=files, data={"model_key": "ade20k_official", "max_side": "8"})
+    assert res.status_code == 400
+
+
+def test_predict_rejects_images_over_pixel_limit(monkeypatch):
+    monkeypatch.setattr(main.image_ingest, "max_pixels", 4)
+    files = {"file": ("sample.png", _png_bytes(3, 3), "image/png")}
+    res = client.post("/predict", files=files, data={"model_key": "ade20k_official"})
+    assert res.status_code == 413
+
+
+def test_test_images_endpoint(monkeypatch, tmp_path):
+    for name, size in [("c.png", (8, 4)), ("a.png", (4, 4)), ("b.jpg", (16, 9))]:
+        Image.new("RGB", size).save(tmp_path / name)
+    _use_catalog(monkeypatch, tmp_path, tmp_path)
+
     res = client.get("/test-images")
     assert res.status_code == 200
-    assert res.json()["images"][0]["id"] == "demo.png"
-    assert res.json()["images"][0]["tags"] == ["ade20k-real", "local"]
+    body = res.json()
+    assert [image["id"] for image in body["images"]] == ["a.png", "b.jpg", "c.png"]
+    assert body["images"][0]["tags"] == ["ade20k-real", "local"]
+    assert (body["images"][1]["width"], body["images"][1]["height"]) == (16, 9)
+    assert body["next_cursor"] is None
+
+    first = client.get("/test-images", params={"limit": 2}).json()
+    assert [image["id"] for image in first["images"]] == ["a.png", "b.jpg"]
+    assert first["total"] == 3
+    second = client.get("/test-images", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert [image["id"] for image in second["images"]] == ["c.png"]
+    assert second["next_cursor"] is None
+
+    wide = client.get("/test-images", params={"min_width": 8, "q": "C"}).json()
+    assert [image["id"] for image in wide["images"]] == ["c.png"]
+    assert client.get("/test-images", params={"cursor": "%%%"}).status_code == 400
+
+
+def test_thumbnails_are_generated_on_demand_and_cached(monkeypatch, tmp_path):
+    images = tmp_path / "images"
+    images.mkdir()
+    Image.new("RGB", (1200, 600)).save(images / "wide.png")
+    _use_catalog(monkeypatch, images, tmp_path)
+    monkeypatch.setattr(main.thumbnail_service, "cache_dir", tmp_path / "thumbs")
+
+    entry = client.get("/test-images").json()["images"][0]
+    assert entry["image_url"] == "/static/test_images/wide.png"
+    assert entry["thumbnail_url"] == f"/thumbnails/320/{entry['sha256']}.webp"
+    assert set(entry["thumbnail_urls"]) == {"160", "320", "640"}
+
+    res = client.get(entry["thumbnail_url"])
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "image/webp"
+    assert res.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert Image.open(io.BytesIO(res.content)).size == (320, 160)
+    assert client.get(entry["thumbnail_url"], headers={"If-None-Match": res.headers["etag"]}).status_code == 304
+    assert client.get(entry["thumbnail_urls"]["160"]).status_code == 200
+    assert len(list((tmp_path / "thumbs").rglob("*.webp"))) == 2
+
+    assert client.get(f"/thumbnails/999/{entry['sha256']}.webp").status_code == 404
+    assert client.get(f"/thumbnails/320/{'0' * 64}.webp").status_code == 404
 
 
 def test_predict_by_id_not_found(monkeypatch):
@@ -107,11 +221,10 @@ def test_predict_by_id_not_found(monkeypatch):
 
 
 def test_describe_success(monkeypatch):
-    monkeypatch.setattr(
-        main.description_service,
-        "describe",
-        lambda payload: {"summary_ja": "ok", "highlights": ["h1"], "cautions": ["c1"]},
-    )
+    async def fake_describe(payload):
+        return {"summary_ja": "ok", "highlights": ["h1"], "cautions": ["c1"]}
+
+    monkeypatch.setattr(main.description_service, "describe", fake_describe)
     req = {
         "top_classes": [{"class_id": 0, "label": "wall", "confidence": 0.9}],
         "area_stats": [{"class_id": 0, "label": "wall", "area_ratio": 34.0}],
@@ -120,3 +233,269 @@ def test_describe_success(monkeypatch):
     res = client.post("/describe", json=req)
     assert res.status_code == 200
     assert res.json()["summary_ja"] == "ok"
+
+
+def test_predict_returns_503_with_retry_after_when_overloaded(monkeypatch):
+    def reject():
+        raise main.HTTPException(status_code=503, detail="Inference queue is full", headers={"Retry-After": "3"})
+
+    monkeypatch.setattr(main.inference_executor, "_admit", reject)
+
+    files = {"file": ("sample.png", _png_bytes(), "image/png")}
+    res = client.post("/predict", files=files, data={"model_key": "ade20k_official"})
+    assert res.status_code == 503
+    assert res.headers["retry-after"] == "3"
+
+
+def test_class_mask_rejects_unknown_label_map():
+    res = client.get("/class-masks/../secret.png/1")
+    assert res.status_code == 404
+    res = client.get("/class-masks/labels_0000000000.png/1")
+    assert res.status_code == 404
+
+
+def test_ready_reports_model_state(monkeypatch):
+    monkeypatch.setattr(main.model_warmup, "is_ready", lambda: False)
+    res = client.get("/ready")
+    assert res.status_code == 503
+    assert "ade20k_official" in res.json()["models"]
+
+    monkeypatch.setattr(main.model_warmup, "is_ready", lambda: True)
+    assert client.get("/ready").status_code == 200
+
+
+def test_result_artifact_returns_202_until_written(result_dir):
+    release = threading.Event()
+    path = result_dir / "overlay_e2epending.png"
+
+    def render():
+        release.wait(5)
+        return Image.new("RGB", (2, 2))
+
+    main.artifact_writer.submit(path, render, {"format": "PNG"})
+    try:
+        res = client.get("/static/results/overlay_e2epending.png?wait=false")
+        assert res.status_code == 202
+        assert res.headers["retry-after"] == "1"
+    finally:
+        release.set()
+
+    res = client.get("/static/results/overlay_e2epending.png")
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "image/png"
+    assert res.headers["cache-control"] == "public, max-age=31536000, immutable"
+    etag = res.headers["etag"]
+    assert not etag.startswith("W/")
+
+    cached = client.get("/static/results/overlay_e2epending.png", headers={"If-None-Match": f"W/{etag}, \"other\""})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+    assert client.get("/static/results/overlay_e2epending.png", headers={"If-None-Match": '"other"'}).status_code == 200
+    path.unlink()
+
+    assert client.get("/static/results/overlay_e2epending.png").status_code == 404
+    assert client.get("/static/results/..%2Fsecret.png").status_code == 404
+
+
+def test_json_responses_negotiate_compression(monkeypatch, tmp_path):
+    for index in range(40):
+        (tmp_path / f"image_{index:02d}.png").write_bytes(_png_bytes())
+    _use_catalog(monkeypatch, tmp_path, tmp_path)
+
+    plain = client.get("/test-images", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    res = client.get("/test-images", headers={"Accept-Encoding": "gzip;q=0.8, br;q=0"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in res.headers["vary"]
+    assert int(res.headers["content-length"]) < len(plain.content)
+    assert res.json() == plain.json()
+
+    small = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.json() == {"status": "ok"}
+
+
+def _stream_lines(res):
+    return [json.loads(line) for line in res.text.splitlines() if line]
+
+
+def test_predict_batch_streams_ndjson_per_item(monkeypatch, tmp_path):
+    monkeypatch.setattr(main.inference_service, "run_prediction", lambda image, model_key, **_: _fake_predict_payload())
+    (tmp_path / "demo.png").write_bytes(_png_bytes(7, 5))
+    _use_catalog(monkeypatch, tmp_path, tmp_path)
+
+    files = [
+        ("files", ("a.png", _png_bytes(7, 3), "image/png")),
+        ("files", ("b.txt", b"nope", "text/plain")),
+    ]
+    data = {"image_ids": ["demo.png", "missing.png"]}
+    res = client.post("/predict-batch", files=files, data=data)
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = _stream_lines(res)
+    results = sorted(lines[:-1], key=lambda line: line["index"])
+    assert [line["status"] for line in results] == [200, 400, 200, 404]
+    assert results[0]["source"] == {"filename": "a.png"}
+    assert results[2]["source"] == {"image_id": "demo.png"}
+    assert results[0]["result"]["top_classes"][0]["label"] == "wall"
+    assert lines[-1]["done"] is True
+    assert (lines[-1]["total"], lines[-1]["succeeded"], lines[-1]["failed"]) == (4, 2, 2)
+
+
+def test_predict_batch_supports_sse_and_validates_input(monkeypatch):
+    monkeypatch.setattr(main.inference_service, "run_prediction", lambda image, model_key, **_: _fake_predict_payload())
+
+    files = [("files", ("a.png", _png_bytes(9, 3), "image/png"))]
+    res = client.post("/predict-batch", files=files, headers={"accept": "text/event-stream"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    events = [block for block in res.text.split("\n\n") if block]
+    assert events[0].startswith("event: result\ndata: ")
+    assert events[-1].startswith("event: done\ndata: ")
+
+    assert client.post("/predict-batch", data={"model_key": "ade20k_official"}).status_code == 400
+    assert client.post("/predict-batch?format=xml", files=files).status_code == 400
+    too_many = {"image_ids": [f"{i}.png" for i in range(main.PREDICT_BATCH_MAX_ITEMS + 1)]}
+    assert client.post("/predict-batch", data=too_many).status_code == 400
+
+
+def _wait_for_job(job_id):
+    for _ in range(500):
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["finished_at"] is not None:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_jobs_submit_poll_and_stream_events(monkeypatch, tmp_path):
+    monkeypatch.setattr(main.inference_service, "run_prediction", lambda image, model_key, **_: _fake_predict_payload())
+    (tmp_path / "demo.png").write_bytes(_png_bytes(8, 6))
+    _use_catalog(monkeypatch, tmp_path, tmp_path)
+
+    res = client.post("/jobs", files={"file": ("a.png", _png_bytes(11, 3), "image/png")}, data={"priority": "3"})
+    assert res.status_code == 202
+    submitted = res.json()
+    assert submitted["status"] == "queued"
+    assert submitted["priority"] == 3
+    assert submitted["status_url"] == f"/jobs/{submitted['job_id']}"
+
+    job = _wait_for_job(submitted["job_id"])
+    assert job["status"] == "succeeded"
+    assert job["source"] == {"filename": "a.png"}
+    assert job["result"]["top_classes"][0]["label"] == "wall"
+
+    res = client.post("/jobs", data={"image_id": "demo.png"})
+    assert res.status_code == 202
+    events = client.get(f"{res.json()['events_url']}?format=ndjson")
+    lines = _stream_lines(events)
+    assert lines[-1]["status"] == "succeeded"
+    assert lines[-1]["result"]["model_key"] == "ade20k_official"
+    assert client.delete(f"/jobs/{res.json()['job_id']}").status_code == 409
+
+
+def test_jobs_wait_for_inference_executor_capacity(monkeypatch):
+    threads: list[str] = []
+
+    def fake_run_prediction(image, model_key, **_):
+        threads.append(threading.current_thread().name)
+        return _fake_predict_payload()
+
+    monkeypatch.setattr(main.inference_service, "run_prediction", fake_run_prediction)
+    executor = InferenceExecutor(max_workers=1, max_queue=0)
+    monkeypatch.setattr(main, "inference_executor", executor)
+    monkeypatch.setattr(main, "JOB_ADMISSION_POLL_SEC", 0.01)
+    release = threading.Event()
+    busy = executor.submit(release.wait)
+
+    try:
+        res = client.post("/jobs", files={"file": ("a.png", _png_bytes(9, 3), "image/png")})
+        assert res.status_code == 202
+        job_id = res.json()["job_id"]
+        # The only slot is taken, so the job waits instead of running inference on its own worker thread.
+        for _ in range(500):
+            if client.get(f"/jobs/{job_id}").json()["stage"] == "waiting":
+                break
+            time.sleep(0.01)
+        assert client.get(f"/jobs/{job_id}").json()["stage"] == "waiting"
+        assert threads == []
+    finally:
+        release.set()
+        busy.result()
+
+    job = _wait_for_job(job_id)
+    assert job["status"] == "succeeded"
+    assert threads and threads[0].startswith("inference")
+    executor.shutdown()
+
+
+def test_jobs_validate_input_and_unknown_ids():
+    assert client.post("/jobs", data={"model_key": "ade20k_official"}).status_code == 400
+    assert client.post("/jobs", data={"image_id": "missing.png"}).status_code == 404
+    assert client.post("/jobs", data={"image_id": "x.png", "resolution_mode": "bogus"}).status_code == 400
+    assert client.get("/jobs/nope").status_code == 404
+    assert client.delete("/jobs/nope").status_code == 404
+    assert "jobs" in client.get("/metrics").json()
+
+
+def test_predict_describe_streams_stats_artifacts_then_description(monkeypatch):
+    def fake_run_prediction(image, model_key, on_stats=None, **_):
+        payload = _fake_predict_payload()
+        if on_stats is not None:
+            on_stats({key: payload[key] for key in ("model_key", "top_classes", "area_stats", "inference_ms")})
+        return payload
+
+    described: list[dict] = []
+
+    async def fake_describe(payload):
+        described.append(payload.top_classes[0])
+        return {"summary_ja": "この空間は", "highlights": [], "cautions": []}
+
+    monkeypatch.setattr(main.inference_service, "run_prediction", fake_run_prediction)
+    monkeypatch.setattr(main.description_service, "describe", fake_describe)
+
+    res = client.post("/predict-describe", files={"file": ("a.png", _png_bytes(13, 3), "image/png")})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    stats, artifacts, description, done = _stream_lines(res)
+    assert stats["top_classes"][0]["label"] == "wall"
+    assert "overlay_url" not in stats
+    assert artifacts["overlay_url"] == "/static/results/overlay.png"
+    assert description == {"status": 200, "summary_ja": "この空間は", "highlights": [], "cautions": []}
+    assert described[0]["label"] == "wall"
+    assert done["done"] is True
+    assert done["stats_ms"] <= done["artifacts_ms"] <= done["description_ms"] <= done["total_ms"]
+
+    cached = client.post(
+        "/predict-describe?format=sse",
+        files={"file": ("a.png", _png_bytes(13, 3), "image/png")},
+        data={"describe": "false"},
+    )
+    events = [block.split("\n", 1)[0] for block in cached.text.split("\n\n") if block]
+    assert events == ["event: stats", "event: artifacts", "event: done"]
+
+
+def test_predict_describe_reports_errors():
+    assert client.post("/predict-describe", data={"image_id": "missing.png"}).status_code == 404
+    assert client.post("/predict-describe", data={"model_key": "ade20k_official"}).status_code == 400
+
+    res = client.post("/predict-describe", files={"file": ("bad.png", b"not an image", "image/png")})
+    assert res.status_code == 200
+    assert _stream_lines(res) == [{"status": 400, "detail": "Invalid image"}]
+
+
+def test_predict_describe_rejects_oversized_uploads_before_reading_them():
+    files = {"file": ("big.png", b"\0" * (main.INGEST_MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES + 1), "image/png")}
+    res = client.post("/predict-describe", files=files)
+    assert res.status_code == 413
+    assert res.json() == {"detail": "Request body too large"}
+
+
+def test_early_upload_rejection_carries_cors_headers():
+    files = {"file": ("big.png", b"\0" * (main.INGEST_MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES + 1), "image/png")}
+    res = client.post("/predict", files=files, headers={"Origin": "http://localhost:5173"})
+    assert res.status_code == 413
+    assert res.headers["access-control-allow-origin"] == "*"
@@ -1,6 +1,8 @@
 import os
+from collections import OrderedDict
 from pathlib import Path
 
+import pytest
 from fastapi.testclient import TestClient
 
 import app.main as main
@@ -10,40 +12,68 @@ os.environ.setdefault("HF_HUB_OFFLINE", "1")
 os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
 
 client = TestClient(main.app)
-RESULT_DIR = Path("app/static/results")
 
 
-def _result_files() -> set[str]:
-    return {p.name for p in RESULT_DIR.glob("*.png")}
+@pytest.fixture
+def result_dir(monkeypatch, tmp_path) -> Path:
+    # A fresh result directory and prediction cache, so every run renders and writes its artifacts again.
+    static_dir = tmp_path / "static"
+    result_dir = static_dir / "results"
+    cache_dir = result_dir / "cache"
+    cache_dir.mkdir(parents=True)
+    monkeypatch.setattr(main.visualization_service, "result_dir", result_dir)
+    monkeypatch.setattr(main.result_retention, "result_dir", result_dir)
+    monkeypatch.setattr(main.prediction_cache, "static_dir", static_dir)
+    monkeypatch.setattr(main.prediction_cache, "cache_dir", cache_dir)
+    monkeypatch.setattr(main.prediction_cache, "_memory", OrderedDict())
+    monkeypatch.setattr(main.prediction_cache, "_disk", OrderedDict())
+    return result_dir
 
 
-def test_predict_by_id_real_inference_and_artifact_save():
+def _result_files(result_dir: Path) -> set[str]:
+    return {p.name for p in result_dir.glob("*.png")}
+
+
+def test_predict_by_id_real_inference_and_artifact_save(result_dir):
+    # Without the lifespan the background refresh never starts; index the real catalog up front.
+    main.test_image_service.refresh()
     images_res = client.get("/test-images")
     assert images_res.status_code == 200
     images = images_res.json().get("images", [])
     assert len(images) >= 1
 
     image_id = images[0]["id"]
-    before_files = _result_files()
+    before_files = _result_files(result_dir)
 
     pred_res = client.post("/predict-by-id", json={"image_id": image_id})
     assert pred_res.status_code == 200
     body = pred_res.json()
 
+    assert body["cached"] is False
     assert body["inference_ms"] > 0
     assert len(body["labels"]) >= 1
     assert len(body["top_classes"]) >= 1
-    assert body["original_url"].startswith("/static/results/")
+    # Catalog originals are referenced in place; only rendered artifacts are written to results.
+    assert body["original_url"] == f"/static/test_images/{image_id}"
     assert body["overlay_url"].startswith("/static/results/")
     assert len(body["class_masks"]) >= 1
 
+    assert client.get(body["original_url"]).status_code == 200
+
     created_names: list[str] = []
-    created_names.append(body["original_url"].split("/")[-1])
     created_names.append(body["overlay_url"].split("/")[-1])
-    created_names.extend(mask["mask_url"].split("/")[-1] for mask in body["class_masks"])
+    if body.get("label_map_url"):
+        created_names.append(body["label_map_url"].split("/")[-1])
+        mask_res = client.get(body["class_masks"][0]["mask_url"])
+        assert mask_res.status_code == 200
+        assert mask_res.headers["content-type"] == "image/png"
+    else:
+        created_names.extend(mask["mask_url"].split("/")[-1] for mask in body["class_masks"])
 
     for name in created_names:
-        assert (RESULT_DIR / name).exists(), f"Expected saved artifact missing: {name}"
+        # Artifacts are written in the background; fetching waits for the writer.
+        assert client.get(f"/static/results/{name}").status_code == 200
+        assert (result_dir / name).exists(), f"Expected saved artifact missing: {name}"
 
-    after_files = _result_files()
+    after_files = _result_files(result_dir)
     assert len(after_files - before_files) >= 2
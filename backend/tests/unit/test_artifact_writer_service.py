@@ -0,0 +1,83 @@
+import os
+import threading
+from pathlib import Path
+
+from PIL import Image
+
+from app.services.artifact_writer_service import ArtifactWriterService
+
+PNG = {"format": "PNG"}
+
+
+def test_writer_persists_in_background_and_reports_pending(tmp_path: Path):
+    writer = ArtifactWriterService(max_workers=2)
+    release = threading.Event()
+    path = tmp_path / "overlay_a.png"
+
+    def render():
+        release.wait(5)
+        return Image.new("RGB", (4, 4))
+
+    writer.submit(path, render, PNG)
+    assert writer.is_pending(path)
+    assert not path.exists()
+    assert writer.wait(path, timeout=0.01) is False
+
+    release.set()
+    assert writer.wait(path, timeout=5) is True
+    assert path.is_file()
+    assert not writer.is_pending(path)
+    assert list(tmp_path.iterdir()) == [path]
+    assert writer.stats()["written"] == 1
+    writer.shutdown()
+
+
+def test_writer_failure_leaves_no_file(tmp_path: Path):
+    writer = ArtifactWriterService(max_workers=1)
+    path = tmp_path / "orig_b.png"
+
+    def render():
+        raise RuntimeError("boom")
+
+    writer.submit(path, render, PNG)
+    assert writer.wait(path, timeout=5) is False
+    writer.flush()
+    assert not path.exists()
+    assert list(tmp_path.iterdir()) == []
+    assert writer.stats()["failed"] == 1
+    writer.shutdown()
+
+
+def test_writer_without_workers_writes_inline(tmp_path: Path):
+    writer = ArtifactWriterService(max_workers=0)
+    path = tmp_path / "labels_c.png"
+
+    writer.submit(path, lambda: Image.new("L", (2, 2)), PNG)
+
+    assert path.is_file()
+    assert writer.wait(path) is True
+    assert writer.stats()["pending"] == 0
+
+
+def test_writer_reuses_existing_and_in_flight_artifacts(tmp_path: Path):
+    writer = ArtifactWriterService(max_workers=1)
+    release = threading.Event()
+    path = tmp_path / "overlay_0123456789abcdef.png"
+    renders = []
+
+    def render():
+        renders.append(1)
+        release.wait(5)
+        return Image.new("RGB", (2, 2))
+
+    first = writer.submit(path, render, PNG)
+    assert writer.submit(path, render, PNG) is first
+    release.set()
+    assert writer.wait(path, timeout=5) is True
+
+    os.utime(path, (1, 1))
+    assert writer.submit(path, render, PNG).result() == path
+    assert path.stat().st_mtime > 1
+    assert len(renders) == 1
+    assert writer.stats()["reused"] == 2
+    writer.shutdown()
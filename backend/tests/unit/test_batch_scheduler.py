@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from app.services.batch_scheduler import BatchScheduler
+
+
+def test_submissions_with_same_key_share_one_batch():
+    calls: list[tuple[str, list[int]]] = []
+    release = threading.Event()
+
+    def handler(key, payloads):
+        release.wait(timeout=5)
+        calls.append((key, list(payloads)))
+        return [value * 10 for value in payloads]
+
+    scheduler = BatchScheduler(handler, max_batch_size=3, max_wait_ms=500)
+    futures = [scheduler.submit("m", value) for value in (1, 2, 3)]
+    release.set()
+
+    results = [future.result(timeout=5) for future in futures]
+    scheduler.close()
+
+    assert calls == [("m", [1, 2, 3])]
+    assert [r.value for r in results] == [10, 20, 30]
+    assert all(r.batch_size == 3 for r in results)
+    assert all(r.queue_wait_ms >= 0 for r in results)
+
+
+def test_different_keys_are_not_mixed_and_errors_propagate():
+    def handler(key, payloads):
+        if key == "bad":
+            raise RuntimeError("boom")
+        return payloads
+
+    scheduler = BatchScheduler(handler, max_batch_size=4, max_wait_ms=20)
+    good = scheduler.submit("good", "x")
+    bad = scheduler.submit("bad", "y")
+
+    assert good.result(timeout=5).value == "x"
+    assert good.result(timeout=5).batch_size == 1
+    with pytest.raises(RuntimeError, match="boom"):
+        bad.result(timeout=5)
+    scheduler.close()
+
+
+def test_result_count_mismatch_fails_every_future():
+    scheduler = BatchScheduler(lambda key, payloads: payloads[1:], max_batch_size=2, max_wait_ms=200)
+    futures = [scheduler.submit("m", value) for value in (1, 2)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="results for"):
+            future.result(timeout=5)
+    scheduler.close()
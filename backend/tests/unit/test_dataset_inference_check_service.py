@@ -2,7 +2,12 @@ from pathlib import Path
 
 from PIL import Image
 
-from app.services.dataset_inference_check_service import DatasetInferenceCheckService, format_cli_report
+from app.services.dataset_inference_check_service import (
+    DatasetInferenceCheckService,
+    compare_to_baseline,
+    format_cli_report,
+    latency_stats,
+)
 
 
 class FakeImageCatalogService:
@@ -53,6 +58,65 @@ def test_run_collects_success_and_failures(tmp_path: Path):
     assert "boom" in summary["failures"][0]["error"]
 
 
+
+class RecordingInferenceService:
+    def __init__(self, fail_widths: set[int] | None = None):
+        self.fail_widths = fail_widths or set()
+        self.seen: list[tuple[int, int]] = []
+
+    def run_prediction(self, image, model_key: str):
+        self.seen.append(image.size)
+        if image.size[0] in self.fail_widths:
+            raise RuntimeError("boom")
+        return {
+            "inference_ms": 5.0,
+            "timings": {"forward_ms": float(image.size[0]), "overlay_ms": 1.0},
+            "top_classes": [{"label": "sky"}],
+            "labels": [{"class_id": 2, "label": "sky"}],
+        }
+
+
+def _catalog(tmp_path: Path, widths: list[int]) -> FakeImageCatalogService:
+    catalog = FakeImageCatalogService(tmp_path)
+    for width in widths:
+        Image.new("RGB", (width, 2)).save(tmp_path / f"{width}.png")
+    catalog.list_images = lambda: [{"id": f"{width}.png"} for width in widths]
+    return catalog
+
+
+def test_run_prefetches_in_order_and_resumes_from_checkpoint(tmp_path: Path):
+    catalog = _catalog(tmp_path, [3, 4, 5, 6, 7])
+    checkpoint = tmp_path / "check.jsonl"
+    first = RecordingInferenceService(fail_widths={5})
+    runner = DatasetInferenceCheckService(
+        catalog, first, "ade20k_official", prefetch_workers=2, checkpoint_path=checkpoint
+    )
+
+    summary = runner.run(limit=4)
+    assert [size[0] for size in first.seen] == [3, 4, 5, 6]
+    assert (summary["total"], summary["success"], summary["failed"]) == (4, 3, 1)
+    assert len(checkpoint.read_text().splitlines()) == 4
+
+    with checkpoint.open("a") as handle:
+        handle.write('{"image_id": "7.png", "sta')
+    second = RecordingInferenceService()
+    runner.inference_service = second
+    summary = runner.run(resume=True)
+
+    assert sorted(size[0] for size in second.seen) == [5, 7]
+    assert (summary["total"], summary["success"], summary["failed"], summary["resumed"]) == (5, 5, 0, 3)
+    assert [item["image_id"] for item in summary["results"]] == ["3.png", "4.png", "5.png", "6.png", "7.png"]
+
+
+def test_run_shards_catalog_without_prefetch(tmp_path: Path):
+    catalog = _catalog(tmp_path, [3, 4, 5, 6, 7])
+    service = RecordingInferenceService()
+    runner = DatasetInferenceCheckService(catalog, service, "ade20k_official", prefetch_workers=0)
+
+    summary = runner.run(shard_index=1, shard_count=2)
+    assert [item["image_id"] for item in summary["results"]] == ["4.png", "6.png"]
+    assert summary["total"] == 2
+
 def test_format_cli_report_contains_key_fields():
     report = format_cli_report(
         {
@@ -70,3 +134,35 @@ def test_format_cli_report_contains_key_fields():
     assert "Dataset Inference Check" in report
     assert "x.jpg" in report
     assert "top_label=wall" in report
+
+
+def test_run_reports_stage_percentiles_throughput_and_rss(tmp_path: Path):
+    runner = DatasetInferenceCheckService(_catalog(tmp_path, [3, 4, 5, 6, 7]), RecordingInferenceService(), "m")
+
+    summary = runner.run()
+    assert summary["stages"]["forward_ms"] == {"count": 5, "p50": 5.0, "p90": 7.0, "p99": 7.0, "max": 7.0}
+    assert {"decode_ms", "overlay_ms", "total_ms"} <= set(summary["stages"])
+    assert summary["throughput_ips"] > 0
+    assert summary["peak_rss_mb"] > 0
+    assert "forward_ms" in format_cli_report(summary)
+
+
+def test_latency_stats_and_baseline_comparison():
+    assert latency_stats(list(range(1, 101))) == {"count": 100, "p50": 50, "p90": 90, "p99": 99, "max": 100}
+    assert latency_stats([]) == {"count": 0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+
+    baseline = {
+        "stages": {"forward_ms": {"p50": 100.0, "p90": 120.0}, "stats_ms": {"p50": 0.2, "p90": 0.3}},
+        "throughput_ips": 2.0,
+        "peak_rss_mb": 1000.0,
+    }
+    current = {
+        "stages": {"forward_ms": {"p50": 105.0, "p90": 150.0}, "stats_ms": {"p50": 0.5, "p90": 0.6}},
+        "throughput_ips": 1.5,
+        "peak_rss_mb": 1050.0,
+    }
+    assert compare_to_baseline(current, baseline) == [
+        "forward_ms p90 120.0 -> 150.0",
+        "throughput_ips 2.0 -> 1.5",
+    ]
+    assert compare_to_baseline(baseline, baseline) == []
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi import HTTPException
+
+from app.schemas import DescribeRequest
+from app.services.description_service import DescriptionService, description_cache_key
+
+DESCRIPTION = {"summary_ja": "この空間は", "highlights": ["h"], "cautions": []}
+GEMINI_BODY = {"candidates": [{"content": {"parts": [{"text": json.dumps(DESCRIPTION)}]}}]}
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setenv("GEMINI_ENABLED", "true")
+    state = {"statuses": [], "requests": [], "delay": 0.0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            state["requests"].append((self.path, json.loads(body)))
+            threading.Event().wait(state["delay"])
+            status = state["statuses"].pop(0) if state["statuses"] else 200
+            payload = json.dumps(GEMINI_BODY if status == 200 else {"error": status}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state["endpoint"] = f"http://127.0.0.1:{server.server_port}/models/test:generateContent"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def _request(label="wall", ratio=34.0):
+    return DescribeRequest(
+        top_classes=[{"class_id": 0, "label": label, "confidence": 0.9}],
+        area_stats=[{"class_id": 0, "label": label, "area_ratio": ratio}],
+        inference_ms=10.0,
+    )
+
+
+def test_retries_transient_errors_then_caches_by_canonical_stats(stand_in):
+    service = DescriptionService(endpoint=stand_in["endpoint"], backoff_base_sec=0.01)
+    stand_in["statuses"] = [503, 429]
+
+    async def scenario():
+        first = await service.describe(_request())
+        reordered = DescribeRequest(
+            top_classes=[{"confidence": 0.9, "label": "wall", "class_id": 0}],
+            area_stats=[{"area_ratio": 34.0, "label": "wall", "class_id": 0}],
+            inference_ms=99.0,
+        )
+        second = await service.describe(reordered)
+        await service.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["summary_ja"] == "この空間は" and first["cached"] is False
+    assert second["cached"] is True
+    assert len(stand_in["requests"]) == 3
+    assert stand_in["requests"][0][0].endswith("?key=test-key")
+    assert service.stats()["retries"] == 2
+    assert service.stats()["cache_hits"] == 1
+
+
+def test_non_retryable_error_and_exhausted_retries_raise_502(stand_in):
+    service = DescriptionService(endpoint=stand_in["endpoint"], max_retries=1, backoff_base_sec=0.01)
+
+    async def attempt(request):
+        try:
+            await service.describe(request)
+        except HTTPException as exc:
+            return exc.status_code
+        finally:
+            await service.aclose()
+
+    stand_in["statuses"] = [400]
+    assert asyncio.run(attempt(_request("a"))) == 502
+    assert len(stand_in["requests"]) == 1
+
+    stand_in["statuses"] = [500, 500]
+    assert asyncio.run(attempt(_request("b"))) == 502
+    assert len(stand_in["requests"]) == 3
+    assert service.stats()["errors"] == 2
+    assert service.stats()["cache_entries"] == 0
+
+
+def test_concurrent_identical_requests_share_one_call(stand_in):
+    service = DescriptionService(endpoint=stand_in["endpoint"], max_concurrency=2)
+    stand_in["delay"] = 0.1
+
+    async def scenario():
+        results = await asyncio.gather(*(service.describe(_request()) for _ in range(5)))
+        await service.aclose()
+        return results
+
+    results = asyncio.run(scenario())
+    assert len(stand_in["requests"]) == 1
+    assert all(result["summary_ja"] == "この空間は" for result in results)
+    assert service.stats()["coalesced"] == 4
+
+
+def test_cache_expires_and_evicts_least_recently_used():
+    service = DescriptionService(endpoint="http://unused", cache_ttl_sec=60, cache_max_entries=2)
+    keys = [description_cache_key(_request(label)) for label in ("a", "b", "c")]
+
+    service._cache_put(keys[0], {"summary_ja": "a"})
+    service._cache_put(keys[1], {"summary_ja": "b"})
+    assert service._cache_get(keys[0]) == {"summary_ja": "a"}
+    service._cache_put(keys[2], {"summary_ja": "c"})
+    assert service._cache_get(keys[1]) is None
+    assert service._cache_get(keys[0]) is not None
+
+    expiring = DescriptionService(endpoint="http://unused", cache_ttl_sec=1e-9)
+    expiring._cache_put(keys[0], {"summary_ja": "a"})
+    assert expiring._cache_get(keys[0]) is None
+
+
+def test_pooled_client_is_tied_to_the_loop_that_opened_it(stand_in):
+    service = DescriptionService(endpoint=stand_in["endpoint"])
+
+    async def pooled():
+        await service.aopen()
+        client = service._client
+        await service.describe(_request("a"))
+        await service.describe(_request("b"))
+        assert service._client is client and not client.is_closed
+        await service.aclose()
+        return client
+
+    client = asyncio.run(pooled())
+    assert client.is_closed
+    assert service.stats()["pooled_client"] is False
+
+    # Without aopen (no lifespan) each call uses and closes its own client, so loop changes leak nothing.
+    asyncio.run(service.describe(_request("c")))
+    asyncio.run(service.describe(_request("d")))
+    assert service._client is None
+    assert len(stand_in["requests"]) == 4
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+
+from app.models import execution
+from app.models.execution import format_execution_mode, parse_execution_mode
+from app.services.execution_mode_check_service import ExecutionModeCheckService, format_cli_report
+from app.services.inference_service import SegmentationOutput
+from app.services.metrics_service import MetricsService
+
+
+class FakeImageCatalogService:
+    def __init__(self, root: Path):
+        self.root = root
+
+    def list_images(self):
+        return [{"id": "a.png"}, {"id": "b.png"}]
+
+    def resolve(self, image_id: str) -> Path:
+        return self.root / image_id
+
+
+class FakeInferenceService:
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.metrics_service = MetricsService()
+
+    def predict_batch(self, model_key, images):
+        seg = np.zeros((2, 2), dtype=np.int32)
+        if self.mode == "int8_dynamic":
+            seg[0, 0] = 1
+        confidence = torch.full((2, 2), 0.9)
+        return [SegmentationOutput(seg=seg, confidence=confidence, inference_ms=20.0 if self.mode == "fp32" else 10.0, id2label={})]
+
+
+def test_modes_are_compared_against_fp32(tmp_path: Path):
+    for name in ["a.png", "b.png"]:
+        Image.new("RGB", (2, 2)).save(tmp_path / name)
+
+    runner = ExecutionModeCheckService(FakeImageCatalogService(tmp_path), FakeInferenceService, "ade20k_official")
+    summary = runner.run(["int8_dynamic", "channels_last"])
+
+    rows = {row["mode"]: row for row in summary["modes"]}
+    assert [row["mode"] for row in summary["modes"]] == ["fp32", "int8_dynamic", "channels_last"]
+    assert rows["channels_last"]["pixel_agreement"] == 1.0
+    assert rows["int8_dynamic"]["pixel_agreement"] == 0.75
+    assert rows["int8_dynamic"]["max_area_delta"] == 25.0
+    assert rows["int8_dynamic"]["speedup"] == 2.0
+    assert "pixel_agreement=0.75" in format_cli_report(summary)
+
+
+def test_parse_execution_mode():
+    assert parse_execution_mode("fp32") == frozenset()
+    assert format_execution_mode(parse_execution_mode("channels_last+INT8_dynamic")) == "int8_dynamic+channels_last"
+    with pytest.raises(ValueError):
+        parse_execution_mode("fp8")
+    with pytest.raises(ValueError):
+        parse_execution_mode("int8_dynamic+bf16")
+
+
+def test_prepare_model_rejects_bf16_when_unsupported(monkeypatch):
+    monkeypatch.setattr(execution, "bf16_supported", lambda device: False)
+    with pytest.raises(ValueError, match="bf16"):
+        execution.prepare_model(torch.nn.Linear(2, 2), frozenset({"bf16"}), torch.device("cpu"))
+
+    monkeypatch.setattr(execution, "bf16_supported", lambda device: True)
+    assert not execution.prepare_model(torch.nn.Linear(2, 2), frozenset({"bf16"}), torch.device("cpu")).training
@@ -1,5 +1,12 @@
+import hashlib
+import os
+import time
 from pathlib import Path
 
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
 from app.services.image_catalog_service import ImageCatalogService
 
 
@@ -10,6 +17,7 @@ def test_list_images_filters_and_sorts(tmp_path: Path):
     (tmp_path / "ignore.txt").write_text("nope")
 
     service = ImageCatalogService(tmp_path)
+    service.refresh()
     images = service.list_images()
 
     assert [img["id"] for img in images] == ["a_first.jpg", "b_mid.png", "z_last.webp"]
@@ -17,6 +25,104 @@ def test_list_images_filters_and_sorts(tmp_path: Path):
 
 
 def test_resolve_returns_target_path(tmp_path: Path):
+    (tmp_path / "abc.jpg").write_bytes(b"x")
     service = ImageCatalogService(tmp_path)
+    service.refresh()
     resolved = service.resolve("abc.jpg")
     assert resolved == tmp_path / "abc.jpg"
+
+
+def test_resolve_rejects_unknown_and_traversal_ids(tmp_path: Path):
+    (tmp_path / "abc.jpg").write_bytes(b"x")
+    service = ImageCatalogService(tmp_path)
+    service.refresh()
+    for image_id in ("missing.jpg", "../abc.jpg", f"../{tmp_path.name}/abc.jpg"):
+        with pytest.raises(HTTPException) as exc:
+            service.resolve(image_id)
+        assert exc.value.status_code == 404
+
+
+def test_index_refreshes_incrementally_and_persists(tmp_path: Path):
+    images = tmp_path / "images"
+    images.mkdir()
+    Image.new("RGB", (6, 3)).save(images / "a.png")
+    Image.new("RGB", (2, 2)).save(images / "b.png")
+    index = tmp_path / "index.sqlite3"
+
+    service = ImageCatalogService(images, index_path=index)
+    service.refresh()
+    first = service.list_images()
+    assert [(img["id"], img["width"], img["height"]) for img in first] == [("a.png", 6, 3), ("b.png", 2, 2)]
+    assert first[0]["sha256"] == hashlib.sha256((images / "a.png").read_bytes()).hexdigest()
+    assert service.stats()["indexed"] == 2
+
+    service.refresh()
+    assert service.stats()["refreshes"] == 1
+
+    (images / "b.png").unlink()
+    Image.new("RGB", (5, 5)).save(images / "c.png")
+    os.utime(images, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+    # Reads never rescan the directory; only refresh() does.
+    assert [img["id"] for img in service.list_images()] == ["a.png", "b.png"]
+    service.refresh()
+    assert [img["id"] for img in service.list_images()] == ["a.png", "c.png"]
+    assert (service.stats()["indexed"], service.stats()["removed"]) == (3, 1)
+
+    reopened = ImageCatalogService(images, index_path=index)
+    reopened.refresh()
+    assert [img["id"] for img in reopened.list_images()] == ["a.png", "c.png"]
+    assert reopened.stats()["indexed"] == 0
+
+
+def test_list_page_paginates_with_cursor_and_filters(tmp_path: Path):
+    for index in range(5):
+        Image.new("RGB", (10 * (index + 1), 10)).save(tmp_path / f"img_{index}.png")
+    service = ImageCatalogService(tmp_path)
+    service.refresh()
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        page = service.list_page(limit=2, cursor=cursor)
+        seen += [img["id"] for img in page["images"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"img_{index}.png" for index in range(5)]
+
+    filtered = service.list_page(min_width=30, tag="local", q="IMG_")
+    assert [img["id"] for img in filtered["images"]] == ["img_2.png", "img_3.png", "img_4.png"]
+    assert filtered["total"] == 3
+    assert service.list_page(tag="missing")["images"] == []
+
+
+def test_background_refresh_picks_up_new_files(tmp_path: Path):
+    Image.new("RGB", (2, 2)).save(tmp_path / "a.png")
+    service = ImageCatalogService(tmp_path, refresh_interval_sec=0.1)
+    service.start()
+    try:
+        deadline = time.monotonic() + 5
+        while service.stats()["images"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        Image.new("RGB", (2, 2)).save(tmp_path / "b.png")
+        os.utime(tmp_path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+        while service.stats()["images"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        service.stop()
+    assert [img["id"] for img in service.list_images()] == ["a.png", "b.png"]
+
+
+def test_first_read_scans_an_unstarted_catalog(tmp_path: Path):
+    Image.new("RGB", (2, 2)).save(tmp_path / "a.png")
+    service = ImageCatalogService(tmp_path)
+    assert service.resolve("a.png") == tmp_path / "a.png"
+    assert service.list_page()["total"] == 1
+
+    started = ImageCatalogService(tmp_path, refresh_interval_sec=60)
+    started.start()
+    try:
+        # start() indexes synchronously, before the background thread's first tick.
+        assert started.stats()["images"] == 1
+    finally:
+        started.stop()
@@ -0,0 +1,120 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.core.upload_limit import MULTIPART_OVERHEAD_BYTES, UploadSizeLimitMiddleware
+from app.services.image_ingest_service import ImageIngestService
+
+
+def _encoded(size, fmt):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color=(10, 120, 200)).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def test_decode_uses_jpeg_draft_when_inference_side_is_smaller():
+    service = ImageIngestService(max_upload_bytes=0, max_pixels=0)
+
+    decoded = service.decode(_encoded((2000, 1000), "JPEG"), max_side=400)
+
+    assert decoded.draft is True
+    assert decoded.image.mode == "RGB"
+    assert decoded.image.size == (500, 250)
+    assert decoded.describe() == {
+        "format": "JPEG",
+        "source_width": 2000,
+        "source_height": 1000,
+        "draft": True,
+        "decoded_width": 500,
+        "decoded_height": 250,
+    }
+    assert decoded.decode_ms >= 0
+
+
+def test_decode_reports_the_displayed_source_size_for_rotated_jpegs():
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = io.BytesIO()
+    Image.new("RGB", (2000, 1000)).save(buffer, format="JPEG", exif=exif)
+
+    decoded = ImageIngestService(0, 0).decode(buffer.getvalue(), max_side=400)
+
+    assert decoded.draft is True
+    assert decoded.image.size == (250, 500)
+    assert decoded.source_size == (1000, 2000)
+
+
+def test_decode_keeps_full_size_for_png_and_small_jpeg():
+    service = ImageIngestService(max_upload_bytes=0, max_pixels=0)
+
+    assert service.decode(_encoded((800, 400), "PNG"), max_side=400).image.size == (800, 400)
+    assert service.decode(_encoded((300, 200), "JPEG"), max_side=400).draft is False
+    assert ImageIngestService(0, 0, jpeg_draft=False).decode(_encoded((800, 400), "JPEG"), 400).image.size == (800, 400)
+
+
+def test_decode_rejects_too_many_pixels_before_decoding():
+    service = ImageIngestService(max_upload_bytes=0, max_pixels=100 * 100)
+
+    with pytest.raises(HTTPException) as exc:
+        service.decode(_encoded((200, 100), "PNG"))
+    assert exc.value.status_code == 413
+
+
+def test_decode_rejects_invalid_bytes():
+    with pytest.raises(HTTPException) as exc:
+        ImageIngestService(0, 0).decode(b"not an image", invalid_detail="Invalid stored image")
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "Invalid stored image"
+
+
+def test_read_upload_enforces_byte_cap():
+    service = ImageIngestService(max_upload_bytes=10, max_pixels=0)
+
+    assert asyncio.run(service.read_upload(UploadFile(io.BytesIO(b"0123456789")))) == b"0123456789"
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(service.read_upload(UploadFile(io.BytesIO(b"0123456789A"))))
+    assert exc.value.status_code == 413
+
+
+def test_upload_size_limit_middleware_rejects_large_bodies():
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_body_bytes=1024, paths={"/upload"})
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)) -> dict:
+        return {"size": len(await file.read())}
+
+    client = TestClient(app)
+    small = client.post("/upload", files={"file": ("a.bin", b"x" * 1024, "application/octet-stream")})
+    assert small.status_code == 200
+
+    large = b"x" * (1024 + MULTIPART_OVERHEAD_BYTES + 1)
+    res = client.post("/upload", files={"file": ("a.bin", large, "application/octet-stream")})
+    assert res.status_code == 413
+
+    # Without Content-Length the cap is enforced while the body streams in.
+    request = client.build_request("POST", "/upload", files={"file": ("a.bin", large, "application/octet-stream")})
+    body = request.read()
+    chunked = client.post(
+        "/upload",
+        content=iter([body[:50_000], body[50_000:]]),
+        headers={"content-type": request.headers["content-type"]},
+    )
+    assert chunked.status_code == 413
+
+
+def test_decode_applies_exif_orientation():
+    image = Image.new("RGB", (40, 20), color=(200, 10, 10))
+    exif = image.getexif()
+    exif[0x0112] = 6  # rotate 90 degrees clockwise on display
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", exif=exif.tobytes())
+
+    decoded = ImageIngestService(0, 0).decode(buffer.getvalue())
+
+    assert decoded.image.size == (20, 40)
+    assert decoded.format == "JPEG"
@@ -0,0 +1,37 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.inference_executor import InferenceExecutor
+
+
+def test_rejects_with_retry_after_when_queue_is_full():
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    running = executor.submit(release.wait, 5)
+    queued = executor.submit(lambda: "queued")
+
+    with pytest.raises(HTTPException) as exc_info:
+        executor.submit(lambda: "rejected")
+
+    assert exc_info.value.status_code == 503
+    assert int(exc_info.value.headers["Retry-After"]) >= 1
+
+    release.set()
+    assert running.result(timeout=5) is True
+    assert queued.result(timeout=5) == "queued"
+    assert executor.stats()["in_flight"] == 0
+    executor.shutdown()
+
+
+def test_run_awaits_result_off_the_event_loop():
+    executor = InferenceExecutor(max_workers=2, max_queue=0)
+    loop_thread = threading.get_ident()
+
+    result = asyncio.run(executor.run(threading.get_ident))
+
+    assert result != loop_thread
+    executor.shutdown()
@@ -0,0 +1,122 @@
+import numpy as np
+import torch
+import torch.nn.functional as F
+from PIL import Image
+
+from app.models.registry import ModelRegistry
+from app.models.resolution import ResolutionPolicy
+from app.services.inference_service import InferenceService
+from app.services.metrics_service import MetricsService
+from app.services.visualization_service import VisualizationService
+
+COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+
+
+class FakeProcessor:
+    size: dict = {}
+
+    def __call__(self, images, return_tensors="pt", do_resize=True):
+        assert do_resize is False
+        pixel_values = torch.stack(
+            [torch.from_numpy(np.asarray(image, dtype=np.float32) / 255).permute(2, 0, 1) for image in images]
+        )
+        return {"pixel_values": pixel_values}
+
+
+class FakeModel(torch.nn.Module):
+    # One query per RGB channel; query q always predicts class q, and its mask is the channel intensity.
+    def __init__(self):
+        super().__init__()
+        self.config = type("Config", (), {"id2label": {0: "red", 1: "green", 2: "blue"}})()
+
+    def forward(self, pixel_values, **_):
+        batch_size = pixel_values.shape[0]
+        class_logits = torch.full((batch_size, 3, 4), -10.0)
+        class_logits[:, torch.arange(3), torch.arange(3)] = 10.0
+        mask_logits = F.avg_pool2d(pixel_values * 20 - 10, kernel_size=4)
+        return type("Outputs", (), {"class_queries_logits": class_logits, "masks_queries_logits": mask_logits})()
+
+
+def _service(tmp_path, max_batch_size=2):
+    service = InferenceService(
+        ModelRegistry(), VisualizationService(tmp_path), MetricsService(), max_batch_size=max_batch_size
+    )
+    service.model_pool.loader = lambda _: (FakeProcessor(), FakeModel(), torch.device("cpu"))
+    return service
+
+
+def _striped_image(width, height):
+    arr = np.zeros((height, width, 3), dtype=np.uint8)
+    bands = np.arange(width) * 3 // width
+    for index, color in enumerate(COLORS):
+        arr[:, bands == index] = color
+    return Image.fromarray(arr), bands
+
+
+def test_predict_batch_downscales_and_upsamples_to_original_size(tmp_path):
+    image, bands = _striped_image(960, 240)
+    service = _service(tmp_path)
+
+    output = service.predict_batch("ade20k_official", [image], ResolutionPolicy("resize", max_side=480))[0]
+
+    assert output.seg.shape == (240, 960)
+    assert output.resolution == {"mode": "resize", "max_side": 480, "inference_width": 480, "inference_height": 120}
+    assert (output.seg == bands[None, :]).mean() > 0.97
+
+
+def test_predict_tiled_stitches_overlapping_tiles(tmp_path):
+    image, bands = _striped_image(900, 300)
+    service = _service(tmp_path)
+    policy = ResolutionPolicy("tiled", max_side=900, tile_size=256, tile_overlap=64)
+
+    output = service.predict_tiled("ade20k_official", image, policy)
+
+    assert output.seg.shape == (300, 900)
+    assert output.resolution["tiles"] == 5 * 2
+    assert output.resolution["inference_width"] == 900
+    assert (output.seg == bands[None, :]).mean() > 0.97
+    assert output.confidence.shape == (300, 900)
+
+
+def test_run_prediction_records_resolution_policy(tmp_path):
+    image, _ = _striped_image(400, 200)
+    service = _service(tmp_path)
+
+    try:
+        result = service.run_prediction(image, "ade20k_official", ResolutionPolicy("tiled", 400, 256, 64))
+    finally:
+        service.batch_scheduler.close()
+
+    assert result["resolution"]["mode"] == "tiled"
+    assert result["resolution"]["tiles"] == 2
+    assert (result["width"], result["height"]) == (400, 200)
+    assert {row["label"] for row in result["labels"]} == {"red", "green", "blue"}
+    assert set(result["timings"]) == {
+        "preprocess_ms",
+        "forward_ms",
+        "postprocess_ms",
+        "stats_ms",
+        "overlay_ms",
+        "artifacts_ms",
+    }
+    assert all(value >= 0 for value in result["timings"].values())
+
+
+def test_run_prediction_upsamples_draft_decoded_images_to_the_source_size(tmp_path):
+    image, bands = _striped_image(300, 100)
+    service = _service(tmp_path)
+
+    try:
+        result = service.run_prediction(
+            image, "ade20k_official", ResolutionPolicy("resize", max_side=300), output_size=(600, 200)
+        )
+    finally:
+        service.batch_scheduler.close()
+    service.visualization_service.artifact_writer.flush()
+
+    assert (result["width"], result["height"]) == (600, 200)
+    with Image.open(tmp_path / result["overlay_url"].rsplit("/", 1)[-1]) as overlay:
+        assert overlay.size == (600, 200)
+    with Image.open(tmp_path / result["label_map_url"].rsplit("/", 1)[-1]) as label_map:
+        assert label_map.size == (600, 200)
+        assert (np.asarray(label_map) == np.repeat(bands, 2)[None, :]).mean() > 0.97
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.job_queue_service import JobQueueService
+
+
+def _wait_finished(queue: JobQueueService, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["finished_at"] is not None:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_jobs_run_by_priority_and_report_results():
+    queue = JobQueueService(max_workers=1)
+    gate = threading.Event()
+    order: list[str] = []
+
+    def task(name):
+        def run(ctx):
+            ctx.report("working")
+            order.append(name)
+            return {"name": name}
+
+        return run
+
+    blocker = queue.submit(lambda ctx: gate.wait(5))
+    low = queue.submit(task("low"), priority=0)
+    high = queue.submit(task("high"), priority=5)
+    assert low["status"] == "queued"
+
+    gate.set()
+    done = _wait_finished(queue, low["job_id"])
+    _wait_finished(queue, blocker["job_id"])
+
+    assert order == ["high", "low"]
+    assert done["status"] == "succeeded"
+    assert done["result"] == {"name": "low"}
+    assert done["queue_wait_ms"] >= 0 and done["run_ms"] >= 0
+    assert queue.get(high["job_id"])["result"] == {"name": "high"}
+    assert queue.stats()["succeeded"] == 3
+    queue.shutdown()
+
+
+def test_cancel_queued_and_running_jobs():
+    queue = JobQueueService(max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+    ran: list[str] = []
+
+    def slow(ctx):
+        started.set()
+        release.wait(5)
+        ctx.report("after-wait")
+        ran.append("slow")
+
+    running = queue.submit(slow)
+    started.wait(5)
+    queued = queue.submit(lambda ctx: ran.append("queued"))
+
+    assert queue.cancel(queued["job_id"])["status"] == "cancelled"
+    assert queue.cancel(running["job_id"])["status"] == "running"
+    release.set()
+
+    assert _wait_finished(queue, running["job_id"])["status"] == "cancelled"
+    assert ran == []
+    with pytest.raises(HTTPException) as exc:
+        queue.cancel(running["job_id"])
+    assert exc.value.status_code == 409
+    queue.shutdown()
+
+
+def test_failures_capacity_and_retention():
+    queue = JobQueueService(max_workers=1, max_queued=1, retention_sec=0.05)
+
+    def fail(ctx):
+        raise HTTPException(status_code=404, detail="Unknown image_id: x")
+
+    failed = _wait_finished(queue, queue.submit(fail)["job_id"])
+    assert failed["status"] == "failed"
+    assert failed["error"] == {"status": 404, "detail": "Unknown image_id: x"}
+
+    gate = threading.Event()
+    queue.submit(lambda ctx: gate.wait(5))
+    while queue.stats()["jobs"].get("running") != 1:
+        time.sleep(0.01)
+    queue.submit(lambda ctx: None)
+    with pytest.raises(HTTPException) as exc:
+        queue.submit(lambda ctx: None)
+    assert exc.value.status_code == 503
+    gate.set()
+
+    time.sleep(0.1)
+    with pytest.raises(HTTPException) as exc:
+        queue.get(failed["job_id"])
+    assert exc.value.status_code == 404
+    assert queue.stats()["expired"] >= 1
+    queue.shutdown()
@@ -1,5 +1,9 @@
+from types import SimpleNamespace
+
 import numpy as np
 import torch
+import torch.nn.functional as F
+from transformers import Mask2FormerImageProcessor
 
 from app.services.metrics_service import MetricsService
 
@@ -13,15 +17,6 @@ class FakeOutputs:
         )
 
 
-def test_semantic_probabilities_shape_and_normalization():
-    service = MetricsService()
-    probs = service.semantic_probabilities(FakeOutputs(), (2, 2))
-
-    assert probs.shape == (3, 2, 2)
-    per_pixel_sum = probs.sum(dim=0)
-    assert torch.allclose(per_pixel_sum, torch.ones_like(per_pixel_sum), atol=1e-5)
-
-
 def test_class_stats_returns_sorted_lists():
     service = MetricsService()
     seg = np.array([[0, 1], [1, 2]], dtype=np.int32)
@@ -39,3 +34,55 @@ def test_class_stats_returns_sorted_lists():
     assert top_classes[0]["label"] in {"wall", "floor", "door"}
     assert area_stats[0]["label"] == "floor"
     assert area_stats[0]["area_ratio"] == 50.0
+
+
+def test_class_stats_matches_per_class_mean():
+    rng = np.random.default_rng(0)
+    seg = rng.choice([1, 4, 7], size=(6, 5)).astype(np.int32)
+    semantic_probs = torch.softmax(torch.from_numpy(rng.normal(size=(8, 6, 5)).astype(np.float32)), dim=0)
+
+    top_classes, area_stats = MetricsService.class_stats(seg, semantic_probs, {})
+
+    for row in top_classes:
+        mask = torch.from_numpy(seg == row["class_id"])
+        assert row["confidence"] == round(float(semantic_probs[row["class_id"]][mask].mean()), 4)
+    for row in area_stats:
+        assert row["area_ratio"] == round(float((seg == row["class_id"]).mean() * 100.0), 2)
+    assert {row["class_id"] for row in area_stats} == {1, 4, 7}
+
+
+def test_semantic_segmentation_matches_full_resolution_argmax():
+    outputs = FakeOutputs()
+    semantic = MetricsService.semantic_logits(outputs)
+    full = torch.nn.functional.interpolate(semantic.unsqueeze(0), size=(5, 7), mode="bilinear", align_corners=False)[0]
+
+    seg, confidence = MetricsService.semantic_segmentation(outputs, (5, 7), chunk_bytes=1)
+
+    assert seg.shape == (5, 7)
+    assert np.array_equal(seg, full.argmax(dim=0).numpy())
+    assert torch.allclose(confidence, torch.softmax(full, dim=0).max(dim=0).values, atol=1e-6)
+
+
+def test_semantic_segmentation_stays_within_tolerance_of_the_processor_pipeline():
+    processor = Mask2FormerImageProcessor()
+    target = (120, 160)
+    for seed in range(3):
+        generator = torch.Generator().manual_seed(seed)
+        # Smooth mask logits at 1/4 of the input size, like the model's mask head produces.
+        coarse = torch.randn(1, 8, 6, 8, generator=generator) * 4
+        outputs = SimpleNamespace(
+            class_queries_logits=torch.randn(1, 8, 11, generator=generator) * 2,
+            masks_queries_logits=F.interpolate(coarse, size=(96, 128), mode="bilinear", align_corners=False),
+        )
+
+        # Previous pipeline: processor labels, confidence from a softmax over native-resolution scores.
+        labels = processor.post_process_semantic_segmentation(outputs, target_sizes=[target])[0].numpy()
+        class_probs = torch.softmax(outputs.class_queries_logits[0], dim=-1)[:, :-1]
+        scores = torch.einsum("qc,qhw->chw", class_probs, torch.sigmoid(outputs.masks_queries_logits[0]))
+        scores = F.interpolate(scores.unsqueeze(0), size=target, mode="bilinear", align_corners=False)[0]
+        previous_confidence = torch.softmax(scores, dim=0).max(dim=0).values
+
+        seg, confidence = MetricsService.semantic_segmentation(outputs, target)
+
+        assert (seg == labels).mean() == 1.0
+        assert float((confidence - previous_confidence).abs().max()) < 5e-3
@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+import torch
+
+from app.services.model_pool import ModelPool, estimate_module_bytes
+
+
+def test_concurrent_callers_share_one_load():
+    calls: list[str] = []
+
+    def loader(key):
+        calls.append(key)
+        time.sleep(0.05)
+        return f"model-{key}"
+
+    pool = ModelPool(loader, size_of=lambda value: 1)
+    results: list[str] = []
+    threads = [threading.Thread(target=lambda: results.append(pool.get("m"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["m"]
+    assert results == ["model-m"] * 4
+    stats = pool.stats()
+    assert stats["loads"] == 1
+    assert stats["hits"] + stats["shared_loads"] == 3
+
+
+def test_least_recently_used_model_is_evicted_over_budget():
+    pool = ModelPool(lambda key: key, size_of=lambda value: 400, memory_budget_bytes=1000)
+    pool.get("a")
+    pool.get("b")
+    pool.get("a")
+    pool.get("c")
+
+    stats = pool.stats()
+    assert [row["model_key"] for row in stats["resident"]] == ["a", "c"]
+    assert stats["evictions"] == 1
+    assert [e["event"] for e in stats["events"]] == ["loaded", "loaded", "loaded", "evicted"]
+    assert stats["events"][-1]["model_key"] == "b"
+
+
+def test_failed_load_is_reported_and_retried():
+    attempts: list[int] = []
+
+    def loader(key):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("offline")
+        return key
+
+    pool = ModelPool(loader, size_of=lambda value: 0)
+    with pytest.raises(RuntimeError, match="offline"):
+        pool.get("m")
+    assert pool.get("m") == "m"
+    assert pool.stats()["load_failures"] == 1
+
+
+def test_estimate_module_bytes_counts_parameters_and_buffers():
+    module = torch.nn.BatchNorm1d(4)
+    expected = sum(t.numel() * t.element_size() for t in list(module.parameters()) + list(module.buffers()))
+    assert estimate_module_bytes(module) == expected
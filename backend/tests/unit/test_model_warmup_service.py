@@ -0,0 +1,41 @@
+from app.services.model_warmup_service import ModelWarmupService
+
+
+class FakeInferenceService:
+    def __init__(self, broken: set[str]):
+        self.broken = broken
+        self.forward_sizes: list[tuple[str, tuple[int, int]]] = []
+
+    def load_model(self, model_key: str):
+        if model_key in self.broken:
+            raise RuntimeError(f"cannot load {model_key}")
+
+    def predict_batch(self, model_key: str, images):
+        self.forward_sizes.extend((model_key, image.size) for image in images)
+        return []
+
+
+def test_warm_up_records_load_and_latency_per_model():
+    inference = FakeInferenceService(broken=set())
+    warmup = ModelWarmupService(inference, ["m1"], warmup_runs=2, warmup_sizes=[(64, 48), (32, 32)])
+
+    assert warmup.is_ready() is False
+    warmup.run()
+
+    status = warmup.status()["m1"]
+    assert warmup.is_ready() is True
+    assert status["state"] == "ready"
+    assert status["load_ms"] >= 0
+    assert [row["size"] for row in status["warmup_ms"]] == ["64x48", "64x48", "32x32", "32x32"]
+    assert inference.forward_sizes == [("m1", (64, 48))] * 2 + [("m1", (32, 32))] * 2
+
+
+def test_failed_load_keeps_service_not_ready():
+    warmup = ModelWarmupService(FakeInferenceService(broken={"bad"}), ["good", "bad"], warmup_runs=0)
+    warmup.run()
+
+    status = warmup.status()
+    assert status["good"]["state"] == "ready"
+    assert status["bad"]["state"] == "failed"
+    assert "cannot load bad" in status["bad"]["error"]
+    assert warmup.is_ready() is False
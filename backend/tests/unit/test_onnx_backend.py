@@ -0,0 +1,109 @@
+from pathlib import Path
+
+import pytest
+import torch
+
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from transformers import Mask2FormerConfig, Mask2FormerForUniversalSegmentation, SwinConfig  # noqa: E402
+
+from app.models.onnx_backend import OnnxRuntimeModel, export_onnx, onnx_artifact_path  # noqa: E402
+from app.services.metrics_service import MetricsService  # noqa: E402
+
+
+def _tiny_model() -> Mask2FormerForUniversalSegmentation:
+    torch.manual_seed(0)
+    backbone = SwinConfig(
+        embed_dim=24,
+        depths=[1, 1, 1, 1],
+        num_heads=[1, 1, 2, 2],
+        out_features=["stage1", "stage2", "stage3", "stage4"],
+    )
+    config = Mask2FormerConfig(
+        backbone_config=backbone,
+        num_labels=150,
+        num_queries=20,
+        hidden_dim=32,
+        mask_feature_size=32,
+        feature_size=32,
+        encoder_layers=1,
+        decoder_layers=2,
+        encoder_feedforward_dim=64,
+        dim_feedforward=64,
+        num_attention_heads=2,
+        common_stride=4,
+    )
+    model = Mask2FormerForUniversalSegmentation(config).eval()
+    # Random-init mask logits sit right at the decoder's sigmoid(x) < 0.5 attention-mask threshold, where
+    # float reduction order alone flips mask bits; scaling the mask head keeps the comparison meaningful.
+    with torch.no_grad():
+        for layer in model.model.transformer_module.decoder.mask_predictor.mask_embedder.modules():
+            if isinstance(layer, torch.nn.Linear):
+                layer.weight.mul_(10.0)
+    return model
+
+
+def test_onnx_artifact_path_is_filesystem_safe(tmp_path: Path):
+    path = onnx_artifact_path(tmp_path, "facebook/mask2former-swin-large-ade-semantic")
+
+    assert path.parent == tmp_path
+    assert "/" not in path.name
+    assert path.name.startswith("facebook--mask2former-swin-large-ade-semantic.1024x1024.opset")
+    assert onnx_artifact_path(tmp_path, "facebook/mask2former-swin-large-ade-semantic", (640, 480)) != path
+    assert path.suffix == ".onnx"
+
+
+def test_onnxruntime_backend_matches_eager_model(tmp_path: Path):
+    model = _tiny_model()
+    onnx_path = export_onnx(model, tmp_path / "tiny.onnx", input_size=(160, 128))
+    backend = OnnxRuntimeModel(onnx_path, model.config, intra_op_threads=1, inter_op_threads=1)
+    assert backend.input_size == (160, 128)
+
+    # Different batch size from the export sample to exercise the dynamic batch axis.
+    torch.manual_seed(1)
+    pixel_values = torch.randn(2, 3, 128, 160)
+    with torch.inference_mode():
+        eager = model(pixel_values=pixel_values)
+    exported = backend(pixel_values=pixel_values, pixel_mask=torch.ones(2, 128, 160, dtype=torch.long))
+
+    assert exported.class_queries_logits.shape == eager.class_queries_logits.shape
+    assert exported.masks_queries_logits.shape == eager.masks_queries_logits.shape
+    assert torch.allclose(exported.class_queries_logits, eager.class_queries_logits, atol=1e-2)
+    assert torch.allclose(exported.masks_queries_logits, eager.masks_queries_logits, atol=5e-2)
+
+    metrics = MetricsService()
+    eager_seg, _ = metrics.semantic_segmentation(eager, (128, 160))
+    exported_seg, _ = metrics.semantic_segmentation(exported, (128, 160))
+    assert (eager_seg == exported_seg).mean() > 0.99
+    assert backend.memory_bytes == onnx_path.stat().st_size
+
+
+def test_onnxruntime_backend_pads_inputs_to_the_export_size(tmp_path: Path):
+    model = _tiny_model()
+    onnx_path = export_onnx(model, tmp_path / "tiny.onnx", input_size=(160, 128))
+    backend = OnnxRuntimeModel(onnx_path, model.config, intra_op_threads=1, inter_op_threads=1)
+
+    # Neither side is a multiple of 32, so Swin would take padding branches the trace never saw.
+    torch.manual_seed(1)
+    pixel_values = torch.randn(1, 3, 100, 150)
+    padded = torch.nn.functional.pad(pixel_values, (0, 10, 0, 28))
+    with torch.inference_mode():
+        eager = model(pixel_values=pixel_values)
+        eager_padded = model(pixel_values=padded)
+    exported = backend(pixel_values=pixel_values)
+
+    # Same mask geometry as running the eager model on the unpadded input...
+    assert exported.masks_queries_logits.shape == eager.masks_queries_logits.shape == (1, 20, 25, 38)
+    # ...and the same values as the eager model on the input padded the way the backend pads it.
+    assert torch.allclose(exported.class_queries_logits, eager_padded.class_queries_logits, atol=5e-3)
+    assert torch.allclose(exported.masks_queries_logits, eager_padded.masks_queries_logits[..., :25, :38], atol=1e-2)
+
+    metrics = MetricsService()
+    eager_seg, _ = metrics.semantic_segmentation(eager_padded, (128, 160))
+    exported_seg, _ = metrics.semantic_segmentation(exported, (100, 150))
+    assert (eager_seg[:100, :150] == exported_seg).mean() > 0.99
+
+    # Inputs larger than the export size are downscaled to fit instead of failing in ONNX Runtime.
+    larger = backend(pixel_values=torch.randn(1, 3, 256, 200))
+    assert larger.masks_queries_logits.shape == (1, 20, 32, 25)
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from app.services.prediction_cache_service import PredictionCacheService
+
+
+def _response(static_dir: Path, name: str) -> dict:
+    results = static_dir / "results"
+    results.mkdir(parents=True, exist_ok=True)
+    for prefix in ("orig", "overlay"):
+        (results / f"{prefix}_{name}.png").write_bytes(b"png")
+    return {
+        "original_url": f"/static/results/orig_{name}.png",
+        "overlay_url": f"/static/results/overlay_{name}.png",
+        "class_masks": [],
+    }
+
+
+def test_memory_and_disk_tiers_with_lru_eviction(tmp_path: Path):
+    cache_dir = tmp_path / "static" / "results" / "cache"
+    cache = PredictionCacheService(cache_dir, tmp_path / "static", version="v1", max_memory_entries=1, max_disk_entries=2)
+    key_a = cache.key_for(b"image-a", "m")
+    key_b = cache.key_for(b"image-b", "m")
+
+    assert key_a != cache.key_for(b"image-a", "other")
+    assert cache.get(key_a) is None
+
+    cache.put(key_a, _response(tmp_path / "static", "a"))
+    cache.put(key_b, _response(tmp_path / "static", "b"))
+    assert cache.get(key_b)["cached"] is True
+    assert cache.get(key_a)["original_url"].endswith("orig_a.png")
+
+    reloaded = PredictionCacheService(cache_dir, tmp_path / "static", version="v1", max_memory_entries=1, max_disk_entries=2)
+    assert reloaded.get(key_a) is not None
+    assert reloaded.stats()["disk_hits"] == 1
+
+    key_c = cache.key_for(b"image-c", "m")
+    cache.put(key_c, _response(tmp_path / "static", "c"))
+    stats = cache.stats()
+    assert stats["memory_entries"] == 1
+    assert stats["disk_entries"] == 2
+    assert stats["evictions"] >= 2
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_entries_with_missing_artifacts_are_stale(tmp_path: Path):
+    static_dir = tmp_path / "static"
+    cache = PredictionCacheService(static_dir / "results" / "cache", static_dir, version="v1")
+    key = cache.key_for(b"image", "m")
+
+    cache.put(key, {"original_url": "/static/results/missing.png", "class_masks": []})
+    assert cache.stats()["disk_entries"] == 0
+
+    response = _response(static_dir, "x")
+    cache.put(key, response)
+    (static_dir / "results" / "overlay_x.png").unlink()
+
+    assert cache.get(key) is None
+    assert cache.stats()["stale"] == 1
+    assert cache.stats()["disk_entries"] == 0
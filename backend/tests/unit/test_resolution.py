@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from transformers.models.mask2former.image_processing_mask2former import get_mask2former_resize_output_image_size
+
+from app.models.resolution import (
+    DEFAULT_RESOLUTION_POLICIES,
+    ResolutionPolicy,
+    fit_within,
+    inference_size,
+    parse_resolution_policy,
+    tile_origins,
+)
+
+
+def test_fit_within_preserves_aspect_and_never_upscales():
+    assert fit_within((4000, 3000), 1000) == (1000, 750)
+    assert fit_within((3000, 4000), 1000) == (750, 1000)
+    assert fit_within((640, 480), 1000) == (640, 480)
+
+
+@pytest.mark.parametrize("size", [(640, 480), (480, 640), (4000, 3000), (5000, 800), (333, 1999)])
+def test_inference_size_matches_mask2former_processor_rule(size):
+    width, height = size
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    expected_h, expected_w = get_mask2former_resize_output_image_size(
+        image, size=384, max_size=1024, size_divisor=32, default_to_square=False
+    )
+
+    assert inference_size(size, 384, 1024, 32) == (expected_w, expected_h)
+
+
+def test_tile_origins_cover_the_full_length_with_overlap():
+    origins = tile_origins(1500, 640, 128)
+
+    assert origins[0] == 0
+    assert origins[-1] + 640 == 1500
+    assert all(b - a <= 640 - 128 for a, b in zip(origins, origins[1:]))
+    assert tile_origins(500, 640, 128) == [0]
+
+
+def test_parse_resolution_policy_applies_defaults_and_overrides():
+    assert parse_resolution_policy(None, None, DEFAULT_RESOLUTION_POLICIES) == DEFAULT_RESOLUTION_POLICIES["resize"]
+
+    tiled = parse_resolution_policy("TILED", 1536, DEFAULT_RESOLUTION_POLICIES)
+    assert tiled == ResolutionPolicy("tiled", 1536, 640, 128)
+    assert tiled.tag != DEFAULT_RESOLUTION_POLICIES["tiled"].tag
+    assert tiled.describe() == {"mode": "tiled", "max_side": 1536, "tile_size": 640, "tile_overlap": 128}
+
+
+@pytest.mark.parametrize("mode,max_side", [("huge", None), ("resize", 8), ("resize", 100000)])
+def test_parse_resolution_policy_rejects_invalid_values(mode, max_side):
+    with pytest.raises(ValueError):
+        parse_resolution_policy(mode, max_side, DEFAULT_RESOLUTION_POLICIES)
@@ -0,0 +1,57 @@
+import os
+from pathlib import Path
+
+from app.services.result_retention_service import ResultRetentionService
+
+
+def _write_prediction(result_dir: Path, artifact_id: str, mtime: float, size: int = 10) -> None:
+    for prefix in ("orig", "overlay", "mask_3"):
+        path = result_dir / f"{prefix}_{artifact_id}.png"
+        path.write_bytes(b"x" * size)
+        os.utime(path, (mtime, mtime))
+
+
+def test_ttl_evicts_whole_predictions(tmp_path: Path):
+    now = 1_000_000.0
+    _write_prediction(tmp_path, "old0000000", now - 7200)
+    _write_prediction(tmp_path, "new0000000", now - 120)
+
+    service = ResultRetentionService(tmp_path, ttl_sec=3600)
+    summary = service.sweep(now=now)
+
+    assert summary["deleted_predictions"] == 1
+    assert summary["deleted_files"] == 3
+    assert sorted(p.name for p in tmp_path.glob("*.png")) == [
+        "mask_3_new0000000.png",
+        "orig_new0000000.png",
+        "overlay_new0000000.png",
+    ]
+
+
+def test_size_and_count_limits_evict_oldest_first_but_spare_recent(tmp_path: Path):
+    now = 1_000_000.0
+    _write_prediction(tmp_path, "aaaaaaaaaa", now - 500)
+    _write_prediction(tmp_path, "bbbbbbbbbb", now - 400)
+    _write_prediction(tmp_path, "cccccccccc", now - 10)
+
+    service = ResultRetentionService(tmp_path, max_total_bytes=40, max_files=4, min_age_sec=60)
+    summary = service.sweep(now=now)
+
+    assert summary["deleted_predictions"] == 2
+    assert summary["remaining_files"] == 3
+    assert {service.artifact_id_for(p) for p in tmp_path.glob("*.png")} == {"cccccccccc"}
+    assert service.stats()["freed_bytes"] == 60
+
+
+def test_sweep_covers_every_artifact_format_but_skips_temp_files_and_dirs(tmp_path: Path):
+    now = 1_000_000.0
+    for name in ("overlay_dddddddddd.webp", "upload_0123456789abcdef.jpg", ".labels_dddddddddd.png.tmp"):
+        path = tmp_path / name
+        path.write_bytes(b"x")
+        os.utime(path, (now - 7200, now - 7200))
+    (tmp_path / "cache").mkdir()
+
+    summary = ResultRetentionService(tmp_path, ttl_sec=3600).sweep(now=now)
+
+    assert summary["deleted_files"] == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == [".labels_dddddddddd.png.tmp", "cache"]
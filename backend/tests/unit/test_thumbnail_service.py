@@ -0,0 +1,61 @@
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+from app.services.thumbnail_service import ThumbnailService
+
+HASH = "ab" * 32
+
+
+def test_ensure_renders_once_and_keeps_aspect_ratio(tmp_path: Path):
+    source = tmp_path / "source.jpg"
+    Image.new("RGB", (800, 400), color=(10, 20, 30)).save(source)
+    service = ThumbnailService(tmp_path / "thumbs", sizes=(64, 128), default_size=128)
+
+    path = service.ensure(source, HASH, 128)
+    assert path == tmp_path / "thumbs" / "ab" / f"{HASH}_128.webp"
+    with Image.open(path) as thumbnail:
+        assert thumbnail.format == "WEBP"
+        assert thumbnail.size == (128, 64)
+
+    assert service.ensure(source, HASH, 128) == path
+    assert service.stats()["generated"] == 1
+    assert service.stats()["hits"] == 1
+    assert service.pregenerate(source, HASH) == 1
+    assert not list((tmp_path / "thumbs").rglob("*.tmp"))
+
+
+def test_concurrent_requests_render_a_single_thumbnail(tmp_path: Path):
+    source = tmp_path / "source.png"
+    Image.new("RGB", (300, 300)).save(source)
+    service = ThumbnailService(tmp_path / "thumbs", sizes=(32,), image_format="jpeg")
+
+    threads = [threading.Thread(target=service.ensure, args=(source, HASH, 32)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert service.stats()["generated"] == 1
+    assert service.url_for(HASH) == f"/thumbnails/32/{HASH}.jpg"
+
+
+def test_parse_name_rejects_unknown_sizes_formats_and_hashes(tmp_path: Path):
+    service = ThumbnailService(tmp_path, sizes=(160, 320))
+    assert service.parse_name(160, f"{HASH}.webp") == HASH
+    for size, name in [(999, f"{HASH}.webp"), (160, f"{HASH}.jpg"), (160, "../x.webp"), (160, "ABC.webp")]:
+        with pytest.raises(HTTPException) as exc:
+            service.parse_name(size, name)
+        assert exc.value.status_code == 404
+    assert service.urls_for(HASH) == {"160": f"/thumbnails/160/{HASH}.webp", "320": f"/thumbnails/320/{HASH}.webp"}
+
+
+def test_ensure_reports_undecodable_sources(tmp_path: Path):
+    source = tmp_path / "broken.png"
+    source.write_bytes(b"not an image")
+    service = ThumbnailService(tmp_path / "thumbs", sizes=(32,))
+    with pytest.raises(HTTPException) as exc:
+        service.ensure(source, HASH, 32)
+    assert exc.value.status_code == 422
@@ -1,8 +1,11 @@
+import io
+import os
 from pathlib import Path
 
 import numpy as np
 from PIL import Image
 
+from app.services.artifact_writer_service import ArtifactWriterService
 from app.services.visualization_service import VisualizationService
 
 
@@ -23,6 +26,22 @@ def test_to_overlay_keeps_size(tmp_path: Path):
     assert overlay.size == image.size
 
 
+def test_to_overlay_matches_per_class_float_blend(tmp_path: Path):
+    service = VisualizationService(tmp_path)
+    rng = np.random.default_rng(0)
+    arr = rng.integers(0, 256, size=(6, 5, 3), dtype=np.uint8)
+    seg = rng.choice([0, 3, 149, 200], size=(6, 5)).astype(np.int32)
+
+    color_mask = np.zeros_like(arr)
+    for class_id in np.unique(seg):
+        color_mask[seg == class_id] = service.color_for_class(int(class_id))
+    expected = (arr * (1 - 0.45) + color_mask * 0.45).astype(np.uint8)
+
+    overlay = service.to_overlay(Image.fromarray(arr), seg)
+    assert np.array_equal(np.asarray(overlay), expected)
+    assert tuple(service.palette(201)[200]) == service.color_for_class(200)
+
+
 def test_save_image_and_class_masks(tmp_path: Path):
     service = VisualizationService(tmp_path)
     image = Image.new("RGB", (3, 3), color=(10, 20, 30))
@@ -36,3 +55,76 @@ def test_save_image_and_class_masks(tmp_path: Path):
 
     assert len(masks) == 3
     assert {m["label"] for m in masks} == {"wall", "floor", "door"}
+
+
+def test_label_map_round_trip_and_on_demand_class_mask(tmp_path: Path):
+    service = VisualizationService(tmp_path)
+    seg = np.array([[0, 1, 1], [2, 2, 1], [0, 2, 0]], dtype=np.int32)
+
+    url = service.save_label_map(seg)
+    name = url.split("/")[-1]
+    assert url.startswith("/static/results/labels_")
+    assert np.array_equal(service.load_label_map(name), seg)
+
+    refs = service.class_mask_refs(url, seg, {0: "wall", 1: "floor", 2: "door"})
+    assert [r["mask_url"] for r in refs] == [f"/class-masks/{name}/{c}" for c in (0, 1, 2)]
+
+    content, bbox = service.encode_class_mask(name, 1, crop=True)
+    assert bbox == (1, 0, 3, 2)
+    cropped = np.asarray(Image.open(io.BytesIO(content)))
+    assert cropped.tolist() == [[255, 255], [0, 255]]
+
+
+def test_display_images_use_configured_format_through_writer(tmp_path: Path):
+    writer = ArtifactWriterService(max_workers=2)
+    service = VisualizationService(tmp_path, artifact_writer=writer, image_format="webp", lossy_quality=80)
+    image = Image.new("RGB", (8, 6), color=(10, 20, 30))
+    seg = np.zeros((6, 8), dtype=np.int32)
+
+    original_url = service.save_display_image(image, "orig", "abc")
+    overlay_url = service.save_overlay(image, seg, "abc")
+    label_map_url = service.save_label_map(seg, "0123456789")
+
+    assert original_url == "/static/results/orig_abc.webp"
+    assert overlay_url == "/static/results/overlay_abc.webp"
+    assert label_map_url.endswith(".png")
+    assert np.array_equal(service.load_label_map("labels_0123456789.png"), seg)
+
+    writer.flush()
+    with Image.open(tmp_path / "overlay_abc.webp") as written:
+        assert written.format == "WEBP"
+        assert written.size == (8, 6)
+    writer.shutdown()
+
+
+def test_save_upload_keeps_original_bytes_once_per_content_hash(tmp_path: Path):
+    service = VisualizationService(tmp_path)
+    raw = b"\xff\xd8 fake jpeg bytes"
+
+    first = service.save_upload(raw, "JPEG", "ab" * 32)
+    os.utime(tmp_path / first.rsplit("/", 1)[-1], (1, 1))
+    second = service.save_upload(raw, "JPEG", "ab" * 32)
+
+    assert first == second == f"/static/results/upload_{'ab' * 8}.jpg"
+    assert [p.name for p in tmp_path.iterdir()] == [f"upload_{'ab' * 8}.jpg"]
+    assert (tmp_path / f"upload_{'ab' * 8}.jpg").read_bytes() == raw
+    assert (tmp_path / f"upload_{'ab' * 8}.jpg").stat().st_mtime > 1
+    assert service.save_upload(raw, "ICNS", "cd" * 32).endswith(".bin")
+
+
+def test_content_artifact_ids_follow_pixels_segmentation_and_settings(tmp_path: Path):
+    service = VisualizationService(tmp_path)
+    image = Image.new("RGB", (4, 4), color=(1, 2, 3))
+    seg = np.zeros((4, 4), dtype=np.int64)
+
+    artifact_id = service.content_artifact_id(image, seg, "label_map")
+    assert len(artifact_id) == 16
+    assert service.content_artifact_id(image.copy(), seg.copy(), "label_map") == artifact_id
+    assert service.content_artifact_id(image, seg + 1, "label_map") != artifact_id
+    assert service.content_artifact_id(Image.new("RGB", (4, 4)), seg, "label_map") != artifact_id
+    assert service.content_artifact_id(image, seg, "files") != artifact_id
+    webp_service = VisualizationService(tmp_path, image_format="webp")
+    assert webp_service.content_artifact_id(image, seg, "label_map") != artifact_id
+
+    url = service.save_label_map(seg, artifact_id)
+    assert np.array_equal(service.load_label_map(url.rsplit("/", 1)[-1]), seg)
@@ -3,6 +3,13 @@ import { fullUrl } from '@/lib/api';
 import type { TestImage } from '@/types/api';
 import type { ChangeEvent } from 'react';
 
+function thumbnailSrcSet(image: TestImage): string | undefined {
+  if (!image.thumbnail_urls) return undefined;
+  return Object.entries(image.thumbnail_urls)
+    .map(([size, url]) => `${fullUrl(url)} ${size}w`)
+    .join(', ');
+}
+
 type Props = {
   testImages: TestImage[];
   selectedImageId: string;
@@ -39,7 +46,15 @@ export function GalleryPanel({
             onClick={() => onSelectImage(image.id)}
             type="button"
           >
-            <img className={styles.thumbImage} src={fullUrl(image.thumbnail_url)} alt={image.name} />
+            <img
+              className={styles.thumbImage}
+              src={fullUrl(image.thumbnail_url)}
+              srcSet={thumbnailSrcSet(image)}
+              sizes="160px"
+              loading="lazy"
+              decoding="async"
+              alt={image.name}
+            />
             <p>{image.name}</p>
             <span>{image.tags.join(', ')}</span>
           </button>
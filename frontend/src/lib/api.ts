@@ -1,4 +1,12 @@
-import type { DescribeResponse, ModelInfo, PredictResponse, TestImage, TopClass, AreaStat } from '@/types/api';
+import type {
+  AreaStat,
+  DescribeResponse,
+  ModelInfo,
+  PredictDescribeEvent,
+  PredictResponse,
+  TestImage,
+  TopClass,
+} from '@/types/api';
 
 const API_BASE = process.env.NEXT_PUBLIC_API_BASE || 'http://localhost:8000';
 const DEBUG_INGEST_URL = 'http://127.0.0.1:7244/ingest/a9e509fe-5c88-477e-8d74-278e5092e8b7';
@@ -157,3 +165,42 @@ export async function generateDescription(params: {
   });
   return readJsonOrThrow<DescribeResponse>(res, '説明文生成に失敗しました');
 }
+
+export async function predictAndDescribe(
+  source: { file: File } | { imageId: string },
+  onEvent: (event: PredictDescribeEvent) => void
+): Promise<void> {
+  const fd = new FormData();
+  if ('file' in source) {
+    fd.append('file', source.file);
+  } else {
+    fd.append('image_id', source.imageId);
+  }
+  fd.append('model_key', 'ade20k_official');
+
+  const res = await fetch(`${API_BASE}/predict-describe?format=sse`, { method: 'POST', body: fd });
+  if (!res.ok || !res.body) {
+    await readJsonOrThrow<never>(res, '推論に失敗しました');
+    return;
+  }
+
+  // Server-sent events arrive in stage order: stats → artifacts → description → done (or a single error).
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary >= 0) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const event = block.match(/^event: (.+)$/m)?.[1];
+      const data = block.match(/^data: (.+)$/m)?.[1];
+      if (event && data) {
+        onEvent({ event, data: JSON.parse(data) } as PredictDescribeEvent);
+      }
+      boundary = buffer.indexOf('\n\n');
+    }
+  }
+}
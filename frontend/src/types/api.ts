@@ -3,6 +3,8 @@ export type ModelInfo = {
   hf_id: string;
   label_space: string;
   note: string;
+  execution_mode?: string;
+  backend?: string;
 };
 
 export type TestImage = {
@@ -11,6 +13,11 @@ export type TestImage = {
   thumbnail_url: string;
   image_url: string;
   tags: string[];
+  width?: number | null;
+  height?: number | null;
+  bytes?: number;
+  sha256?: string;
+  thumbnail_urls?: Record<string, string>;
 };
 
 export type Label = {
@@ -36,22 +43,85 @@ export type ClassMask = {
   mask_url: string;
 };
 
+export type ResolutionInfo = {
+  mode: "resize" | "tiled";
+  max_side: number;
+  inference_width: number;
+  inference_height: number;
+  tile_size?: number;
+  tile_overlap?: number;
+  tiles?: number;
+};
+
+export type IngestInfo = {
+  format: string | null;
+  source_width: number;
+  source_height: number;
+  decoded_width: number;
+  decoded_height: number;
+  draft: boolean;
+};
+
 export type PredictResponse = {
   model_key: string;
   model_hf_id: string;
+  execution_mode?: string;
+  backend?: string;
   inference_ms: number;
+  batch_size?: number;
+  queue_wait_ms?: number;
+  resolution?: ResolutionInfo;
+  timings?: Record<string, number>;
+  decode_ms?: number;
+  ingest?: IngestInfo;
+  cached?: boolean;
   original_url: string;
   overlay_url: string;
   labels: Label[];
   top_classes: TopClass[];
   area_stats: AreaStat[];
+  label_map_url?: string | null;
   class_masks: ClassMask[];
   width: number;
   height: number;
 };
 
+export type JobStatus = "queued" | "running" | "succeeded" | "failed" | "cancelled";
+
+export type JobInfo = {
+  job_id: string;
+  kind: string;
+  status: JobStatus;
+  stage: string;
+  priority: number;
+  created_at: number;
+  started_at: number | null;
+  finished_at: number | null;
+  version: number;
+  source?: { filename?: string; image_id?: string };
+  model_key?: string;
+  resolution?: { mode: string; max_side: number; tile_size?: number; tile_overlap?: number };
+  queue_wait_ms?: number;
+  run_ms?: number;
+  result?: PredictResponse;
+  error?: { status: number; detail: string };
+  status_url?: string;
+  events_url?: string;
+};
+
 export type DescribeResponse = {
   summary_ja: string;
   highlights: string[];
   cautions: string[];
+  cached?: boolean;
 };
+
+export type PredictDescribeEvent =
+  | { event: 'stats'; data: Omit<PredictResponse, 'original_url' | 'overlay_url' | 'label_map_url' | 'class_masks'> }
+  | { event: 'artifacts'; data: PredictResponse }
+  | { event: 'description'; data: (DescribeResponse & { status: 200 }) | { status: number; detail: string } }
+  | { event: 'error'; data: { status: number; detail: string } }
+  | {
+      event: 'done';
+      data: { done: true; stats_ms?: number; artifacts_ms?: number; description_ms?: number; total_ms: number };
+    };